@@ -1,10 +1,11 @@
 import random
 import math
 from utils import dist, AI_NAMES, AI_TAUNTS
-from models import Entity, Projectile
+from models import Entity, projectile_pool
 
 class AIController:
-    def __init__(self):
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random
         self.attack_probability = 0.02
         self.jump_probability = 0.015
         self.special_probability = 0.01
@@ -35,15 +36,15 @@ class AIController:
             entity.vx = 0
 
     def _handle_jumping(self, entity):
-        if random.random() < self.jump_probability and entity.on_ground:
-            entity.vy = -18 - random.random() * 6
+        if self.rng.random() < self.jump_probability and entity.on_ground:
+            entity.vy = -18 - self.rng.random() * 6
             entity.on_ground = False
 
     def _handle_attacking(self, entity, dx, projectiles, messages):
-        if entity.cooldown <= 0 and random.random() < self.attack_probability:
+        if entity.cooldown <= 0 and self.rng.random() < self.attack_probability:
             dir = 1 if dx > 0 else -1
             damage = 20 * entity.get_damage_multiplier()
-            projectile = Projectile(
+            projectile = projectile_pool.acquire(
                 entity.x + dir*1.1, 
                 entity.y-0.5, 
                 18.0*dir, 
@@ -55,12 +56,12 @@ class AIController:
             projectiles.append(projectile)
             entity.cooldown = 1.2
             
-            if random.random() < self.taunt_probability:
-                taunt = random.choice(AI_TAUNTS)
+            if self.rng.random() < self.taunt_probability:
+                taunt = self.rng.choice(AI_TAUNTS)
                 messages.append([1.5, f"{entity.name}: {taunt}", 0])
 
     def _handle_special_ability(self, entity, targets, projectiles):
-        if entity.special_cooldown <= 0 and random.random() < self.special_probability:
+        if entity.special_cooldown <= 0 and self.rng.random() < self.special_probability:
             for target in targets[:2]:
                 dx = target.x - entity.x
                 dy = target.y - entity.y
@@ -68,7 +69,7 @@ class AIController:
                 if dist_to_target > 0:
                     vx = (dx / dist_to_target) * 12
                     vy = (dy / dist_to_target) * 12
-                    projectile = Projectile(
+                    projectile = projectile_pool.acquire(
                         entity.x, 
                         entity.y-0.5, 
                         vx, 
@@ -81,14 +82,14 @@ class AIController:
                     projectiles.append(projectile)
             entity.special_cooldown = 5.0
 
-def create_ai_entities(max_x, ground_row, count=5):
+def create_ai_entities(max_x, ground_row, count=5, rng=random):
     from utils import EMOJI_CHARACTERS, get_random_position
     
     entities = []
     for i in range(count):
-        x, y = get_random_position(max_x, ground_row)
-        ch = random.choice(EMOJI_CHARACTERS)
-        name = random.choice(AI_NAMES)
+        x, y = get_random_position(max_x, ground_row, rng)
+        ch = rng.choice(EMOJI_CHARACTERS)
+        name = rng.choice(AI_NAMES)
         entity = Entity(x, y, ch, name=name, ai=True)
         entities.append(entity)
     
@@ -0,0 +1,86 @@
+import asyncio
+
+import protocol
+import server
+from server import RoomMember
+
+
+class AsyncClient(RoomMember):
+    """One connection on the asyncio server.
+
+    Every client shares the event loop thread, so an idle lobby connection
+    costs a few kilobytes of buffers instead of a whole OS thread.
+    """
+
+    def __init__(self, reader, writer, initial=b""):
+        self.reader = reader
+        self.writer = writer
+        self.decoder = protocol.FrameDecoder(raw=True)
+        self._init_member()
+        self._wakeup = asyncio.Event()
+        self.outbox.on_put = self._wakeup.set
+        # Bytes already read off the socket by a --workers gateway.
+        self.initial = initial
+
+    async def handle(self):
+        writer_task = asyncio.get_running_loop().create_task(self._write_loop())
+        server.metrics.client_connected()
+        try:
+            data = self.initial
+            while True:
+                self.decoder.append(data)
+                for msg in self._decode_received(len(data)):
+                    self._handle_message(msg)
+                data = await self.reader.read(protocol.RECV_SIZE)
+                if not data:
+                    break
+        except ConnectionError:
+            pass
+        except protocol.FrameTooLarge as e:
+            print(f"Dropping client {self.client_id}: {e}")
+        finally:
+            self._leave_room()
+            self.outbox.close()
+            server.metrics.client_disconnected()
+            await writer_task
+            self.writer.close()
+
+    async def _write_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            batch = self.outbox.pop_all()
+            if batch is None:
+                return
+            if not batch:
+                continue
+            data = b"".join(batch)
+            self._count_sent(len(batch), len(data))
+            try:
+                self.writer.write(data)
+                await self.writer.drain()
+            except (OSError, RuntimeError):
+                self.outbox.close()
+                return
+
+    def _close_transport(self):
+        self.writer.transport.abort()
+
+
+async def _on_connect(reader, writer):
+    await AsyncClient(reader, writer).handle()
+
+
+async def run_server(host, port):
+    listener = await asyncio.start_server(_on_connect, host, port, backlog=4096)
+    print(f"Server listening on {host}:{port} (asyncio)")
+    asyncio.get_running_loop().create_task(server.scheduler.run_async())
+    async with listener:
+        await listener.serve_forever()
+
+
+def serve(host, port):
+    try:
+        asyncio.run(run_server(host, port))
+    except KeyboardInterrupt:
+        pass
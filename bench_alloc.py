@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Model allocations and GC pauses per frame, with and without the object pools.
+
+Runs a seeded headless AI brawl at 30 fps with aggressive fighters and
+list-backed projectiles and particles (the path without numpy, where
+every shot and spark is a models object), once with models.Pool free
+lists and once with pools of size 0, which allocate every object anew.
+Reports Projectile/Particle objects created and reused per frame from
+models.allocation_counts, and garbage collections and their pause times
+from gc.callbacks:
+
+    python bench_alloc.py --players 16 --seconds 60
+"""
+
+import argparse
+import gc
+import random
+import time
+
+import models
+from ai import AIController
+from game_logic import GameLogic
+from models import Entity, allocation_counts
+
+FPS = 30
+
+
+class GCTimer:
+    """Counts collections per generation and times each pause."""
+
+    def __init__(self):
+        self.collections = [0, 0, 0]
+        self.pauses = []
+        self._start = None
+
+    def __call__(self, phase, info):
+        if phase == "start":
+            self._start = time.perf_counter()
+        else:
+            self.pauses.append(time.perf_counter() - self._start)
+            self.collections[info["generation"]] += 1
+
+
+def run(players, seconds, seed, pool_size):
+    for pool in (models.projectile_pool, models.particle_pool):
+        pool.size = pool_size
+        pool.free.clear()
+    random.seed(seed)
+    max_x, max_y = 80, 24
+    logic = GameLogic(max_x, max_y, max_y - 6)
+    ai = AIController()
+    ai.attack_probability = 0.2
+    ai.special_probability = 0.05
+    entities = [Entity(5 + i * (max_x - 10) / max(1, players - 1), logic.ground_row - 0.5, "🙂", name=f"P{i}", ai=True)
+                for i in range(players)]
+    projectiles, particles, messages = [], [], []
+    dt = 1.0 / FPS
+    frames = int(seconds * FPS)
+    before = allocation_counts()
+    timer = GCTimer()
+    gc.collect()
+    gc.callbacks.append(timer)
+    try:
+        for _ in range(frames):
+            for e in entities:
+                ai.update_ai_entity(e, entities, projectiles, messages, dt)
+            logic.update_entities(entities, dt)
+            logic.handle_entity_collisions(entities)
+            logic.handle_projectile_collisions(projectiles, entities, particles, messages)
+            logic.update_projectiles(projectiles, dt)
+            logic.update_particles(particles, dt)
+            messages.clear()
+    finally:
+        gc.callbacks.remove(timer)
+    after = allocation_counts()
+    created = sum(after[k][0] - before[k][0] for k in after) / frames
+    reused = sum(after[k][1] - before[k][1] for k in after) / frames
+    return created, reused, timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'pools':<6} {'created/f':>9} {'reused/f':>8} {'gen0':>5} {'gen1':>5} {'gen2':>5} {'gc ms total':>11} {'gc ms max':>9}")
+    for label, size in (("off", 0), ("on", models.POOL_SIZE)):
+        created, reused, timer = run(args.players, args.seconds, args.seed, size)
+        print(f"{label:<6} {created:>9.2f} {reused:>8.2f} {timer.collections[0]:>5} {timer.collections[1]:>5} "
+              f"{timer.collections[2]:>5} {sum(timer.pauses) * 1000:>11.2f} {max(timer.pauses, default=0) * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
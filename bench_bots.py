@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Headless bot swarm for load testing the server.
+
+Spawns `--bots` players spread over `--rooms` rooms, each a real NetClient
+on loopback. Every bot joins, readies up and, once its room's countdown
+ends, plays with AIController: it steps its own Entity at 30 Hz against
+the positions its peers report, streams `state` at `--state-rate` and
+sends an `attack` whenever the AI fires. Reports end-to-end relay latency
+percentiles (bot send to peer receive thread), relay loss and the CPU
+time of the server and of the generator itself:
+
+    python bench_bots.py --bots 200 --rooms 50 --duration 20
+
+By default the server is started for the run; pass `--port` (and
+optionally `--server-pid` for CPU) to use one that is already running.
+Latency needs a send time in each state message, which only the JSON
+codec relays, so with `--codec bin1` only loss is measured.
+"""
+
+import argparse
+import queue
+import random
+import time
+
+import protocol
+from ai import AIController
+from bench_server import free_port, start_server
+from bench_workers import server_cpu
+from game_logic import GameLogic
+from models import Entity
+from net_client import NetClient
+from utils import DT, EMOJI_CHARACTERS, get_random_position
+
+MAX_X, MAX_Y, GROUND_ROW = 100, 30, 28
+
+
+class ArrivalInbox(queue.SimpleQueue):
+    """NetClient inbox that keeps when the receive thread got each message."""
+
+    def put(self, msg, block=True, timeout=None):
+        super().put((time.perf_counter(), msg))
+
+
+class Bot:
+    def __init__(self, host, port, room, index, codec):
+        self.net = NetClient(host, port, codecs=(codec,) if codec != protocol.JSON.name else ())
+        self.net.inbox = ArrivalInbox()
+        self.room = room
+        self.index = index
+        x, y = get_random_position(MAX_X, GROUND_ROW)
+        self.entity = Entity(x, y, random.choice(EMOJI_CHARACTERS), f"bot{index}", ai=True)
+        self.peers = {}
+        self.started = False
+        self.sent = 0
+        self.received = 0
+        self.latencies = []
+
+    def connect(self):
+        self.net.connect()
+        self.net.join(self.room, self.entity.name, self.entity.ch)
+        self.net.set_ready(True)
+
+    def drain(self, counting):
+        inbox = self.net.inbox
+        while True:
+            try:
+                arrived, msg = inbox.get_nowait()
+            except queue.Empty:
+                return
+            mtype = msg.get("type")
+            if mtype == "state":
+                peer = self.peers.get(msg.get("id"))
+                if peer is None:
+                    peer = self.peers[msg.get("id")] = Entity(0, 0, "?", ai=False)
+                peer.x, peer.y, peer.hp = msg["x"], msg["y"], msg["hp"]
+                if counting:
+                    self.received += 1
+                    if "t" in msg:
+                        self.latencies.append(arrived - msg["t"])
+            elif mtype == "attack":
+                if counting:
+                    self.received += 1
+            elif mtype == "player_left":
+                self.peers.pop(msg.get("id"), None)
+            elif mtype == "game_start":
+                self.started = True
+
+    def step(self, ai, logic, send_state):
+        entity = self.entity
+        projectiles = []
+        ai.update_ai_entity(entity, [entity, *self.peers.values()], projectiles, [], DT)
+        logic.update_entities([entity], DT)
+        for p in projectiles:
+            if not p.special:
+                self.net.send_attack(p.x, p.y, 1 if p.vx > 0 else -1)
+                self.sent += 1
+        if send_state:
+            self.net.send_state(entity.x, entity.y, entity.hp, t=time.perf_counter())
+            self.sent += 1
+
+
+def run(bots, seconds, counting, state_every, ai, logic, tick=0):
+    """Drive every bot at 30 Hz for `seconds`; sends only when `state_every` is set."""
+    end = time.perf_counter() + seconds
+    next_tick = time.perf_counter()
+    while time.perf_counter() < end:
+        for bot in bots:
+            bot.drain(counting)
+            if state_every:
+                # Stagger the bots so state messages do not all go out on one tick.
+                bot.step(ai, logic, (tick + bot.index) % state_every == 0)
+        tick += 1
+        next_tick += DT
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_tick = time.perf_counter()
+    return tick
+
+
+def percentile(values, fraction):
+    return values[int((len(values) - 1) * fraction)] * 1000 if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bots", type=int, default=40)
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of play to measure")
+    parser.add_argument("--state-rate", type=float, default=10.0, help="state messages per second per bot")
+    parser.add_argument("--codec", choices=(protocol.JSON.name, protocol.BINARY.name), default=protocol.JSON.name)
+    parser.add_argument("--mode", choices=("threaded", "asyncio"), default="threaded")
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--port", type=int, help="use a server already listening on 127.0.0.1:PORT")
+    parser.add_argument("--server-pid", type=int, help="pid of that server, for its CPU time")
+    args = parser.parse_args()
+    if args.bots < 2 * args.rooms:
+        parser.error("every room needs at least 2 bots to start a game")
+
+    proc = None
+    port, pid = args.port, args.server_pid
+    if port is None:
+        port = free_port()
+        extra = ["--idle-timeout", "0"] + (["--workers", str(args.workers)] if args.workers else [])
+        proc = start_server(args.mode, port, extra)
+        pid = proc.pid
+    try:
+        bots = [Bot("127.0.0.1", port, f"bots-{i % args.rooms}", i, args.codec) for i in range(args.bots)]
+        for bot in bots:
+            bot.connect()
+        ai, logic = AIController(), GameLogic(MAX_X, MAX_Y, GROUND_ROW)
+
+        print(f"{args.bots} bots in {args.rooms} rooms, waiting for the countdowns...")
+        deadline = time.perf_counter() + 30
+        while not all(bot.started for bot in bots):
+            if time.perf_counter() > deadline:
+                raise SystemExit(f"only {sum(b.started for b in bots)}/{len(bots)} bots got game_start")
+            run(bots, 0.1, False, 0, ai, logic)
+
+        state_every = max(1, round(1 / (DT * args.state_rate)))
+        cpu0 = server_cpu(pid) if pid else 0.0
+        own0 = time.process_time()
+        t0 = time.perf_counter()
+        run(bots, args.duration, True, state_every, ai, logic)
+        elapsed = time.perf_counter() - t0
+        # Let the last relays arrive before counting what went missing.
+        run(bots, 1.0, True, 0, ai, logic)
+        cpu = server_cpu(pid) - cpu0 if pid else None
+        own = time.process_time() - own0
+        for bot in bots:
+            bot.net.close()
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    room_size = {}
+    for bot in bots:
+        room_size[bot.room] = room_size.get(bot.room, 0) + 1
+    expected = sum(bot.sent * (room_size[bot.room] - 1) for bot in bots)
+    received = sum(bot.received for bot in bots)
+    sent = sum(bot.sent for bot in bots)
+    latencies = sorted(v for bot in bots for v in bot.latencies)
+
+    print(f"sent {sent:,} ({sent / elapsed:,.0f}/s), relayed {received:,} of {expected:,} expected "
+          f"({received / elapsed:,.0f}/s), loss {max(0, expected - received) / max(expected, 1):.2%}")
+    if latencies:
+        print(f"relay latency ms: p50 {percentile(latencies, 0.5):.2f}  p90 {percentile(latencies, 0.9):.2f}  "
+              f"p99 {percentile(latencies, 0.99):.2f}  max {percentile(latencies, 1.0):.2f}")
+    else:
+        print("relay latency: not measured (bin1 relays drop the send time)")
+    if cpu is not None:
+        print(f"server cpu {cpu:.2f}s ({cpu / elapsed:.0%} of one core)", end=", ")
+    print(f"generator cpu {own:.2f}s ({own / elapsed:.0%} of one core)")
+
+
+if __name__ == "__main__":
+    main()
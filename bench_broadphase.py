@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Collision pass cost from 10 to 2,000 entities: all-pairs loops vs the spatial hash.
+
+Entities wander over a ground-level arena that widens with their count
+(about four columns each, so a crowd stays as dense as a busy room),
+with half as many projectiles and a tenth as many power-ups in flight.
+Each frame times the three GameLogic collision passes: entity pushes,
+projectile hits and power-up pickups. "brute" is the all-pairs code the
+passes used before the spatial hash; "grid" is GameLogic as it is, with
+projectiles in a list and, if numpy is installed, in a ProjectileStore:
+
+    python bench_broadphase.py --entities 10 100 500 2000
+"""
+
+import argparse
+import math
+import random
+import time
+
+from game_logic import GameLogic
+from models import Entity, PowerUp, Projectile
+from projectiles import make_projectiles
+
+HEIGHT = 24
+
+
+def brute_entity_collisions(entities):
+    for i in range(len(entities)):
+        a = entities[i]
+        if not a.is_alive:
+            continue
+        for j in range(i + 1, len(entities)):
+            b = entities[j]
+            if not b.is_alive:
+                continue
+            dx = b.x - a.x
+            dy = b.y - a.y
+            d = math.hypot(dx, dy)
+            if d < 1.0 and d > 0.001:
+                overlap = 1.0 - d
+                nx = dx / d
+                ny = dy / d
+                a.x -= nx * overlap * 0.5
+                a.y -= ny * overlap * 0.5
+                b.x += nx * overlap * 0.5
+                b.y += ny * overlap * 0.5
+                ax, bx = a.vx, b.vx
+                a.vx = ax * 0.5 + bx * 0.5
+                b.vx = bx * 0.5 + ax * 0.5
+
+
+def brute_projectile_collisions(logic, projectiles, entities, particles, messages):
+    for p in projectiles[:]:
+        for e in entities:
+            if not e.is_alive or e.invulnerable or e is p.owner:
+                continue
+            if abs(e.x - p.x) < 1.0 and abs(e.y - p.y) < 1.0:
+                logic._apply_hit(p.owner, p.damage, e, particles, messages)
+                projectiles.remove(p)
+                break
+
+
+def brute_power_ups(power_ups, entities):
+    for power_up in power_ups:
+        for e in entities:
+            if e.is_alive and abs(e.x - power_up.x) < 1.0 and abs(e.y - power_up.y) < 1.0:
+                power_up.collect(e)
+                break
+
+
+def run(kind, count, frames):
+    """Return mean ms per frame for (entity, projectile, power-up) passes."""
+    random.seed(count)
+    width = max(80, 4 * count)
+    logic = GameLogic(width, HEIGHT, HEIGHT - 6)
+    entities = [Entity(random.uniform(1, width - 2), random.uniform(2, logic.ground_row - 0.5), "🙂",
+                       name=f"P{i}") for i in range(count)]
+    for e in entities:
+        e.hp = e.max_hp = 10 ** 9
+    particles, messages = [], []
+    totals = [0.0, 0.0, 0.0]
+    for _ in range(frames):
+        for e in entities:
+            e.x = min(width - 2, max(1, e.x + random.uniform(-0.5, 0.5)))
+            e.y = min(logic.ground_row - 0.5, max(2, e.y + random.uniform(-0.5, 0.5)))
+        shots = [Projectile(random.uniform(0, width - 1), random.uniform(2, logic.ground_row), 25.0, 0, "⚡",
+                            random.choice(entities)) for _ in range(count // 2)]
+        power_ups = [PowerUp(random.uniform(1, width - 2), logic.ground_row - 2, "speed") for _ in range(count // 10)]
+        if kind == "store":
+            projectiles = make_projectiles()
+            projectiles.extend(shots)
+        else:
+            projectiles = shots
+
+        start = time.perf_counter()
+        if kind == "brute":
+            brute_entity_collisions(entities)
+        else:
+            logic.handle_entity_collisions(entities)
+        lap = time.perf_counter()
+        if kind == "brute":
+            brute_projectile_collisions(logic, projectiles, entities, particles, messages)
+        else:
+            logic.handle_projectile_collisions(projectiles, entities, particles, messages)
+        lap2 = time.perf_counter()
+        if kind == "brute":
+            brute_power_ups(power_ups, entities)
+        else:
+            logic.handle_power_up_collection(power_ups, entities, particles, messages)
+        end = time.perf_counter()
+        totals[0] += lap - start
+        totals[1] += lap2 - lap
+        totals[2] += end - lap2
+        particles.clear()
+        messages.clear()
+    return [t / frames * 1000 for t in totals]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, nargs="+", default=[10, 100, 500, 2000])
+    parser.add_argument("--frames", type=int, default=20)
+    args = parser.parse_args()
+
+    kinds = ["brute", "grid"]
+    if not isinstance(make_projectiles(), list):
+        kinds.append("store")
+    print(f"{'entities':>8} {'path':<6} {'pushes':>8} {'shots':>8} {'pickups':>8} {'total ms':>8} {'speedup':>7}")
+    for count in args.entities:
+        base = None
+        for kind in kinds:
+            ents, shots, pickups = run(kind, count, args.frames)
+            total = ents + shots + pickups
+            base = base or total
+            print(f"{count:>8} {kind:<6} {ents:>8.3f} {shots:>8.3f} {pickups:>8.3f} {total:>8.3f} {base / total:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Codec benchmark: bytes per message and encode/decode throughput of the
+newline-JSON wire format against the bin1 struct frames, for the hot
+relayed message types.
+
+    python bench_codec.py --count 200000
+"""
+
+import argparse
+import time
+
+import protocol
+
+SAMPLES = {
+    "state": {"type": "state", "x": 37.21875, "y": 17.5, "hp": 95, "id": "a1b2c3d4"},
+    "attack": {"type": "attack", "x": 37.21875, "y": 17.5, "dir": -1, "id": "a1b2c3d4"},
+    "respawn": {"type": "respawn", "x": 12.0, "y": 17.0, "id": "a1b2c3d4"},
+}
+
+
+def bench_codec(codec, msg, count):
+    frame = codec.encode(msg)
+    t0 = time.perf_counter()
+    for _ in range(count):
+        codec.encode(msg)
+    encode_rate = count / (time.perf_counter() - t0)
+
+    # Decode a realistic burst: many frames arriving in one recv.
+    batch = 256
+    stream = frame * batch
+    rounds = max(1, count // batch)
+    decoder = protocol.FrameDecoder()
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        decoder.feed(stream)
+    decode_rate = rounds * batch / (time.perf_counter() - t0)
+    return len(frame), encode_rate, decode_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'message':<8} {'codec':<5} {'bytes':>6} {'encode/s':>12} {'decode/s':>12}")
+    for name, msg in SAMPLES.items():
+        results = {}
+        for codec in (protocol.JSON, protocol.BINARY):
+            size, enc, dec = bench_codec(codec, msg, args.count)
+            results[codec.name] = size
+            print(f"{name:<8} {codec.name:<5} {size:>6} {enc:>12,.0f} {dec:>12,.0f}")
+        print(f"{'':<8} bin1 is {results['json'] / results['bin1']:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Receive-side framing benchmark: parse bursts of small messages.
+
+"split" is the framing the client and server used to share: append each
+recv to a bytes buffer and `split(b"\\n", 1)` one line at a time, which
+copies everything after the line on every message. "decoder" is
+protocol.FrameDecoder, which scans one bytearray with `find`. Both parse
+the same JSON state lines, delivered in chunks of each size (4 KB is one
+recv; bigger chunks are what a reader that fell behind gets):
+
+    python bench_framing.py --messages 50000 --chunks 4096 65536 262144 1048576
+"""
+
+import argparse
+import json
+import time
+
+import protocol
+
+
+def split_framing(chunks):
+    buffer = b""
+    count = 0
+    for data in chunks:
+        buffer += data
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            if not line:
+                continue
+            json.loads(line.decode("utf-8"))
+            count += 1
+    return count
+
+
+def decoder_framing(chunks):
+    decoder = protocol.FrameDecoder()
+    count = 0
+    for data in chunks:
+        count += len(decoder.feed(data))
+    return count
+
+
+def make_chunks(messages, chunk):
+    line = protocol.JSON.encode({"type": "state", "x": 37.21875, "y": 17.5, "hp": 95, "id": "0a1b2c3d"})
+    stream = line * messages
+    return [stream[i:i + chunk] for i in range(0, len(stream), chunk)]
+
+
+def timed(fn, chunks):
+    t0 = time.perf_counter()
+    count = fn(chunks)
+    return count / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[4096, 65536, 262144, 1048576])
+    args = parser.parse_args()
+
+    print(f"{'chunk':>8} {'split msg/s':>12} {'decoder msg/s':>14} {'speedup':>8}")
+    for chunk in args.chunks:
+        chunks = make_chunks(args.messages, chunk)
+        before = timed(split_framing, chunks)
+        after = timed(decoder_framing, chunks)
+        print(f"{chunk:>8} {before:>12,.0f} {after:>14,.0f} {after / before:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
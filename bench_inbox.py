@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Client inbox benchmark: catch up on a backlog of queued state messages.
+
+A game loop that stalled (a slow terminal, a suspended laptop) finds
+every state update of the stall waiting for it. "queue" applies them one
+at a time, as the old queue.Queue inbox made it do; "inbox" is
+net_client.Inbox, which keeps only the newest state per player, so the
+catch-up frame costs one state per player however long the stall was:
+
+    python bench_inbox.py --players 2 8 32 --backlog 3000
+"""
+
+import argparse
+import time
+
+from net_client import Inbox
+
+
+def states(players, backlog):
+    return [{"type": "state", "id": f"p{p}", "x": float(i), "y": 5.0, "hp": 100}
+            for i in range(backlog) for p in range(players)]
+
+
+def apply(messages, positions):
+    for msg in messages:
+        if msg.get("type") == "state":
+            positions[msg["id"]] = (float(msg["x"]), float(msg["y"]), int(msg["hp"]))
+
+
+def queued(messages):
+    t0 = time.perf_counter()
+    apply(messages, {})
+    return time.perf_counter() - t0
+
+
+def coalesced(messages):
+    inbox = Inbox()
+    for msg in messages:
+        inbox.put(msg)
+    t0 = time.perf_counter()
+    apply(inbox.drain(), {})
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[2, 8, 32])
+    parser.add_argument("--backlog", type=int, default=3000, help="states queued per player (3000 is 5 min at 10 Hz)")
+    args = parser.parse_args()
+
+    print(f"{'players':>8} {'queued':>8} {'queue ms':>10} {'inbox ms':>10} {'speedup':>8}")
+    for players in args.players:
+        messages = states(players, args.backlog)
+        before = queued(messages)
+        after = coalesced(messages)
+        print(f"{players:>8} {len(messages):>8} {before * 1000:>10.3f} {after * 1000:>10.3f} {before / after:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Cost of the server's metrics on its hot path.
+
+Pushes bursts of state messages through the same path a connection uses
+(FrameDecoder -> RoomMember._decode_received -> relay -> send queues ->
+the writer's batch join) and compares relayed messages per second with
+instrumentation as shipped against the same code with the metrics hooks
+stubbed out:
+
+    python bench_metrics.py --players 4 --repeat 15
+"""
+
+import argparse
+import contextlib
+import statistics
+import time
+
+import protocol
+import server
+from bench_relay import BenchMember
+
+
+@contextlib.contextmanager
+def metrics_off():
+    """Stub out per-read and per-write counting and timing samples."""
+    member = server.RoomMember
+    saved = (member._decode_received, member._count_sent, server.metrics.sample)
+    member._decode_received = lambda self, nbytes: self.decoder.decode()
+    member._count_sent = lambda self, frames, nbytes: None
+    server.metrics.sample = lambda: False
+    try:
+        yield
+    finally:
+        member._decode_received, member._count_sent, server.metrics.sample = saved
+
+
+def run(players, count, codec):
+    members = [BenchMember() for _ in range(players)]
+    for i, m in enumerate(members):
+        m.decoder = protocol.FrameDecoder(raw=True)
+        m._join_room("bench", f"p{i}", "🙂", codec=codec)
+    for m in members:
+        m.outbox.pop_all()
+
+    sender = members[0]
+    burst = 64
+    stream = codec.encode({"type": "state", "x": 37.21875, "y": 17.5, "hp": 95}) * burst
+    rounds = max(1, count // burst)
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        sender.decoder.append(stream)
+        for msg in sender._decode_received(len(stream)):
+            sender._handle_message(msg)
+        for m in members:
+            batch = m.outbox.pop_all()
+            if batch:
+                m._count_sent(len(batch), len(b"".join(batch)))
+    elapsed = time.perf_counter() - t0
+    for m in members:
+        m._leave_room()
+    return rounds * burst / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--count", type=int, default=20000, help="messages per run")
+    parser.add_argument("--repeat", type=int, default=15, help="runs per variant, alternating which goes first")
+    args = parser.parse_args()
+
+    print(f"room of {args.players}, relayed messages/s over {args.repeat} runs each")
+    print(f"{'codec':<5} {'off median':>11} {'on median':>11} {'off best':>11} {'on best':>11} {'median':>7}")
+    for codec in (protocol.JSON, protocol.BINARY):
+        on, off = [], []
+        for i in range(args.repeat):
+            if i % 2:
+                on.append(run(args.players, args.count, codec))
+            with metrics_off():
+                off.append(run(args.players, args.count, codec))
+            if not i % 2:
+                on.append(run(args.players, args.count, codec))
+        off_med, on_med = statistics.median(off), statistics.median(on)
+        print(f"{codec.name:<5} {off_med:>11,.0f} {on_med:>11,.0f} {max(off):>11,.0f} {max(on):>11,.0f} "
+              f"{(on_med - off_med) / off_med:>+7.1%}")
+
+
+if __name__ == "__main__":
+    main()
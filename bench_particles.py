@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Particle frame cost: list of models.Particle vs particles.ParticleSystem.
+
+Keeps roughly N particles alive at 30 fps by spawning explosion bursts
+every frame (a particle lives 1 s on average), then times a frame's
+update plus working out what the renderer would draw on an 80x24
+screen. The list path is GameLogic.update_particles as it was
+(particles.remove per expired particle) and as it is now (one rebuild):
+
+    python bench_particles.py --particles 1000 10000 30000
+"""
+
+import argparse
+import random
+import time
+
+from game_logic import GameLogic
+from particles import ParticleSystem
+
+FPS = 30
+BURST = 8
+MAX_X, MAX_Y = 80, 24
+
+
+def remove_each(particles, dt):
+    # GameLogic.update_particles before ParticleSystem.
+    for particle in particles[:]:
+        if particle.update(dt):
+            particles.remove(particle)
+
+
+def list_cells(particles):
+    cells = {}
+    for particle in particles:
+        sx, sy = int(round(particle.x)), int(round(particle.y))
+        if 0 <= sy < MAX_Y and 0 <= sx < MAX_X:
+            cells[sy, sx] = particle.ch
+    return cells
+
+
+def spawn_point():
+    return random.uniform(5, MAX_X - 5), random.uniform(2, MAX_Y - 6)
+
+
+def run(kind, target, frames):
+    """Return (mean ms per frame, live particles at the end)."""
+    random.seed(1)
+    logic = GameLogic(MAX_X, MAX_Y, MAX_Y - 6)
+    particles = ParticleSystem() if kind == "soa" else []
+    bursts = max(1, round(target / FPS / BURST))
+    dt = 1.0 / FPS
+    # Warm up for two particle lifetimes so births and deaths balance.
+    warmup = 2 * FPS
+    elapsed = 0.0
+    for frame in range(warmup + frames):
+        start = time.perf_counter()
+        for _ in range(bursts):
+            logic.spawn_burst(particles, *spawn_point(), BURST)
+        if kind == "remove":
+            remove_each(particles, dt)
+        else:
+            logic.update_particles(particles, dt)
+        if kind == "soa":
+            list(particles.cells(MAX_X, MAX_Y))
+        else:
+            list_cells(particles)
+        if frame >= warmup:
+            elapsed += time.perf_counter() - start
+    return elapsed / frames * 1000, len(particles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--particles", type=int, nargs="+", default=[1000, 10000, 30000])
+    parser.add_argument("--frames", type=int, default=60)
+    args = parser.parse_args()
+
+    budget = 1000 / FPS
+    print(f"{'particles':>9} {'path':<12} {'live':>6} {'ms/frame':>8} {'of 30fps':>8}")
+    for target in args.particles:
+        for kind, label in (("remove", "list remove"), ("list", "list rebuild"), ("soa", "numpy soa")):
+            ms, live = run(kind, target, args.frames)
+            print(f"{target:>9} {label:<12} {live:>6} {ms:>8.2f} {ms / budget:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
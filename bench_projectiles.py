@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Projectile frame cost: list of models.Projectile vs projectiles.ProjectileStore.
+
+Keeps about N projectiles in flight among M fighters standing on an
+80x24 arena, firing specials (five projectiles each) to replace those
+that land or expire, and times one frame of
+GameLogic.handle_projectile_collisions plus update_projectiles. "list
+remove" is the per-projectile loop as it was, with list.remove on every
+hit and expiry:
+
+    python bench_projectiles.py --projectiles 100 500 2000 --entities 12 48
+"""
+
+import argparse
+import random
+import time
+
+from game_logic import GameLogic
+from models import Entity
+from projectiles import ProjectileStore
+
+FPS = 30
+MAX_X, MAX_Y = 80, 24
+
+
+def legacy_frame(logic, projectiles, entities, particles, messages, dt):
+    for p in projectiles[:]:
+        for e in entities:
+            if not e.is_alive or e.invulnerable or e is p.owner:
+                continue
+            if abs(e.x - p.x) < 1.0 and abs(e.y - p.y) < 1.0:
+                logic._apply_hit(p.owner, p.damage, e, particles, messages)
+                projectiles.remove(p)
+                break
+    for p in projectiles[:]:
+        if p.update_physics(dt, logic.max_x, logic.max_y):
+            if p in projectiles:
+                projectiles.remove(p)
+
+
+def run(kind, count, players, frames):
+    """Return (mean ms per frame, projectiles in flight on average, hits per frame)."""
+    random.seed(1)
+    logic = GameLogic(MAX_X, MAX_Y, MAX_Y - 6)
+    entities = [Entity(random.uniform(2, MAX_X - 2), random.uniform(3, logic.ground_row - 0.5), "🙂",
+                       name=f"P{i}") for i in range(players)]
+    for e in entities:
+        # Nobody dies, so the hit rate stays steady for the whole run.
+        e.hp = e.max_hp = 10 ** 9
+    projectiles = ProjectileStore() if kind == "store" else []
+    particles, messages = [], []
+    dt = 1.0 / FPS
+    elapsed = 0.0
+    in_flight = 0
+    hits = 0
+    for _ in range(frames):
+        while len(projectiles) < count:
+            logic._handle_special_ability(random.choice(entities), projectiles, 25.0)
+        in_flight += len(projectiles)
+        start = time.perf_counter()
+        if kind == "remove":
+            legacy_frame(logic, projectiles, entities, particles, messages, dt)
+        else:
+            logic.handle_projectile_collisions(projectiles, entities, particles, messages)
+            logic.update_projectiles(projectiles, dt)
+        elapsed += time.perf_counter() - start
+        hits += sum(1 for m in messages if " hit " in m[1])
+        particles.clear()
+        messages.clear()
+    return elapsed / frames * 1000, in_flight / frames, hits / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projectiles", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--entities", type=int, nargs="+", default=[12, 48])
+    parser.add_argument("--frames", type=int, default=150)
+    args = parser.parse_args()
+
+    print(f"{'proj':>5} {'ents':>4} {'path':<12} {'hits/f':>6} {'ms/frame':>8} {'vs remove':>9}")
+    for players in args.entities:
+        for count in args.projectiles:
+            base = None
+            for kind, label in (("remove", "list remove"), ("list", "list rebuild"), ("store", "numpy store")):
+                ms, _, hits = run(kind, count, players, args.frames)
+                base = base or ms
+                print(f"{count:>5} {players:>4} {label:<12} {hits:>6.1f} {ms:>8.2f} {base / ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
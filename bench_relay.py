@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Relay microbenchmark: how many state messages per second the server's
+receive -> relay path pushes into recipients' send queues.
+
+"parse" is the old path: every line goes through json.loads, gets its
+sender id added to a copy of the dict and json.dumps per broadcast.
+"raw" is the fast path: state/attack/respawn stay as the received bytes
+and only get the sender's pre-built id prefix spliced in.
+
+    python bench_relay.py --players 8 --count 200000
+"""
+
+import argparse
+import time
+
+import protocol
+import server
+
+
+class BenchMember(server.RoomMember):
+    """In-process room member with no socket; its queue is drained by the benchmark."""
+
+    def __init__(self):
+        self._init_member()
+        self.outbox.high_water = self.outbox.max_frames = 1 << 30
+
+    def _close_transport(self):
+        pass
+
+
+def run(players, count, codec, raw):
+    members = [BenchMember() for _ in range(players)]
+    for i, m in enumerate(members):
+        m._join_room("bench", f"p{i}", "🙂", codec=codec)
+    for m in members:
+        m.outbox.pop_all()
+
+    sender = members[0]
+    frame = codec.encode({"type": "state", "x": 37.21875, "y": 17.5, "hp": 95})
+    burst = 64
+    stream = frame * burst
+    decoder = protocol.FrameDecoder(raw=raw)
+    rounds = max(1, count // burst)
+
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for msg in decoder.feed(stream):
+            sender._handle_message(msg)
+        for m in members:
+            m.outbox.pop_all()
+    elapsed = time.perf_counter() - t0
+    for m in members:
+        m._leave_room()
+    return rounds * burst / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"room of {args.players}: relayed messages/s (each fans out to {args.players - 1} clients)")
+    for codec in (protocol.JSON, protocol.BINARY):
+        before = run(args.players, args.count, codec, raw=False)
+        after = run(args.players, args.count, codec, raw=True)
+        print(f"  {codec.name:<5} parse {before:>10,.0f}   raw {after:>10,.0f}   {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
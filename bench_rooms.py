@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Room lock contention benchmark.
+
+Runs many busy rooms in one process, with one thread per client as in
+the threaded server. Each client relays state frames and now and then
+toggles ready or leaves and rejoins. The benchmark reports throughput
+and the time threads spent waiting on room locks (summed over all
+threads) under two registries:
+
+  global   the old layout: one lock for every room, taken for every
+           join, ready toggle and broadcast
+  sharded  room_registry.RoomRegistry: per-shard and per-room locks, and
+           broadcasts read the member tuple without locking
+
+    python bench_rooms.py --rooms 50 --players 4 --duration 3
+"""
+
+import argparse
+import threading
+import time
+
+import protocol
+import server
+from bench_relay import BenchMember
+from room_registry import RoomRegistry
+
+
+class TimedLock:
+    """Lock wrapper that records how long acquirers had to wait."""
+
+    def __init__(self, lock, stats):
+        self._lock = lock
+        self._stats = stats
+
+    def __enter__(self):
+        if not self._lock.acquire(False):
+            t0 = time.perf_counter()
+            self._lock.acquire()
+            # Held now, so the shared counters are safe to update.
+            self._stats["wait"] += time.perf_counter() - t0
+            self._stats["contended"] += 1
+        self._stats["acquired"] += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+class GlobalLockRegistry(RoomRegistry):
+    """The pre-registry layout: a single lock guards every room, reads included."""
+
+    def __init__(self, stats):
+        lock = TimedLock(threading.RLock(), stats)
+        super().__init__(shards=1, lock_factory=lambda: lock)
+        self.lock = lock
+
+    def members(self, room_id):
+        with self.lock:
+            return tuple(super().members(room_id))
+
+
+def sharded_registry(stats):
+    # All locks share one stats dict; two holders of different locks can race
+    # on an update, which is close enough for a total.
+    return RoomRegistry(lock_factory=lambda: TimedLock(threading.Lock(), stats))
+
+
+def client_loop(member, room_id, index, frame, start, stop, counts, slot):
+    member._join_room(room_id, f"p{index}", "🙂", codec=protocol.JSON)
+    start.wait()
+    sent = 0
+    while not stop.is_set():
+        member._handle_message(frame)
+        member.outbox.pop_all()
+        sent += 1
+        counts[slot] = sent
+        if sent % 50 == 0:
+            member._handle_message({"type": "ready", "ready": not member.ready})
+        if sent % 500 == 0:
+            member._join_room(room_id, f"p{index}", "🙂", codec=protocol.JSON)
+    member._leave_room()
+
+
+def run(kind, rooms, players, duration):
+    stats = {"wait": 0.0, "contended": 0, "acquired": 0}
+    server.rooms = GlobalLockRegistry(stats) if kind == "global" else sharded_registry(stats)
+    frame = protocol.FrameDecoder(raw=True).feed(
+        protocol.JSON.encode({"type": "state", "x": 37.21875, "y": 17.5, "hp": 95}))[0]
+    start = threading.Event()
+    stop = threading.Event()
+    counts = [0] * (rooms * players)
+    threads = [
+        threading.Thread(target=client_loop,
+                         args=(BenchMember(), f"room-{r}", p, frame, start, stop, counts, r * players + p))
+        for r in range(rooms) for p in range(players)
+    ]
+    for t in threads:
+        t.start()
+    while len(server.rooms) < rooms:
+        time.sleep(0.05)
+    # Only count what happens inside the measured window.
+    time.sleep(0.2)
+    stats.update(wait=0.0, contended=0, acquired=0)
+    start.set()
+    time.sleep(duration)
+    sent = sum(counts)
+    measured = dict(stats)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sent / duration, measured
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print(f"{args.rooms} rooms x {args.players} players, {args.duration:.0f}s, one thread per client")
+    print(f"{'registry':>8} {'msgs/s':>9} {'acquires':>9} {'contended':>10} {'lock wait':>10} {'wait/msg':>9}")
+    for kind in ("global", "sharded"):
+        rate, stats = run(kind, args.rooms, args.players, args.duration)
+        per_msg = stats["wait"] / max(1, rate * args.duration) * 1e6
+        print(f"{kind:>8} {rate:>9,.0f} {stats['acquired']:>9,} {stats['contended']:>10,} "
+              f"{stats['wait']:>9.2f}s {per_msg:>7.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+State messages per second: fixed 100 ms timer vs net_client.StateSender.
+
+Records a seeded headless AI brawl at 30 fps (every fighter's position,
+velocity, hp and aliveness per frame), then replays each fighter's
+recording through both send policies, and through StateSender while the
+server reports congestion. Besides messages per second it reports how
+far the last state a peer received is from where the fighter really is,
+on average and at the 99th percentile (the maximum is just respawn
+teleports):
+
+    python bench_send_rate.py --players 2 8 --seconds 120
+"""
+
+import argparse
+import random
+
+from ai import AIController
+from game_logic import GameLogic
+from models import Entity
+from net_client import STATE_INTERVAL, StateSender
+
+FPS = 30
+
+
+class CountingNet:
+    """Stands in for NetClient: remembers the last state sent."""
+
+    def __init__(self, congested=False):
+        self.congested = congested
+        self.last = None
+
+    def send_state(self, x, y, hp):
+        self.last = (x, y)
+
+
+class Frame:
+    __slots__ = ("x", "y", "hp", "is_alive", "vx", "vy")
+
+    def __init__(self, e):
+        self.x, self.y, self.hp, self.is_alive, self.vx, self.vy = e.x, e.y, e.hp, e.is_alive, e.vx, e.vy
+
+
+def record_match(players, seconds, seed):
+    """Return one list of Frames per fighter."""
+    random.seed(seed)
+    max_x, max_y = 80, 24
+    ground_row = max_y - 6
+    logic = GameLogic(max_x, max_y, ground_row)
+    ai = AIController()
+    entities = [Entity(5 + i * (max_x - 10) / max(1, players - 1), ground_row - 0.5, "🙂", name=f"P{i}", ai=True)
+                for i in range(players)]
+    projectiles, particles, messages = [], [], []
+    dt = 1.0 / FPS
+    tracks = [[] for _ in entities]
+    for _ in range(int(seconds * FPS)):
+        for e in entities:
+            ai.update_ai_entity(e, entities, projectiles, messages, dt)
+        logic.update_entities(entities, dt)
+        logic.handle_entity_collisions(entities)
+        logic.handle_projectile_collisions(projectiles, entities, particles, messages)
+        logic.update_projectiles(projectiles, dt)
+        particles.clear()
+        messages.clear()
+        for track, e in zip(tracks, entities):
+            track.append(Frame(e))
+    return tracks
+
+
+def replay(track, policy, congested=False):
+    """Return (messages sent, per-frame position errors) for one fighter's recording."""
+    net = CountingNet(congested)
+    sender = StateSender(net)
+    sent = 0
+    timer = 0.0
+    errors = []
+    for i, frame in enumerate(track):
+        now = i / FPS
+        if policy == "fixed":
+            # main.py before StateSender: a timer that fires every 100 ms.
+            timer += 1.0 / FPS
+            if net.last is None or timer >= STATE_INTERVAL:
+                timer = 0.0
+                net.send_state(frame.x, frame.y, frame.hp)
+                sent += 1
+        elif sender.update(frame, now):
+            sent += 1
+        errors.append(abs(frame.x - net.last[0]) + abs(frame.y - net.last[1]))
+    return sent, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[2, 8])
+    parser.add_argument("--seconds", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'players':>7} {'policy':<10} {'msg/s':>6} {'vs fixed':>8} {'mean err':>8} {'p99 err':>7}")
+    for players in args.players:
+        tracks = record_match(players, args.seconds, args.seed)
+        base = None
+        for label, policy, congested in (("fixed", "fixed", False), ("adaptive", "adaptive", False),
+                                          ("congested", "adaptive", True)):
+            results = [replay(track, policy, congested) for track in tracks]
+            rate = sum(r[0] for r in results) / len(results) / args.seconds
+            errors = sorted(e for r in results for e in r[1])
+            mean_err = sum(errors) / len(errors)
+            p99_err = errors[(len(errors) - 1) * 99 // 100]
+            base = base or rate
+            print(f"{players:>7} {label:<10} {rate:>6.2f} {(rate - base) / base:>+8.0%} {mean_err:>8.2f} {p99_err:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
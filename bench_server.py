@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Load test for the TermEmoji server.
+
+Starts the server in a subprocess, parks a number of idle lobby
+connections on it and drives a set of active rooms that stream state
+messages at 10 Hz per player. Reports relay latency and the server's
+CPU time, resident memory and thread count, so the threaded and asyncio
+modes can be compared side by side:
+
+    python bench_server.py --mode threaded --mode asyncio --idle 2000 --rooms 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def proc_stats(pid):
+    """Return (cpu_seconds, rss_kb, threads) for a Linux process."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        cpu = (int(fields[11]) + int(fields[12])) / ticks
+        rss = threads = 0
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1])
+                elif line.startswith("Threads:"):
+                    threads = int(line.split()[1])
+        return cpu, rss, threads
+    except (OSError, ValueError, IndexError):
+        return 0.0, 0, 0
+
+
+def start_server(mode, port, extra_args=()):
+    cmd = [sys.executable, "server.py", "--host", "127.0.0.1", "--port", str(port), "--mode", mode]
+    cmd.extend(extra_args)
+    proc = subprocess.Popen(cmd, cwd=os.path.dirname(os.path.abspath(__file__)),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError(f"server ({mode}) did not start")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+async def open_player(port, room, name, retries=50):
+    for _ in range(retries):
+        try:
+            return await _join(port, room, name)
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise ConnectionError("could not connect")
+
+
+async def _join(port, room, name):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=1 << 20)
+    writer.write((json.dumps({"type": "join", "room": room, "name": name, "ch": "🙂"}) + "\n").encode())
+    while True:
+        line = await reader.readline()
+        if not line:
+            writer.close()
+            raise ConnectionError("closed during join")
+        if json.loads(line).get("type") == "welcome":
+            return reader, writer
+
+
+async def drain(reader, latencies, counter):
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            msg = json.loads(line)
+            if msg.get("type") == "state" and "t" in msg:
+                latencies.append(time.perf_counter() - msg["t"])
+                counter[0] += 1
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+
+
+async def stream_state(writer, duration, rate):
+    interval = 1.0 / rate
+    end = time.perf_counter() + duration
+    sent = 0
+    while time.perf_counter() < end:
+        msg = {"type": "state", "x": 10.0, "y": 5.0, "hp": 100, "t": time.perf_counter()}
+        writer.write((json.dumps(msg, separators=(",", ":")) + "\n").encode())
+        sent += 1
+        await asyncio.sleep(interval)
+    return sent
+
+
+async def run_load(pid, port, idle, rooms, players, duration, rate):
+    idle_conns = []
+    for i in range(0, idle, 100):
+        batch = [open_player(port, f"idle-{(i + k) // 8}", f"idle{i + k}") for k in range(min(100, idle - i))]
+        idle_conns.extend(await asyncio.gather(*batch))
+
+    active = []
+    for r in range(rooms):
+        for p in range(players):
+            active.append(await open_player(port, f"room-{r}", f"p{p}"))
+
+    latencies = []
+    received = [0]
+    readers = [asyncio.ensure_future(drain(reader, latencies, received)) for reader, _ in active]
+    t0 = time.perf_counter()
+    sent = await asyncio.gather(*(stream_state(writer, duration, rate) for _, writer in active))
+    await asyncio.sleep(0.5)
+    elapsed = time.perf_counter() - t0
+    stats = proc_stats(pid)
+
+    for task in readers:
+        task.cancel()
+    for _, writer in idle_conns + active:
+        writer.close()
+    return sum(sent), received[0], latencies, elapsed, stats
+
+
+def bench(mode, args):
+    port = free_port()
+    proc = start_server(mode, port)
+    try:
+        cpu0, _, _ = proc_stats(proc.pid)
+        sent, received, latencies, elapsed, (cpu1, rss, threads) = asyncio.run(
+            run_load(proc.pid, port, args.idle, args.rooms, args.players, args.duration, args.rate))
+    finally:
+        proc.terminate()
+        proc.wait()
+    expected = sent * (args.players - 1)
+    print(f"{mode:>9}: idle={args.idle} rooms={args.rooms}x{args.players} "
+          f"sent={sent} relayed={received}/{expected} "
+          f"({received / elapsed:.0f} msg/s) "
+          f"p50={percentile(latencies, 50) * 1000:.2f}ms p99={percentile(latencies, 99) * 1000:.2f}ms "
+          f"cpu={cpu1 - cpu0:.2f}s rss={rss / 1024:.1f}MB threads={threads}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", action="append", choices=("threaded", "asyncio"))
+    parser.add_argument("--idle", type=int, default=500, help="idle lobby connections")
+    parser.add_argument("--rooms", type=int, default=20, help="active rooms")
+    parser.add_argument("--players", type=int, default=4, help="players per active room")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--rate", type=float, default=10.0, help="state messages per second per player")
+    args = parser.parse_args()
+    for mode in args.mode or ["threaded", "asyncio"]:
+        bench(mode, args)
+
+
+if __name__ == "__main__":
+    main()
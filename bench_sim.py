@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Capacity benchmark for server-authoritative rooms.
+
+Steps a number of headless RoomSimulation instances back to back, the way
+SimulationLoop does, with every player mashing random keys, and reports
+the per-room tick cost and how many rooms one core can hold at the tick
+rate:
+
+    python bench_sim.py --rooms 50 --players 4 --ticks 600
+"""
+
+import argparse
+import random
+import time
+
+from room_sim import RoomSimulation, TICK_RATE, TICK_DT, INPUT_KEYS
+
+
+def build_rooms(count, players):
+    rooms = []
+    for r in range(count):
+        sim = RoomSimulation(f"room-{r}")
+        for p in range(players):
+            sim.add_player(f"p{r}-{p}", f"P{p}", "🙂", index=p, total=players)
+        rooms.append(sim)
+    return rooms
+
+
+def random_keys(rng):
+    return "".join(k for k in INPUT_KEYS if rng.random() < 0.3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--ticks", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rooms = build_rooms(args.rooms, args.players)
+    seq = 0
+    t0 = time.perf_counter()
+    for tick in range(args.ticks):
+        if tick % 15 == 0:
+            seq += 1
+            for sim in rooms:
+                for cid in list(sim.entities):
+                    sim.set_input(cid, random_keys(rng), seq)
+        for sim in rooms:
+            sim.step(TICK_DT)
+            if sim.tick % sim.snapshot_every == 0:
+                sim.history.push(sim.entity_states())
+                sim.history.message(sim.history.seq - 1, sim.snapshot_extra())
+    elapsed = time.perf_counter() - t0
+
+    per_tick = elapsed / args.ticks
+    per_room = per_tick / args.rooms
+    avg = sum(s.stats()["avg_ms"] for s in rooms) / len(rooms)
+    worst = max(s.stats()["max_ms"] for s in rooms)
+    print(f"{args.rooms} rooms x {args.players} players, {args.ticks} ticks")
+    print(f"  step avg {avg:.3f} ms/room, worst {worst:.3f} ms/room")
+    print(f"  wall {per_room * 1000:.3f} ms/room/tick incl. snapshots, {per_tick * 1000:.2f} ms/tick for all rooms")
+    print(f"  capacity @ {TICK_RATE} Hz on one core: ~{int(1.0 / TICK_RATE / per_room)} rooms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Downstream bandwidth per client: per-player state relay vs room snapshots.
+
+Runs a headless AI brawl with N fighters for a while, samples every
+fighter's state at 10 Hz, and measures what one client would receive
+under each scheme:
+
+  relay    every other player's `state` message, one per player per sample
+  full     one room snapshot per sample holding every entity
+  delta    one snapshot per sample, delta against the previous (acked) one
+
+    python bench_snapshots.py --players 2 8 32 --seconds 60
+"""
+
+import argparse
+import random
+
+import protocol
+from ai import AIController
+from game_logic import GameLogic
+from models import Entity
+from snapshot import SnapshotHistory
+
+TICK_RATE = 30
+SAMPLE_EVERY = 3  # 10 Hz, the client state rate
+
+
+def run_match(players, seconds, seed):
+    random.seed(seed)
+    max_x = max(80, players * 6)
+    max_y = 24
+    ground_row = max_y - 6
+    logic = GameLogic(max_x, max_y, ground_row)
+    ai = AIController()
+    entities = []
+    for i in range(players):
+        x = 5 + i * (max_x - 10) / max(1, players - 1)
+        entities.append(Entity(x, ground_row - 0.5, "🙂", name=f"P{i}", ai=True))
+    ids = {e: f"{i:08x}" for i, e in enumerate(entities)}
+    projectiles, particles, messages = [], [], []
+    dt = 1.0 / TICK_RATE
+    for tick in range(int(seconds * TICK_RATE)):
+        for e in entities:
+            ai.update_ai_entity(e, entities, projectiles, messages, dt)
+        logic.update_entities(entities, dt)
+        logic.handle_entity_collisions(entities)
+        logic.handle_projectile_collisions(projectiles, entities, particles, messages)
+        logic.update_projectiles(projectiles, dt)
+        particles.clear()
+        messages.clear()
+        if tick % SAMPLE_EVERY == 0:
+            yield {ids[e]: (round(e.x, 2), round(e.y, 2), int(e.hp), int(e.hp > 0)) for e in entities}
+
+
+def measure(players, seconds, codec, seed):
+    relay = full = delta = 0
+    samples = 0
+    history = SnapshotHistory()
+    me = f"{0:08x}"
+    for states in run_match(players, seconds, seed):
+        samples += 1
+        for eid, (x, y, hp, _alive) in states.items():
+            if eid != me:
+                relay += len(codec.encode({"type": "state", "x": x, "y": y, "hp": hp, "id": eid}))
+        history.push(states)
+        full += len(codec.encode(history.message(0)))
+        delta += len(codec.encode(history.message(history.seq - 1)))
+    sample_rate = TICK_RATE / SAMPLE_EVERY
+    scale = sample_rate / samples
+    return relay * scale, full * scale, delta * scale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[2, 8, 32])
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'players':>7} {'codec':<5} {'relay B/s':>10} {'full B/s':>10} {'delta B/s':>10} {'delta/relay':>11}")
+    for players in args.players:
+        for codec in (protocol.JSON, protocol.BINARY):
+            relay, full, delta = measure(players, args.seconds, codec, args.seed)
+            print(f"{players:>7} {codec.name:<5} {relay:>10,.0f} {full:>10,.0f} {delta:>10,.0f} {delta / relay:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Throughput scaling of `server.py --workers N`.
+
+For each worker count, starts the server, has several load-generator
+processes join `--rooms` rooms of `--players` players, and streams state
+messages at `--rate` per player. It reports how many relayed messages per
+second the clients received and the CPU time the server used across the
+gateway and all workers. Offer more load than one process can relay; on
+a host with enough cores, throughput should then grow with N until the
+load generators become the bottleneck:
+
+    python bench_workers.py --workers 1 2 4 --rooms 40 --players 4 --rate 100
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+
+from bench_server import free_port, open_player, proc_stats, start_server
+
+
+def server_cpu(pid):
+    """CPU seconds of a process and its direct children (the --workers processes)."""
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids.extend(int(p) for p in f.read().split())
+    except OSError:
+        pass
+    return sum(proc_stats(p)[0] for p in pids)
+
+
+async def count_lines(reader, counter):
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            counter[0] += data.count(b"\n")
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+
+
+async def stream(writer, rate, end):
+    line = (json.dumps({"type": "state", "x": 10.0, "y": 5.0, "hp": 100}, separators=(",", ":")) + "\n").encode()
+    # Send in 10 ms bursts so a high rate does not mean one timer per message.
+    burst = max(1, round(rate / 100))
+    while time.perf_counter() < end:
+        writer.write(line * burst)
+        await writer.drain()
+        await asyncio.sleep(0.01)
+
+
+async def run_clients(port, room_ids, players, rate, duration, barrier):
+    clients = []
+    for room in room_ids:
+        for p in range(players):
+            clients.append(await open_player(port, f"room-{room}", f"p{p}"))
+    counter = [0]
+    readers = [asyncio.ensure_future(count_lines(reader, counter)) for reader, _ in clients]
+    await asyncio.get_running_loop().run_in_executor(None, barrier.wait)
+    counter[0] = 0
+    end = time.perf_counter() + duration
+    await asyncio.gather(*(stream(writer, rate, end) for _, writer in clients))
+    received = counter[0]
+    for task in readers:
+        task.cancel()
+    for _, writer in clients:
+        writer.close()
+    return received
+
+
+def load_process(port, room_ids, players, rate, duration, barrier, results):
+    results.put(asyncio.run(run_clients(port, room_ids, players, rate, duration, barrier)))
+
+
+def bench(workers, args):
+    port = free_port()
+    proc = start_server(args.mode, port, ["--workers", str(workers), "--idle-timeout", "0"])
+    try:
+        barrier = multiprocessing.Barrier(args.load_procs + 1)
+        results = multiprocessing.Queue()
+        loaders = [
+            multiprocessing.Process(target=load_process, args=(
+                port, range(i, args.rooms, args.load_procs), args.players, args.rate, args.duration, barrier, results))
+            for i in range(args.load_procs)
+        ]
+        for p in loaders:
+            p.start()
+        barrier.wait()
+        cpu0 = server_cpu(proc.pid)
+        t0 = time.perf_counter()
+        received = sum(results.get() for _ in loaders)
+        elapsed = time.perf_counter() - t0
+        cpu = server_cpu(proc.pid) - cpu0
+        for p in loaders:
+            p.join()
+    finally:
+        proc.terminate()
+        proc.wait()
+    offered = args.rooms * args.players * (args.players - 1) * args.rate
+    print(f"{workers:>7} {received / elapsed:>12,.0f} {offered:>12,.0f} {cpu / elapsed:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--mode", choices=("threaded", "asyncio"), default="asyncio")
+    parser.add_argument("--rooms", type=int, default=40)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=100.0, help="state messages per second per player")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--load-procs", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="load generator processes")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.mode} workers, {args.rooms} rooms x {args.players} players "
+          f"@ {args.rate:.0f} msg/s, {args.load_procs} load processes")
+    print(f"{'workers':>7} {'relayed/s':>12} {'offered/s':>12} {'cpu cores':>9}")
+    for workers in args.workers:
+        bench(workers, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,3 @@
-import curses
-
 class Character:
     def __init__(self, name, emoji, ascii_char, description, stats):
         self.name = name
@@ -1,14 +1,24 @@
 import random
 import math
 from utils import GRAVITY, POWERUP_TYPES, create_explosion_particles, get_random_position
-from models import Entity, Projectile, PowerUp, Particle
+from models import Entity, PowerUp, Particle, particle_pool, projectile_pool
+from particles import ParticleSystem
+from projectiles import ProjectileStore
+from spatial_hash import GRID_MIN, SpatialHash
 
 class GameLogic:
-    def __init__(self, max_x, max_y, ground_row):
+    def __init__(self, max_x, max_y, ground_row, rng=None):
         self.max_x = max_x
         self.max_y = max_y
         self.ground_row = ground_row
         self.power_up_spawn_timer = 0.0
+        # Every random decision of the simulation comes from here: pass a
+        # seeded random.Random to make a match repeat. The default is the
+        # random module itself.
+        self.rng = rng if rng is not None else random
+        # Living entities by list index; each collision pass re-indexes
+        # them since positions change between passes.
+        self.grid = SpatialHash()
         
     def handle_player_input(self, player, keys, projectiles, combo_messages):
         if not player.is_alive:
@@ -38,7 +48,7 @@ class GameLogic:
             dir = player.facing_dir
             pvx = atk_speed * dir
             damage = 20 * player.get_damage_multiplier()
-            projectile = Projectile(player.x + dir*1.1, player.y-0.5, pvx, 0, '🔸', player, damage)
+            projectile = projectile_pool.acquire(player.x + dir*1.1, player.y-0.5, pvx, 0, '🔸', player, damage)
             projectiles.append(projectile)
             player.cooldown = 0.6
             did_attack = True
@@ -62,7 +72,7 @@ class GameLogic:
             pvx = atk_speed * dir_x
             pvy = atk_speed * dir_y
             damage = 30 * player.get_damage_multiplier()
-            projectile = Projectile(player.x, player.y-0.5, pvx, pvy, '⚡', player, damage, special=True)
+            projectile = projectile_pool.acquire(player.x, player.y-0.5, pvx, pvy, '⚡', player, damage, special=True)
             projectiles.append(projectile)
         player.special_cooldown = 3.0
         player.special_effect_timer = 0.5
@@ -70,20 +80,32 @@ class GameLogic:
     def spawn_power_ups(self, power_ups, dt):
         self.power_up_spawn_timer += dt
         if self.power_up_spawn_timer > 8.0 and len(power_ups) < 3:
-            power_type = random.choice(list(POWERUP_TYPES.keys()))
-            x = random.randint(5, self.max_x - 6)
+            power_type = self.rng.choice(list(POWERUP_TYPES.keys()))
+            x = self.rng.randint(5, self.max_x - 6)
             power_ups.append(PowerUp(x, self.ground_row - 2, power_type))
             self.power_up_spawn_timer = 0.0
             
-    def handle_power_up_collection(self, power_ups, entities, particles, messages):
+    def index_entities(self, entities):
+        self.grid.rebuild((i, e.x, e.y) for i, e in enumerate(entities) if e.is_alive)
+        return self.grid
+
+    def broadphase(self, entities):
+        """index_entities, or None when there are too few entities for the grid to pay off."""
+        if len(entities) < GRID_MIN:
+            return None
+        return self.index_entities(entities)
+
+    def handle_power_up_collection(self, power_ups, entities, particles, messages, dt=0.016):
+        grid = self.broadphase(entities)
+        everyone = range(len(entities))
         for power_up in power_ups[:]:
             if power_up.collected:
                 continue
                 
-            for e in entities:
+            for j in everyone if grid is None else grid.query(power_up.x, power_up.y, 1.0):
+                e = entities[j]
                 if not e.is_alive:
                     continue
-                    
                 if abs(e.x - power_up.x) < 1.0 and abs(e.y - power_up.y) < 1.0:
                     message = power_up.collect(e)
                     if message:
@@ -101,103 +123,167 @@ class GameLogic:
                                 break
                         messages.append([1.5, message, color])
                         
-                    particles.extend(create_explosion_particles(power_up.x, power_up.y, 5))
+                    self.spawn_burst(particles, power_up.x, power_up.y, 5)
                     break
                     
-            power_up.update(0.016)
+            power_up.update(dt)
             
         return [p for p in power_ups if not p.collected]
         
     def handle_entity_collisions(self, entities):
-        for i in range(len(entities)):
-            a = entities[i]
+        grid = self.broadphase(entities)
+        if grid is None:
+            for i, a in enumerate(entities):
+                if not a.is_alive:
+                    continue
+                for j in range(i + 1, len(entities)):
+                    b = entities[j]
+                    if b.is_alive:
+                        self._push_apart(a, b)
+            return
+        for i, a in enumerate(entities):
             if not a.is_alive: 
                 continue
-            for j in range(i+1, len(entities)):
+            # Pairs resolve in (i, j) order with positions updated as they
+            # go, so after each push the neighbours are looked up again.
+            later = [j for j in grid.query(a.x, a.y, 1.0) if j > i]
+            while later:
+                j = later.pop(0)
                 b = entities[j]
-                if not b.is_alive: 
-                    continue
-                
-                dx = b.x - a.x
-                dy = b.y - a.y
-                d = math.hypot(dx, dy)
-                if d < 1.0 and d > 0.001:
-                    overlap = 1.0 - d
-                    nx = dx / d
-                    ny = dy / d
-                    a.x -= nx * overlap * 0.5
-                    a.y -= ny * overlap * 0.5
-                    b.x += nx * overlap * 0.5
-                    b.y += ny * overlap * 0.5
-                    
-                    ax, ay = a.vx, a.vy
-                    bx, by = b.vx, b.vy
-                    a.vx = ax*0.5 + bx*0.5
-                    b.vx = bx*0.5 + ax*0.5
+                if self._push_apart(a, b):
+                    grid.move(i, a.x, a.y)
+                    grid.move(j, b.x, b.y)
+                    later = [k for k in grid.query(a.x, a.y, 1.0) if k > j]
+
+    def _push_apart(self, a, b):
+        """Separate two overlapping entities; returns True if they moved."""
+        dx = b.x - a.x
+        dy = b.y - a.y
+        d = math.hypot(dx, dy)
+        if not (d < 1.0 and d > 0.001):
+            return False
+        overlap = 1.0 - d
+        nx = dx / d
+        ny = dy / d
+        a.x -= nx * overlap * 0.5
+        a.y -= ny * overlap * 0.5
+        b.x += nx * overlap * 0.5
+        b.y += ny * overlap * 0.5
+        
+        ax, ay = a.vx, a.vy
+        bx, by = b.vx, b.vy
+        a.vx = ax*0.5 + bx*0.5
+        b.vx = bx*0.5 + ax*0.5
+        return True
                     
     def handle_projectile_collisions(self, projectiles, entities, particles, messages, collision_filter=None):
-        for p in projectiles[:]:
-            for e in entities:
+        # collision_filter(shooter, target) -> False skips that hit.
+        if isinstance(projectiles, ProjectileStore):
+            self._store_collisions(projectiles, entities, particles, messages, collision_filter)
+            return
+        grid = self.broadphase(entities)
+        everyone = range(len(entities))
+        hit = set()
+        for p in projectiles:
+            for j in everyone if grid is None else grid.query(p.x, p.y, 1.0):
+                e = entities[j]
                 if not e.is_alive or e.invulnerable: 
                     continue
                 if e is p.owner: 
                     continue
-                if collision_filter is not None and not collision_filter(p, e):
+                if not (abs(e.x - p.x) < 1.0 and abs(e.y - p.y) < 1.0):
                     continue
-                
-                if abs(e.x - p.x) < 1.0 and abs(e.y - p.y) < 1.0:
-                    damage = p.damage
-                    
-                    if e.has_shield():
-                        damage = max(5, damage // 2)
-                        messages.append([1.0, f"{e.name}'s shield absorbed damage!", 4])
-                        
-                    e.hp -= damage
-                    
-                    nx = (e.x - p.owner.x)
-                    if nx == 0: 
-                        nx = 1 if random.random() < 0.5 else -1
-                    nk = 8.0 * (1 if nx > 0 else -1)
-                    e.vx += nk
-                    e.vy -= 6
-                    
-                    if p.owner.combo_timer > 0:
-                        p.owner.combo_count += 1
-                    else:
-                        p.owner.combo_count = 1
-                    p.owner.combo_timer = 1.0
-                    
-                    messages.append([1.6, f"{p.owner.name} hit {e.name} for {damage}!", 0])
-                    
-                    particles.extend(create_explosion_particles(e.x, e.y, 3))
-                    
-                    if e.hp <= 0:
-                        if e.is_infinite_mode():
-                            e.hp = 1
-                            messages.append([2.0, f"{e.name} is IMMORTAL!", 6])
-                        else:
-                            e.is_alive = False
-                            e.respawn_timer = 3.0
-                            e.deaths += 1
-                            p.owner.kills += 1
-                            messages.append([2.0, f"{e.name} was defeated! (Respawn in 3s)", 1])
-                            
-                    try:
-                        projectiles.remove(p)
-                    except ValueError:
-                        pass
+                # Only actual hits are filtered, as in _store_collisions.
+                if collision_filter is None or collision_filter(p.owner, e):
+                    self._apply_hit(p.owner, p.damage, e, particles, messages)
+                    hit.add(id(p))
                     break
+        if hit:
+            projectile_pool.release_all(p for p in projectiles if id(p) in hit)
+            projectiles[:] = [p for p in projectiles if id(p) not in hit]
+
+    def _store_collisions(self, store, entities, particles, messages, collision_filter):
+        spent = []
+        done = -1
+        for i, j in store.hits(entities, self.broadphase(entities)):
+            e = entities[j]
+            # Pairs come sorted by projectile; each hits the first entity
+            # still standing, as the per-projectile loop would.
+            if i == done or not e.is_alive:
+                continue
+            if collision_filter is not None and not collision_filter(store.owner[i], e):
+                continue
+            self._apply_hit(store.owner[i], store.damage[i], e, particles, messages)
+            spent.append(i)
+            done = i
+        if spent:
+            store.discard(spent)
+
+    def _apply_hit(self, owner, damage, e, particles, messages):
+        if e.has_shield():
+            damage = max(5, damage // 2)
+            messages.append([1.0, f"{e.name}'s shield absorbed damage!", 4])
+            
+        e.hp -= damage
+        
+        nx = (e.x - owner.x)
+        if nx == 0: 
+            nx = 1 if self.rng.random() < 0.5 else -1
+        nk = 8.0 * (1 if nx > 0 else -1)
+        e.vx += nk
+        e.vy -= 6
+        
+        if owner.combo_timer > 0:
+            owner.combo_count += 1
+        else:
+            owner.combo_count = 1
+        owner.combo_timer = 1.0
+        owner.hits += 1
+        
+        messages.append([1.6, f"{owner.name} hit {e.name} for {damage}!", 0])
+        
+        self.spawn_burst(particles, e.x, e.y, 3)
+        
+        if e.hp <= 0:
+            if e.is_infinite_mode():
+                e.hp = 1
+                messages.append([2.0, f"{e.name} is IMMORTAL!", 6])
+            else:
+                e.is_alive = False
+                e.respawn_timer = 3.0
+                e.deaths += 1
+                owner.kills += 1
+                messages.append([2.0, f"{e.name} was defeated! (Respawn in 3s)", 1])
                     
     def update_projectiles(self, projectiles, dt):
-        for p in projectiles[:]:
-            if p.update_physics(dt, self.max_x, self.max_y):
-                if p in projectiles:
-                    projectiles.remove(p)
+        if isinstance(projectiles, ProjectileStore):
+            projectiles.update(dt, self.max_x, self.max_y)
+        else:
+            kept = []
+            for p in projectiles:
+                if p.update_physics(dt, self.max_x, self.max_y):
+                    projectile_pool.release(p)
+                else:
+                    kept.append(p)
+            projectiles[:] = kept
                     
+    def spawn_burst(self, particles, x, y, count):
+        if isinstance(particles, ParticleSystem):
+            particles.burst(x, y, count)
+        else:
+            particles.extend(create_explosion_particles(x, y, count, self.rng))
+
     def update_particles(self, particles, dt):
-        for particle in particles[:]:
-            if particle.update(dt):
-                particles.remove(particle)
+        if isinstance(particles, ParticleSystem):
+            particles.update(dt)
+        else:
+            kept = []
+            for particle in particles:
+                if particle.update(dt):
+                    particle_pool.release(particle)
+                else:
+                    kept.append(particle)
+            particles[:] = kept
                 
     def update_entities(self, entities, dt, skip=None):
         if skip is None:
@@ -208,7 +294,7 @@ class GameLogic:
             if not e.is_alive:
                 e.respawn_timer -= dt
                 if e.respawn_timer <= 0:
-                    x, y = get_random_position(self.max_x, self.ground_row)
+                    x, y = get_random_position(self.max_x, self.ground_row, self.rng)
                     e.respawn(x, y)
                 continue
                 
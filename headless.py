@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Headless match runner: AI fighters play singleplayer rules with no terminal.
+
+Builds GameLogic, AIController and the fighters, steps the match on the
+fixed simulation step as fast as the machine allows and reports kills,
+deaths and hits per fighter plus ticks per second. Nothing here imports
+curses, so it runs in CI, from bot tournaments and from balance sweeps:
+
+    python headless.py --fighters 4 --ticks 36000 --seed 1
+    python headless.py --matches 10 --json > results.json
+"""
+
+import argparse
+import json
+import random
+import time
+
+from ai import AIController, create_ai_entities
+from characters import get_character, get_character_char
+from game_logic import GameLogic
+from input_log import InputLog, digest
+from models import Entity
+from particles import make_particles
+from projectiles import make_projectiles
+from timestep import SIM_DT
+
+WIDTH = 80
+HEIGHT = 24
+
+
+class Match:
+    """One match on singleplayer rules, advanced a fixed step at a time.
+
+    `step` is the whole simulation step of a singleplayer game; main.py
+    runs its games through it. With `character` the first fighter is a
+    player driven by the keys passed to `step`, otherwise every fighter
+    is AI. All randomness comes from one random.Random(seed), so a seed
+    and the keys of every step replay a match exactly (see `record`).
+    """
+
+    def __init__(self, fighters=4, seed=None, width=WIDTH, height=HEIGHT, dt=SIM_DT, power_ups=True,
+                 character=None, messages=None, combo_messages=None):
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.config = {"fighters": fighters, "seed": self.seed, "width": width, "height": height, "dt": dt,
+                       "power_ups": power_ups, "character": character}
+        self.rng = random.Random(self.seed)
+        self.dt = dt
+        self.logic = GameLogic(width, height, height - 6, rng=self.rng)
+        self.ai = AIController(self.rng)
+        self.entities = []
+        self.player = None
+        if character is not None:
+            self.player = Entity(4, self.logic.ground_row - 0.5, get_character_char(character, use_ascii=False),
+                                 name=get_character(character).name, ai=False, character_id=character)
+            self.entities.append(self.player)
+        self.entities.extend(create_ai_entities(width, self.logic.ground_row, count=fighters, rng=self.rng))
+        self.projectiles = make_projectiles()
+        self.particles = make_particles(self.seed)
+        self.power_ups = [] if power_ups else None
+        self.messages = messages if messages is not None else []
+        self.combo_messages = combo_messages if combo_messages is not None else []
+        self.recorder = None
+        self._recorded_keys = None
+        self.ticks = 0
+        self.wall_time = 0.0
+
+    def record(self, path):
+        """Log this match's inputs from here on to `path` for replay.py; call before the first step."""
+        self.recorder = InputLog(path, dict(self.config, kind="match"))
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close(self.digest())
+            self.recorder = None
+
+    def digest(self):
+        return digest([(e.x, e.y, e.vx, e.vy, e.hp, e.is_alive, e.kills, e.deaths, e.hits) for e in self.entities])
+
+    def step(self, keys=None):
+        """Advance one step; `keys` ({key code: True}) are the ones the player holds."""
+        logic, dt, entities = self.logic, self.dt, self.entities
+        if self.recorder is not None:
+            codes = sorted(keys) if keys else []
+            if codes != self._recorded_keys:
+                self.recorder.event("k", codes)
+                self._recorded_keys = codes
+            self.recorder.step(dt)
+        if self.power_ups is not None:
+            logic.spawn_power_ups(self.power_ups, dt)
+        if self.player is not None:
+            logic.handle_player_input(self.player, keys or {}, self.projectiles, self.combo_messages)
+        for e in entities:
+            self.ai.update_ai_entity(e, entities, self.projectiles, self.messages, dt)
+        logic.update_entities(entities, dt)
+        logic.handle_entity_collisions(entities)
+        logic.handle_projectile_collisions(self.projectiles, entities, self.particles, self.messages)
+        logic.update_projectiles(self.projectiles, dt)
+        logic.update_particles(self.particles, dt)
+        if self.power_ups is not None:
+            self.power_ups = logic.handle_power_up_collection(self.power_ups, entities, self.particles,
+                                                              self.messages, dt)
+        logic.update_messages(self.messages, dt)
+        logic.update_combo_messages(self.combo_messages, dt)
+        self.ticks += 1
+
+    def run(self, ticks):
+        """Step `ticks` times as fast as possible; returns stats()."""
+        start = time.perf_counter()
+        for _ in range(ticks):
+            self.step()
+        self.wall_time += time.perf_counter() - start
+        return self.stats()
+
+    def stats(self):
+        fighters = [{"name": e.name, "ch": e.ch, "kills": e.kills, "deaths": e.deaths, "hits": e.hits,
+                     "hp": max(0, int(e.hp)), "alive": e.is_alive} for e in self.entities]
+        return {
+            "ticks": self.ticks,
+            "sim_seconds": round(self.ticks * self.dt, 3),
+            "wall_seconds": round(self.wall_time, 3),
+            "ticks_per_second": round(self.ticks / self.wall_time, 1) if self.wall_time else None,
+            "kills": sum(f["kills"] for f in fighters),
+            "deaths": sum(f["deaths"] for f in fighters),
+            "hits": sum(f["hits"] for f in fighters),
+            "fighters": fighters,
+        }
+
+
+def run_match(fighters=4, ticks=int(600 / SIM_DT), seed=None, **kwargs):
+    """Play one headless match of `ticks` steps (ten simulated minutes by default) and return its stats."""
+    return Match(fighters, seed, **kwargs).run(ticks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fighters", type=int, default=4)
+    parser.add_argument("--ticks", type=int, default=int(600 / SIM_DT), help="steps per match (default: 10 simulated minutes)")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the first match; later ones count up from it")
+    parser.add_argument("--matches", type=int, default=1)
+    parser.add_argument("--no-power-ups", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per match")
+    args = parser.parse_args()
+
+    for i in range(args.matches):
+        seed = None if args.seed is None else args.seed + i
+        result = run_match(args.fighters, args.ticks, seed, power_ups=not args.no_power_ups)
+        if args.json:
+            print(json.dumps(dict(result, seed=seed)))
+            continue
+        print(f"match {i + 1}: {result['ticks']} ticks ({result['sim_seconds']:.0f} s simulated) in "
+              f"{result['wall_seconds']:.2f} s, {result['ticks_per_second']:.0f} ticks/s; "
+              f"{result['kills']} kills, {result['hits']} hits")
+        for f in sorted(result["fighters"], key=lambda f: (-f["kills"], f["deaths"])):
+            print(f"  {f['ch']} {f['name']:<8} kills {f['kills']:>3}  deaths {f['deaths']:>3}  hits {f['hits']:>4}")
+
+
+if __name__ == "__main__":
+    main()
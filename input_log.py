@@ -0,0 +1,67 @@
+import gzip
+import hashlib
+import json
+
+
+class InputLog:
+    """Records one simulation session's inputs as gzip'd JSON lines.
+
+    The first line is a header saying how to rebuild the session (kind,
+    seed, arena size). Every later line is one event: ["t", n, dt] for n
+    steps of dt in a row, and between them whatever the session feeds its
+    simulation (held keys for a headless.Match; joins, inputs and leaves
+    for a room_sim.RoomSimulation). `close` adds ["end", digest], a
+    fingerprint of the final state, so replay.py can tell whether the
+    replay ended in the same place.
+    """
+
+    def __init__(self, path, header):
+        self.path = path
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+        self._steps = 0
+        self._dt = None
+        self._write(header)
+
+    def _write(self, value):
+        self.file.write(json.dumps(value, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+    def _flush_steps(self):
+        if self._steps:
+            self._write(["t", self._steps, self._dt])
+            self._steps = 0
+
+    def event(self, *fields):
+        self._flush_steps()
+        self._write(list(fields))
+
+    def step(self, dt):
+        if dt != self._dt:
+            self._flush_steps()
+            self._dt = dt
+        self._steps += 1
+
+    def close(self, digest=None):
+        if self.file.closed:
+            return
+        self._flush_steps()
+        if digest is not None:
+            self._write(["end", digest])
+        self.file.close()
+
+
+def read_log(path):
+    """Return (header, events) of a log. One cut short, say by a killed server, gives what was written."""
+    header, events = None, []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline())
+            for line in f:
+                events.append(json.loads(line))
+        except (EOFError, OSError, ValueError):
+            pass
+    return header, events
+
+
+def digest(state):
+    """Short fingerprint of a simulation state built from plain values."""
+    return hashlib.sha256(repr(state).encode()).hexdigest()[:16]
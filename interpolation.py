@@ -0,0 +1,61 @@
+import collections
+
+# Remote players are drawn this many seconds in the past, so there is
+# usually a received position on either side of the drawn time. It has to
+# cover the send interval (0.1s at 10 Hz) plus arrival jitter; lower send
+# rates need a longer delay.
+INTERP_DELAY = 0.15
+# When the next position is late, keep moving along the last known
+# velocity for at most this long, then hold still until it arrives.
+MAX_EXTRAPOLATION = 0.25
+# Positions kept per entity; only the ones around the drawn time are used.
+BUFFER_SIZE = 16
+
+
+class InterpolationBuffer:
+    """Client side: timestamped positions of one remote entity.
+
+    `push` records each position as it is received; `sample` returns
+    where to draw the entity at a given time, `delay` seconds behind,
+    interpolated between the two positions around that moment.
+    """
+
+    def __init__(self, delay=INTERP_DELAY, max_extrapolation=MAX_EXTRAPOLATION, size=BUFFER_SIZE):
+        self.delay = delay
+        self.max_extrapolation = max_extrapolation
+        self.positions = collections.deque(maxlen=size)
+
+    def push(self, t, x, y):
+        positions = self.positions
+        if positions and t <= positions[-1][0]:
+            # Read in the same frame as the previous one: keep the newer position.
+            positions[-1] = (positions[-1][0], x, y)
+        else:
+            positions.append((t, x, y))
+
+    def reset(self, t, x, y):
+        """Forget the path so far, e.g. after a respawn teleport."""
+        self.positions.clear()
+        self.positions.append((t, x, y))
+
+    def sample(self, now):
+        """Return (x, y) to draw at `now`, or None before any position arrived."""
+        positions = self.positions
+        if not positions:
+            return None
+        render = now - self.delay
+        # Positions older than the one just before the drawn time are done with.
+        while len(positions) > 2 and positions[1][0] <= render:
+            positions.popleft()
+        t0, x0, y0 = positions[0]
+        if render <= t0 or len(positions) == 1:
+            return x0, y0
+        for t1, x1, y1 in positions:
+            if t1 >= render:
+                f = (render - t0) / (t1 - t0)
+                return x0 + (x1 - x0) * f, y0 + (y1 - y0) * f
+            t0, x0, y0 = t1, x1, y1
+        # Past the newest position: extrapolate from the last two.
+        tp, xp, yp = positions[-2]
+        ahead = min(render - t0, self.max_extrapolation) / (t0 - tp)
+        return x0 + (x0 - xp) * ahead, y0 + (y0 - yp) * ahead
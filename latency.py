@@ -0,0 +1,55 @@
+import bisect
+import collections
+
+# Seconds between pings. A ping and its pong give both ends a sample, so
+# this is the whole cost: one small message each way per second.
+PING_INTERVAL = 1.0
+# Upper edges in ms of the RTT histogram buckets; the last bucket is
+# everything slower.
+RTT_BUCKETS = (5, 10, 20, 50, 100, 200, 500, 1000)
+# Recent samples the clock offset is picked from: the one with the lowest
+# RTT had the least room for queueing on one leg only.
+OFFSET_WINDOW = 8
+
+
+class LinkStats:
+    """Round-trip time, jitter and peer clock offset of one connection.
+
+    `rtt` and `jitter` are smoothed like TCP's SRTT and RTTVAR
+    (RFC 6298). `offset` is the peer's clock minus ours, so a peer
+    timestamp `t` happened at `t - offset` here. All values in seconds;
+    None until the first sample.
+    """
+
+    def __init__(self):
+        self.rtt = None
+        self.jitter = 0.0
+        self.offset = None
+        self.samples = 0
+        self.histogram = [0] * (len(RTT_BUCKETS) + 1)
+        self._offsets = collections.deque(maxlen=OFFSET_WINDOW)
+
+    def add(self, rtt, offset):
+        if rtt < 0:
+            return
+        if self.rtt is None:
+            self.rtt = rtt
+            self.jitter = rtt / 2
+        else:
+            self.jitter += (abs(rtt - self.rtt) - self.jitter) / 4
+            self.rtt += (rtt - self.rtt) / 8
+        self.histogram[bisect.bisect_left(RTT_BUCKETS, rtt * 1000)] += 1
+        self._offsets.append((rtt, offset))
+        self.offset = min(self._offsets)[1]
+        self.samples += 1
+
+    def as_dict(self):
+        if self.rtt is None:
+            return {"samples": 0}
+        return {
+            "rtt_ms": round(self.rtt * 1000, 2),
+            "jitter_ms": round(self.jitter * 1000, 2),
+            "offset_ms": round(self.offset * 1000, 2),
+            "samples": self.samples,
+            "histogram": dict(zip([f"<={b}" for b in RTT_BUCKETS] + [f">{RTT_BUCKETS[-1]}"], self.histogram)),
+        }
@@ -29,45 +29,56 @@ class LobbyScreen:
             return False
             
     def _process_network_messages(self):
-        try:
-            while True:
-                msg = self.net_client.inbox.get_nowait()
-                mtype = msg.get("type")
-                
-                if mtype == "welcome":
-                    self.net_client.client_id = msg.get("id")
-                    self.net_client.lobby_state["players"] = msg.get("players", [])
-                    
-                elif mtype == "player_joined":
-                    player_info = {
-                        "id": msg.get("id"),
-                        "name": msg.get("name"),
-                        "ch": msg.get("ch"),
-                        "ready": False
-                    }
-                    self.net_client.lobby_state["players"].append(player_info)
-                    
-                elif mtype == "player_left":
-                    player_id = msg.get("id")
-                    self.net_client.lobby_state["players"] = [
-                        p for p in self.net_client.lobby_state["players"] 
-                        if p.get("id") != player_id
-                    ]
-                    
-                elif mtype == "lobby_state":
-                    self.net_client.lobby_state = {
-                        "players": msg.get("players", []),
-                        "game_state": msg.get("game_state", "lobby"),
-                        "countdown": msg.get("countdown", 0.0)
-                    }
-                    
-                elif mtype == "game_start":
-                    self.game_started = True
-                    break
-                    
-        except Exception:
-            pass
-            
+        messages = self.net_client.poll()
+        for i, msg in enumerate(messages):
+            # One malformed message must not take the rest of the batch
+            # (possibly game_start) down with it.
+            try:
+                started = self._handle_message(msg)
+            except Exception:
+                continue
+            if started:
+                # Whatever came after the start belongs to the game loop.
+                self.net_client.unread(messages[i + 1:])
+                break
+
+    def _handle_message(self, msg):
+        """Apply one lobby message; returns True on game_start."""
+        mtype = msg.get("type")
+
+        if mtype == "welcome":
+            self.net_client.client_id = msg.get("id")
+            self.net_client.lobby_state["players"] = msg.get("players", [])
+
+        elif mtype == "player_joined":
+            player_info = {
+                "id": msg.get("id"),
+                "name": msg.get("name"),
+                "ch": msg.get("ch"),
+                "ready": False
+            }
+            self.net_client.lobby_state["players"].append(player_info)
+
+        elif mtype == "player_left":
+            player_id = msg.get("id")
+            self.net_client.lobby_state["players"] = [
+                p for p in self.net_client.lobby_state["players"]
+                if p.get("id") != player_id
+            ]
+
+        elif mtype == "lobby_state":
+            self.net_client.lobby_state = {
+                "players": msg.get("players", []),
+                "game_state": msg.get("game_state", "lobby"),
+                "countdown": msg.get("countdown", 0.0)
+            }
+
+        elif mtype == "game_start":
+            self.net_client.game_config = msg
+            self.game_started = True
+            return True
+        return False
+
     def _draw_lobby(self):
         self.stdscr.clear()
         max_y, max_x = self.stdscr.getmaxyx()
@@ -1,21 +1,26 @@
+import argparse
 import curses
 import time
-import random
-import math
-import queue
 
 from utils import (
     FPS, DT, KEY_LEFT, KEY_RIGHT, KEY_JUMP, KEY_ATTACK, 
     KEY_SPECIAL, KEY_QUIT, setup_colors, get_random_position
 )
-from models import Entity, Projectile, PowerUp, Particle
-from ai import AIController, create_ai_entities
+from models import Entity, projectile_pool
+from particles import make_particles
+from projectiles import clear_projectiles, make_projectiles
 from renderer import Renderer
 from game_logic import GameLogic
-from net_client import NetClient
+from headless import Match
+from net_client import NetClient, StateSender
 from lobby_screen import LobbyScreen
 from simple_char_select import SimpleCharacterSelect
 from characters import get_character, get_character_display_name, get_character_char
+from room_sim import INPUT_KEYS, TICK_DT
+from snapshot import SnapshotReceiver
+from interpolation import INTERP_DELAY, InterpolationBuffer
+from prediction import PredictedPlayer
+from timestep import SIM_DT, FixedTimestep, remember_positions
 
 
 def prompt_text(stdscr, y, x, prompt, default=""):
@@ -47,7 +52,7 @@ def choose_menu(stdscr):
             return chr(ch)
 
 
-def main(stdscr):
+def main(stdscr, record=None):
     curses.curs_set(0)
     stdscr.nodelay(True)
     stdscr.timeout(0)
@@ -57,7 +62,6 @@ def main(stdscr):
 
     renderer = Renderer(stdscr)
     game_logic = GameLogic(max_x, max_y, ground_row)
-    ai_controller = AIController()
 
     mode = choose_menu(stdscr)
     if mode in ('q', 'Q'):
@@ -89,8 +93,8 @@ def main(stdscr):
     stdscr.timeout(0)
 
     entities = []
-    projectiles = []
-    particles = []
+    projectiles = make_projectiles()
+    particles = make_particles()
     power_ups = [] if not multiplayer else []
     messages = []
     combo_messages = []
@@ -110,7 +114,11 @@ def main(stdscr):
     net = None
     remote_entities = {}
     remote_by_id = {}
+    # rid -> InterpolationBuffer; remote players are drawn a little in the past.
+    remote_paths = {}
     client_id = None
+    authoritative = False
+    snapshots = SnapshotReceiver()
 
     if multiplayer:
         stdscr.nodelay(False)
@@ -125,16 +133,24 @@ def main(stdscr):
         stdscr.erase()
         stdscr.addstr(10, 4, f"Connecting to {host}:{port}...")
         stdscr.refresh()
-        net = NetClient(host, port)
+        # No network threads: the lobby and game loops poll() once per frame.
+        net = NetClient(host, port, threaded=False)
         try:
             net.connect()
             char_data = get_character(selected_char)
             char_emoji = get_character_char(selected_char, use_ascii=False)
-            net.join(room, name, char_emoji)
+            net.join(room, name, char_emoji, character=selected_char)
             
             lobby = LobbyScreen(stdscr, net)
             if not lobby.run():
                 return
+
+            authoritative = bool(net.game_config.get("authoritative"))
+            if authoritative:
+                # The server simulates a fixed arena; play in its coordinates.
+                arena_w, arena_h = net.game_config.get("arena", (max_x, max_y))
+                ground_row = arena_h - 6
+                game_logic = GameLogic(arena_w, arena_h, ground_row)
                 
             lobby_players = net.lobby_state.get("players", [])
             push_msg(f"Starting battle with {len(lobby_players)} players!", ttl=3.0)
@@ -159,17 +175,49 @@ def main(stdscr):
 
     char_data = get_character(selected_char)
     char_emoji = get_character_char(selected_char, use_ascii=False)
-    player = Entity(4, ground_row - 0.5, char_emoji, name=char_data.name, ai=False, character_id=selected_char)
+    match = None
+    if multiplayer:
+        player = Entity(4, ground_row - 0.5, char_emoji, name=char_data.name, ai=False, character_id=selected_char)
+        entities.append(player)
+        if authoritative:
+            # Start everyone where the server put them; prediction builds on
+            # the player's position from the first step.
+            spawns = net.game_config.get("spawns", {})
+            for rid, e in [(net.client_id, player)] + list(remote_entities.items()):
+                if rid in spawns:
+                    x, y = spawns[rid]
+                    e.x, e.y = e.prev_x, e.prev_y = float(x), float(y)
+    else:
+        # The whole singleplayer simulation runs in a seeded headless.Match,
+        # so a game recorded with --record can be replayed by replay.py.
+        match = Match(fighters=2, width=max_x, height=max_y, character=selected_char,
+                      messages=messages, combo_messages=combo_messages)
+        if record:
+            match.record(record)
+        game_logic = match.logic
+        entities, projectiles, particles, player = match.entities, match.projectiles, match.particles, match.player
+        power_ups = match.power_ups
     player.was_alive = True
-    entities.append(player)
-    
-    if not multiplayer:
-        ai_entities = create_ai_entities(max_x, ground_row, count=2)
-        entities.extend(ai_entities)
 
     last = time.time()
     game_time = 0.0
-    state_timer = 0.0
+    state_sender = StateSender(net) if net else None
+    predictor = PredictedPlayer(game_logic)
+    # An authoritative server applies one input per room tick, so the
+    # client steps (and predicts) at the server's tick rate.
+    clock = FixedTimestep(TICK_DT if authoritative else SIM_DT)
+    carried_keys = {}
+
+    def collision_filter(owner, e):
+        if not multiplayer:
+            return True
+        is_remote_owner = owner in remote_by_id
+        is_remote_target = e in remote_by_id
+        if not is_remote_owner and is_remote_target:
+            return True
+        if is_remote_owner and (not is_remote_target):
+            return True
+        return False
 
     push_msg("🔥 IMMORTAL COOL PRO BATTLE ROYALE 🔥", ttl=4.0, color=curses.COLOR_RED)
     push_msg("Controls: A/D move, W jump, S attack, F special, Q quit", ttl=3.0)
@@ -184,7 +232,6 @@ def main(stdscr):
         elapsed = t0 - last
         last = t0
         game_time += elapsed
-        state_timer += elapsed
 
         ch = stdscr.getch()
         keys = {}
@@ -195,19 +242,10 @@ def main(stdscr):
         if KEY_QUIT in keys:
             break
 
-        if not multiplayer:
-            game_logic.spawn_power_ups(power_ups, elapsed)
-
-        did_attack, attack_dir = game_logic.handle_player_input(player, keys, projectiles, combo_messages)
-
-        if not multiplayer:
-            for entity in entities:
-                ai_controller.update_ai_entity(entity, entities, projectiles, messages, elapsed)
-
         if multiplayer and net:
-            try:
-                while True:
-                    msg = net.inbox.get_nowait()
+            for msg in net.poll():
+                # A malformed message is skipped on its own; the rest of the batch still applies.
+                try:
                     mtype = msg.get("type")
                     if mtype == "welcome":
                         client_id = msg.get("id")
@@ -238,6 +276,7 @@ def main(stdscr):
                     elif mtype == "player_left":
                         rid = msg.get("id")
                         e = remote_entities.pop(rid, None)
+                        remote_paths.pop(rid, None)
                         if e and e in entities:
                             entities.remove(e)
                             remote_by_id.pop(e, None)
@@ -259,8 +298,8 @@ def main(stdscr):
                             continue
                         e = remote_entities.get(rid)
                         if e:
-                            e.x = float(msg.get("x", e.x))
-                            e.y = float(msg.get("y", e.y))
+                            path = remote_paths.setdefault(rid, InterpolationBuffer())
+                            path.push(t0, float(msg.get("x", e.x)), float(msg.get("y", e.y)))
                             e.hp = int(msg.get("hp", e.hp))
                     elif mtype == "attack":
                         rid = msg.get("id")
@@ -269,8 +308,43 @@ def main(stdscr):
                             dir = int(msg.get("dir", 1) or 1)
                             atk_speed = 25.0
                             pvx = atk_speed * dir
-                            proj = Projectile(e.x + dir*1.1, e.y-0.5, pvx, 0, '⚡', e, 20)
+                            proj = projectile_pool.acquire(e.x + dir*1.1, e.y-0.5, pvx, 0, '⚡', e, 20)
                             projectiles.append(proj)
+                    elif mtype == "snapshot":
+                        states = snapshots.apply(msg)
+                        if states is None:
+                            continue
+                        net.ack_snapshot(snapshots.latest)
+                        for rid, row in states.items():
+                            if rid == net.client_id:
+                                if not authoritative:
+                                    continue
+                                e = player
+                            else:
+                                e = remote_entities.get(rid)
+                                if e is None:
+                                    continue
+                            x, y, hp, alive = row[:4]
+                            respawned = authoritative and alive and not e.is_alive
+                            if authoritative:
+                                if respawned:
+                                    e.respawn(x, y)
+                                e.is_alive = bool(alive)
+                                e.kills, e.deaths = row[4], row[5]
+                            if e is player:
+                                if respawned:
+                                    predictor.reset()
+                                predictor.reconcile(player, row[6], x, y)
+                            elif respawned:
+                                remote_paths.setdefault(rid, InterpolationBuffer()).reset(t0, x, y)
+                            else:
+                                remote_paths.setdefault(rid, InterpolationBuffer()).push(t0, x, y)
+                            e.hp = hp
+                        if "proj" in msg:
+                            clear_projectiles(projectiles)
+                            projectiles.extend(projectile_pool.acquire(x, y, 0, 0, ch, None) for x, y, ch in msg["proj"])
+                        for ttl, txt, color in msg.get("events", []):
+                            push_msg(txt, ttl=ttl, color=color)
                     elif mtype == "respawn":
                         rid = msg.get("id")
                         e = remote_entities.get(rid)
@@ -278,46 +352,71 @@ def main(stdscr):
                             x = float(msg.get("x", e.x))
                             y = float(msg.get("y", e.y))
                             e.respawn(x, y)
+                            remote_paths.setdefault(rid, InterpolationBuffer()).reset(t0, x, y)
                             push_msg(f"{e.name} respawned!", ttl=2.0)
                             push_msg(f"Remote respawn at ({x:.1f}, {y:.1f})", ttl=1.0)
-            except queue.Empty:
-                pass
-            except Exception:
-                pass
-
-        skip_set = set(remote_entities.values()) if multiplayer else set()
-        game_logic.update_entities(entities, elapsed, skip=skip_set)
-        
-        if multiplayer:
+                except Exception:
+                    pass
+
+            # Draw remote players further back when arrivals are jittery.
+            delay = INTERP_DELAY + 2 * net.link.jitter
+            for rid, path in remote_paths.items():
+                path.delay = delay
+                e = remote_entities.get(rid)
+                pos = path.sample(t0)
+                if e is not None and pos is not None:
+                    # Already smoothed over time; nothing to blend between steps.
+                    e.x, e.y = e.prev_x, e.prev_y = pos
+
+        # A frame that runs no step hands its keys to the next one.
+        keys = {**carried_keys, **keys}
+        steps = clock.advance(elapsed)
+        carried_keys = keys if steps == 0 else {}
+        dt = clock.dt
+        did_attack, attack_dir = False, 0
+        for _ in range(steps):
+            remember_positions(entities)
+            if match is not None:
+                match.step(keys)
+                continue
+
+            if authoritative:
+                # The server runs the simulation; report which keys are held and
+                # predict their effect until its snapshots catch up. Every step is
+                # sent, so the seq the server echoes back marks an exact step.
+                held = "".join(k for k in INPUT_KEYS if ord(k) in keys)
+                input_seq = predictor.apply(player, {ord(k): True for k in held}, dt)
+                net.send_input(held, input_seq)
+            else:
+                attacked, direction = game_logic.handle_player_input(player, keys, projectiles, combo_messages)
+                if attacked:
+                    did_attack, attack_dir = True, direction
+
+            skip_set = set(entities) if authoritative else set(remote_entities.values())
+            game_logic.update_entities(entities, dt, skip=skip_set)
+
+            # Only remote players: in authoritative mode the predictor's
+            # update_physics already advanced the local player's timers.
             for e in remote_entities.values():
-                e.animation_frame += elapsed * 10
+                e.animation_frame += dt * 10
                 if e.invulnerable:
-                    e.invulnerable_timer -= elapsed
+                    e.invulnerable_timer -= dt
                     if e.invulnerable_timer <= 0:
                         e.invulnerable = False
-        game_logic.handle_entity_collisions(entities)
-
-        def collision_filter(p, e):
-            if not multiplayer:
-                return True
-            is_remote_owner = p.owner in remote_by_id
-            is_remote_target = e in remote_by_id
-            if not is_remote_owner and is_remote_target:
-                return True
-            if is_remote_owner and (not is_remote_target):
-                return True
-            return False
-
-        game_logic.handle_projectile_collisions(projectiles, entities, particles, messages, collision_filter=collision_filter)
-        game_logic.update_projectiles(projectiles, elapsed)
-        game_logic.update_particles(particles, elapsed)
-        game_logic.update_messages(messages, elapsed)
-        game_logic.update_combo_messages(combo_messages, elapsed)
-
-        if multiplayer and net:
-            if state_timer >= 0.1:
-                state_timer = 0.0
-                net.send_state(player.x, player.y, player.hp)
+            if not authoritative:
+                game_logic.handle_entity_collisions(entities)
+                game_logic.handle_projectile_collisions(projectiles, entities, particles, messages, collision_filter=collision_filter)
+                game_logic.update_projectiles(projectiles, dt)
+            game_logic.update_particles(particles, dt)
+
+        if match is not None:
+            power_ups = match.power_ups
+        else:
+            game_logic.update_messages(messages, elapsed)
+            game_logic.update_combo_messages(combo_messages, elapsed)
+
+        if multiplayer and net and not authoritative:
+            state_sender.update(player, t0)
             if did_attack:
                 net.send_attack(player.x, player.y, attack_dir)
             
@@ -327,16 +426,13 @@ def main(stdscr):
                 push_msg(f"Sent respawn at ({player.x:.1f}, {player.y:.1f})", ttl=1.0)
             player.was_alive = player.is_alive
 
-        if not multiplayer:
-            power_ups = game_logic.handle_power_up_collection(power_ups, entities, particles, messages)
-
         renderer.clear_screen()
         renderer.draw_stage(ground_row)
         if not multiplayer:
             renderer.draw_power_ups(power_ups)
         renderer.draw_particles(particles)
         renderer.draw_projectiles(projectiles)
-        renderer.draw_entities(entities)
+        renderer.draw_entities(entities, clock.alpha)
         renderer.draw_combo_messages(combo_messages)
         renderer.draw_messages(messages)
         renderer.draw_stats_panel(game_time, power_ups, particles, player)
@@ -349,6 +445,8 @@ def main(stdscr):
         if to_sleep > 0:
             time.sleep(to_sleep)
 
+    if match is not None:
+        match.stop_recording()
     if multiplayer and net:
         try:
             net.leave()
@@ -357,4 +455,8 @@ def main(stdscr):
         net.close()
 
 if __name__ == '__main__':
-    curses.wrapper(main)
+    parser = argparse.ArgumentParser(description="TermEmoji")
+    parser.add_argument("--record", metavar="PATH",
+                        help="log a singleplayer game's seed and inputs to PATH for replay.py")
+    args = parser.parse_args()
+    curses.wrapper(main, args.record)
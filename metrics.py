@@ -0,0 +1,168 @@
+import collections
+import http.server
+import itertools
+import json
+import threading
+import time
+
+# Counters are bumped on every read and broadcast; timings are taken for one
+# in SAMPLE_EVERY of them, so instrumentation costs a few attribute updates
+# per message rather than two clock reads.
+SAMPLE_EVERY = 16
+# Most recent timing samples kept for percentiles.
+SAMPLES = 2048
+
+
+class Samples:
+    """Recent durations in seconds, for percentiles."""
+
+    def __init__(self, size=SAMPLES):
+        self.values = collections.deque(maxlen=size)
+
+    def add(self, seconds):
+        self.values.append(seconds)
+
+    def percentiles(self):
+        """{"p50": ms, "p90": ms, "p99": ms, "max": ms}, or {} before any sample."""
+        values = sorted(self.values)
+        if not values:
+            return {}
+        last = len(values) - 1
+        return {
+            "p50": round(values[last // 2] * 1000, 3),
+            "p90": round(values[last * 9 // 10] * 1000, 3),
+            "p99": round(values[last * 99 // 100] * 1000, 3),
+            "max": round(values[last] * 1000, 3),
+        }
+
+
+class Metrics:
+    """Process-wide server instrumentation.
+
+    Per-room message and byte counters live on room_registry.Room and are
+    updated without a lock. Under the GIL that can lose an increment when
+    two threads hit the same room at once, which is fine for a rate.
+    """
+
+    def __init__(self, sample_every=SAMPLE_EVERY):
+        self.sample_every = sample_every
+        self.started = time.monotonic()
+        self.clients = 0
+        self.decode = Samples()
+        self.encode = Samples()
+        self.fanout = Samples()
+        # Client round trips, from the ping every client sends once a second.
+        self.rtt = Samples()
+        # sample() is True for one call in `sample_every`: time that operation.
+        # A cycle iterator's __next__ keeps it to a C call on the hot path.
+        self.sample = itertools.cycle([True] + [False] * (sample_every - 1)).__next__
+        self._lock = threading.Lock()
+
+    def client_connected(self):
+        with self._lock:
+            self.clients += 1
+
+    def client_disconnected(self):
+        with self._lock:
+            self.clients -= 1
+
+
+class Reporter:
+    """Turns cumulative counters into per-second rates since its previous report.
+
+    The stats log and the admin endpoint each keep their own Reporter, so
+    neither resets the other's window.
+    """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self._last_time = time.monotonic()
+        self._last = {}
+
+    def report(self, registry, simulation=None):
+        now = time.monotonic()
+        elapsed = max(now - self._last_time, 1e-6)
+        self._last_time = now
+        last, self._last = self._last, {}
+        by_state = collections.Counter()
+        totals = [0.0, 0.0, 0.0, 0.0]
+        max_depth = 0
+        rooms = {}
+        for room in registry.all_rooms():
+            counts = (room.msgs_in, room.bytes_in, room.msgs_out, room.bytes_out)
+            self._last[room.room_id] = counts
+            previous = last.get(room.room_id, (0, 0, 0, 0))
+            rates = [max(0, c - p) / elapsed for c, p in zip(counts, previous)]
+            totals = [t + r for t, r in zip(totals, rates)]
+            members = room.members
+            depths = {m.client_id: m.outbox.depth for m in members}
+            max_depth = max(max_depth, max(depths.values(), default=0))
+            by_state[room.game_state] += 1
+            rooms[room.room_id] = {
+                "game_state": room.game_state,
+                "players": len(depths),
+                "msgs_in_per_s": round(rates[0], 1),
+                "bytes_in_per_s": round(rates[1]),
+                "msgs_out_per_s": round(rates[2], 1),
+                "bytes_out_per_s": round(rates[3]),
+                "queue_depth": depths,
+                "latency": {m.client_id: m.link.as_dict() for m in members},
+            }
+        report = {
+            "uptime_s": round(now - self.metrics.started, 1),
+            "clients": self.metrics.clients,
+            "room_count": len(rooms),
+            "rooms_by_state": dict(by_state),
+            "msgs_in_per_s": round(totals[0], 1),
+            "bytes_in_per_s": round(totals[1]),
+            "msgs_out_per_s": round(totals[2], 1),
+            "bytes_out_per_s": round(totals[3]),
+            "decode_ms": self.metrics.decode.percentiles(),
+            "encode_ms": self.metrics.encode.percentiles(),
+            "fanout_ms": self.metrics.fanout.percentiles(),
+            "rtt_ms": self.metrics.rtt.percentiles(),
+            "max_queue_depth": max_depth,
+            "rooms": rooms,
+        }
+        if simulation is not None:
+            report["sim"] = {"tick_rate": simulation.tick_rate, "overruns": simulation.overruns,
+                             "rooms": simulation.stats()}
+        return report
+
+
+def summary_line(report):
+    states = " ".join(f"{state}={n}" for state, n in sorted(report["rooms_by_state"].items())) or "-"
+    fanout, rtt = report["fanout_ms"], report["rtt_ms"]
+    line = (f"stats: {report['clients']} clients, {report['room_count']} rooms ({states}), "
+            f"in {report['msgs_in_per_s']:.0f} msg/s {report['bytes_in_per_s'] / 1024:.1f} KiB/s, "
+            f"out {report['msgs_out_per_s']:.0f} msg/s {report['bytes_out_per_s'] / 1024:.1f} KiB/s, "
+            f"fanout p50 {fanout.get('p50', 0):.3f} p99 {fanout.get('p99', 0):.3f} ms, "
+            f"rtt p50 {rtt.get('p50', 0):.1f} p99 {rtt.get('p99', 0):.1f} ms, "
+            f"max queue {report['max_queue_depth']}")
+    if "sim" in report:
+        line += f", {report['sim']['overruns']} tick overruns"
+    return line
+
+
+def serve_admin(host, port, get_report):
+    """Serve `get_report()` as JSON on http://host:port/metrics from a daemon thread."""
+
+    class AdminHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = json.dumps(get_report(), indent=2).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    # One request at a time, so the endpoint's Reporter is never shared between threads.
+    httpd = http.server.HTTPServer((host, port), AdminHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
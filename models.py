@@ -3,10 +3,59 @@ import random
 import time
 from utils import GRAVITY, POWERUP_TYPES
 
+# Free objects a pool keeps for reuse; anything released beyond this is
+# left to the garbage collector.
+POOL_SIZE = 512
+
+
+class Pool:
+    """Free list of model objects, so heavy fights reuse them instead of allocating.
+
+    `acquire` takes the constructor arguments and hands back a released
+    object re-initialised through its `reset`, or a new one when the free
+    list is empty. `created` and `reused` count both cases; compare them
+    across a frame (see allocation_counts) to see how much it allocated.
+    """
+
+    def __init__(self, cls, size=POOL_SIZE):
+        self.cls = cls
+        self.size = size
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args, **kwargs)
+            self.reused += 1
+            return obj
+        self.created += 1
+        return self.cls(*args, **kwargs)
+
+    def release(self, obj):
+        if len(self.free) < self.size:
+            self.free.append(obj)
+
+    def release_all(self, objs):
+        for obj in objs:
+            self.release(obj)
+
+
 class Entity:
+    __slots__ = ("x", "y", "vx", "vy", "ch", "name", "ai", "character_id", "max_hp", "hp",
+                 "speed_multiplier", "damage_multiplier", "special_ability", "on_ground", "cooldown",
+                 "special_cooldown", "combo_count", "combo_timer", "kills", "deaths", "hits", "respawn_timer",
+                 "is_alive", "was_alive", "invulnerable", "invulnerable_timer", "power_ups", "original_ch",
+                 "animation_frame", "trail_positions", "special_effect_timer", "facing_dir", "prev_x", "prev_y")
+
     def __init__(self, x, y, ch, name="E", ai=False, character_id=None):
         self.x = float(x)
         self.y = float(y)
+        # Position before the last simulation step; the renderer draws
+        # between the two (timestep.FixedTimestep.alpha).
+        self.prev_x = self.x
+        self.prev_y = self.y
         self.vx = 0.0
         self.vy = 0.0
         self.ch = ch
@@ -36,8 +85,10 @@ class Entity:
         self.combo_timer = 0.0
         self.kills = 0
         self.deaths = 0
+        self.hits = 0
         self.respawn_timer = 0.0
         self.is_alive = True
+        self.was_alive = True
         self.invulnerable = False
         self.invulnerable_timer = 0.0
         self.power_ups = {
@@ -53,8 +104,8 @@ class Entity:
         self.facing_dir = 1
 
     def respawn(self, x, y):
-        self.x = x
-        self.y = y
+        self.x = self.prev_x = x
+        self.y = self.prev_y = y
         self.vx = 0.0
         self.vy = 0.0
         self.hp = self.max_hp
@@ -87,6 +138,17 @@ class Entity:
     def is_infinite_mode(self):
         return self.power_ups['infinite'] > 0
 
+    def save_physics(self):
+        """Everything update_physics and player input change, as a tuple for restore_physics."""
+        return (self.x, self.y, self.vx, self.vy, self.on_ground, self.facing_dir,
+                self.cooldown, self.special_cooldown, self.special_effect_timer,
+                self.combo_count, self.combo_timer, self.invulnerable, self.invulnerable_timer)
+
+    def restore_physics(self, state):
+        (self.x, self.y, self.vx, self.vy, self.on_ground, self.facing_dir,
+         self.cooldown, self.special_cooldown, self.special_effect_timer,
+         self.combo_count, self.combo_timer, self.invulnerable, self.invulnerable_timer) = state
+
     def update_physics(self, dt, ground_row, max_x):
         self.cooldown = max(0.0, self.cooldown - dt)
         self.special_cooldown = max(0.0, self.special_cooldown - dt)
@@ -121,7 +183,13 @@ class Entity:
             self.vx *= -0.2
 
 class Projectile:
+    __slots__ = ("x", "y", "vx", "vy", "ch", "owner", "life", "damage", "special", "trail_positions")
+
     def __init__(self, x, y, vx, vy, ch, owner, damage=20, special=False):
+        self.trail_positions = []
+        self.reset(x, y, vx, vy, ch, owner, damage, special)
+
+    def reset(self, x, y, vx, vy, ch, owner, damage=20, special=False):
         self.x = float(x)
         self.y = float(y)
         self.vx = vx
@@ -131,7 +199,7 @@ class Projectile:
         self.life = 3.0
         self.damage = damage
         self.special = special
-        self.trail_positions = []
+        self.trail_positions.clear()
 
     def update(self, dt):
         self.trail_positions.append((self.x, self.y))
@@ -148,6 +216,8 @@ class Projectile:
         return (self.life <= 0 or self.x < 0 or self.x > max_x-1 or self.y > max_y)
 
 class PowerUp:
+    __slots__ = ("x", "y", "power_type", "collected", "bob_offset", "bob_speed")
+
     def __init__(self, x, y, power_type):
         self.x = float(x)
         self.y = float(y)
@@ -182,7 +252,12 @@ class PowerUp:
         return None
 
 class Particle:
+    __slots__ = ("x", "y", "vx", "vy", "ch", "life", "max_life")
+
     def __init__(self, x, y, vx, vy, ch, life=1.0):
+        self.reset(x, y, vx, vy, ch, life)
+
+    def reset(self, x, y, vx, vy, ch, life=1.0):
         self.x = float(x)
         self.y = float(y)
         self.vx = vx
@@ -198,3 +273,12 @@ class Particle:
         self.vy += GRAVITY * dt * 0.5
         return self.life <= 0
 
+
+projectile_pool = Pool(Projectile)
+particle_pool = Pool(Particle)
+
+
+def allocation_counts():
+    """{pool: (created, reused)} so far; the difference across a frame is what it allocated."""
+    return {"projectile": (projectile_pool.created, projectile_pool.reused),
+            "particle": (particle_pool.created, particle_pool.reused)}
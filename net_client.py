@@ -1,20 +1,114 @@
+import collections
+import selectors
 import socket
 import threading
-import json
-import queue
+import time
+
+import protocol
+from latency import PING_INTERVAL, LinkStats
+
+# Server messages may exceed a bin1 frame and fall back to a JSON line.
+MAX_SERVER_FRAME = 1024 * 1024
+
+# StateSender: seconds between state updates while moving, the shortest
+# gap even for urgent ones, and how often an unchanged state is repeated.
+STATE_INTERVAL = 0.1
+STATE_MIN_INTERVAL = 1.0 / 30
+STATE_KEEPALIVE = 1.0
+# Multiplier on STATE_INTERVAL while the server reports congestion.
+CONGESTION_BACKOFF = 2.5
+# Movement below this many cells since the last update is not worth one.
+POSITION_EPSILON = 0.05
+# A velocity change this large (a jump, a stop, a turn) is sent right away.
+VELOCITY_JUMP = 5.0
+
+class Inbox:
+    """Received messages waiting for the game loop.
+
+    Only the newest `state` per sender is worth applying, so states are
+    kept in a dict by sender id and replace each other, while everything
+    else (joins, leaves, attacks, respawns, game_start, snapshots) stays
+    in arrival order. A frame that catches up after a stall therefore
+    costs one state per player, however long the backlog. Before an event
+    from a sender, that sender's pending state is moved into the event
+    order, so nobody's state is applied after their own later event.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = collections.deque()
+        self._latest = {}
+        # States replaced before the game loop saw them.
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._events) + len(self._latest)
+
+    def put(self, msg):
+        with self._lock:
+            sender = msg.get("id")
+            if msg.get("type") == "state":
+                if sender in self._latest:
+                    self.coalesced += 1
+                self._latest[sender] = msg
+                return
+            if sender is not None:
+                pending = self._latest.pop(sender, None)
+                if pending is not None:
+                    self._events.append(pending)
+            self._events.append(msg)
+
+    def drain(self):
+        """Return and clear everything: events in order, then the newest state per sender."""
+        with self._lock:
+            batch = list(self._events)
+            self._events.clear()
+            batch.extend(self._latest.values())
+            self._latest.clear()
+        return batch
+
 
 class NetClient:
-    def __init__(self, host="127.0.0.1", port=8765):
+    """Connection to the game server.
+
+    By default a receive thread decodes messages into `inbox` and a ping
+    thread runs once joined. With `threaded=False` there are no threads:
+    the game loop calls `poll()` once per frame, which reads whatever the
+    socket has ready into the framing buffer and sends the ping when due.
+    Either way `poll()` returns the messages received since the last call.
+    In polled mode a pong is only seen at the next poll, so `link` RTT
+    includes that wait: the latency the game loop actually sees.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, codecs=(protocol.BINARY.name,), threaded=True):
         self.host = host
         self.port = port
+        # Wire formats offered at join, most preferred first; JSON is always the fallback.
+        self.codecs = list(codecs)
+        self.codec = protocol.JSON
+        self.threaded = threaded
         self.sock = None
         self.recv_thread = None
-        self.inbox = queue.Queue()
+        self.inbox = Inbox()
+        # Messages handed back with unread(); poll() returns them first.
+        self._unread = collections.deque()
+        self._decoder = protocol.FrameDecoder(max_frame=MAX_SERVER_FRAME)
+        self._selector = None
+        self._next_ping = None
         self.alive = False
         self.client_id = None
         self.room = None
         self.ready = False
         self.lobby_state = {"players": [], "game_state": "lobby", "countdown": 0.0}
+        self.game_config = {}
+        # Set while the server says this room's send queues are backing up.
+        self.congested = False
+        # Round trip, jitter and server clock offset, from one ping a second.
+        self.link = LinkStats()
+        self._last_pong = None
+        self._ping_thread = None
+        # The ping thread sends too; keep whole messages from interleaving.
+        self._send_lock = threading.Lock()
 
     def connect(self, timeout=5.0):
         self.sock = socket.create_connection((self.host, self.port), timeout=timeout)
@@ -24,8 +118,14 @@ class NetClient:
         except Exception:
             pass
         self.alive = True
-        self.recv_thread = threading.Thread(target=self._recv_loop, daemon=True)
-        self.recv_thread.start()
+        if self.threaded:
+            self.recv_thread = threading.Thread(target=self._recv_loop, daemon=True)
+            self.recv_thread.start()
+        else:
+            # The socket stays blocking for sendall; poll() only reads once
+            # the selector says there is something to read.
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self.sock, selectors.EVENT_READ)
 
     def close(self):
         self.alive = False
@@ -34,24 +134,71 @@ class NetClient:
                 self.sock.close()
         except OSError:
             pass
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+
+    def poll(self):
+        """Return what arrived since the last call without blocking (see Inbox for the order)."""
+        batch = list(self._unread)
+        self._unread.clear()
+        while not self.threaded and self.alive and self._selector.select(0):
+            try:
+                messages = self._decoder.recv_into(self.sock)
+            except (BlockingIOError, InterruptedError):
+                break
+            except (OSError, protocol.FrameTooLarge):
+                messages = None
+            if messages is None:
+                self.close()
+                break
+            for msg in messages:
+                if self._dispatch(msg):
+                    self.inbox.put(msg)
+        batch.extend(self.inbox.drain())
+        if self._next_ping is not None and self.alive and time.monotonic() >= self._next_ping:
+            self._next_ping += PING_INTERVAL
+            self.ping()
+        return batch
+
+    def unread(self, messages):
+        """Hand messages back so the next poll() returns them first."""
+        self._unread.extendleft(reversed(messages))
 
     def _send(self, obj):
         try:
-            data = (json.dumps(obj, separators=(",", ":")) + "\n").encode("utf-8")
-            self.sock.sendall(data)
+            data = self.codec.encode(obj)
+            with self._send_lock:
+                self.sock.sendall(data)
         except OSError:
             self.close()
 
-    def join(self, room, name, ch):
+    def join(self, room, name, ch, character=None):
         self.room = room
-        self._send({"type": "join", "room": room, "name": name, "ch": ch})
+        msg = {"type": "join", "room": room, "name": name, "ch": ch}
+        if character:
+            msg["character"] = character
+        if self.codecs:
+            msg["codecs"] = self.codecs
+        self._send(msg)
+        # Not before the join: with --workers the gateway routes on the first message.
+        if not self.threaded:
+            if self._next_ping is None:
+                self._next_ping = time.monotonic()
+        elif self._ping_thread is None:
+            self._ping_thread = threading.Thread(target=self._ping_loop, daemon=True)
+            self._ping_thread.start()
 
     def set_ready(self, ready):
         self.ready = ready
         self._send({"type": "ready", "ready": ready})
 
-    def send_state(self, x, y, hp):
-        self._send({"type": "state", "x": x, "y": y, "hp": hp})
+    def send_state(self, x, y, hp, t=None):
+        """`t`, a send timestamp, rides along in JSON relays for latency probes; bin1 drops it."""
+        msg = {"type": "state", "x": x, "y": y, "hp": hp}
+        if t is not None:
+            msg["t"] = t
+        self._send(msg)
 
     def send_attack(self, x, y, dir):
         self._send({"type": "attack", "x": x, "y": y, "dir": dir})
@@ -59,32 +206,120 @@ class NetClient:
     def send_respawn(self, x, y):
         self._send({"type": "respawn", "x": x, "y": y})
 
+    def send_input(self, keys, seq):
+        self._send({"type": "input", "keys": keys, "seq": seq})
+
+    def ack_snapshot(self, seq):
+        self._send({"type": "ack", "seq": seq})
+
     def leave(self):
         self._send({"type": "leave"})
 
+    def ping(self):
+        msg = {"type": "ping", "t": time.monotonic()}
+        last = self._last_pong
+        if last is not None:
+            # Echo the server's timestamp with how long we held it, so the
+            # server gets its own round-trip sample from this ping.
+            msg["echo"] = last[0]
+            msg["held"] = msg["t"] - last[1]
+        self._send(msg)
+
+    def server_time(self):
+        """Our best estimate of the server's clock (time.monotonic there) right now."""
+        return time.monotonic() + (self.link.offset or 0.0)
+
+    def _ping_loop(self):
+        while self.alive:
+            self.ping()
+            time.sleep(PING_INTERVAL)
+
+    def _on_pong(self, msg):
+        now = time.monotonic()
+        try:
+            sent, server_t = float(msg["t"]), float(msg["st"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self._last_pong = (server_t, now)
+        self.link.add(now - sent, server_t - (sent + now) / 2)
+
+    def _dispatch(self, msg):
+        """Handle connection-level messages; returns False for those the game never sees."""
+        mtype = msg.get("type")
+        if mtype == "welcome":
+            # The server's decoder accepts either format, so switch right away.
+            self.codec = protocol.get_codec(msg.get("codec"))
+        elif mtype == "congestion":
+            self.congested = bool(msg.get("congested"))
+        elif mtype == "pong":
+            self._on_pong(msg)
+            return False
+        return True
+
     def _recv_loop(self):
-        buffer = b""
+        decoder = self._decoder
         try:
             while self.alive:
                 try:
-                    data = self.sock.recv(4096)
+                    messages = decoder.recv_into(self.sock)
                 except (socket.timeout, TimeoutError):
                     continue
-                if not data:
+                except (OSError, protocol.FrameTooLarge):
                     break
-                buffer += data
-                while b"\n" in buffer:
-                    line, buffer = buffer.split(b"\n", 1)
-                    if not line:
-                        continue
-                    try:
-                        msg = json.loads(line.decode("utf-8"))
-                    except json.JSONDecodeError:
-                        continue
-                    self.inbox.put(msg)
+                if messages is None:
+                    break
+                for msg in messages:
+                    if self._dispatch(msg):
+                        self.inbox.put(msg)
         finally:
             self.alive = False
             try:
                 self.sock.close()
             except OSError:
                 pass
+
+
+class StateSender:
+    """Decides when the local player's state is worth a `state` message.
+
+    Instead of one update every 100 ms regardless, an update goes out:
+      - right away when hp or aliveness changed or the velocity jumped
+        (damage, death, a jump, starting or stopping), since peers
+        would otherwise extrapolate the wrong way;
+      - every STATE_INTERVAL while the player keeps moving, stretched by
+        CONGESTION_BACKOFF while the server reports congestion;
+      - every STATE_KEEPALIVE when nothing changed, so a peer that
+        missed a dropped update still converges.
+    """
+
+    def __init__(self, net, interval=STATE_INTERVAL):
+        self.net = net
+        self.interval = interval
+        self.sent_at = None
+        self.last = None
+        self.sent = 0
+
+    def update(self, entity, now):
+        """Send `entity`'s state if it is due; returns True when a message went out."""
+        state = (entity.x, entity.y, entity.hp, entity.is_alive, entity.vx, entity.vy)
+        if self.last is not None:
+            since = now - self.sent_at
+            x, y, hp, alive, vx, vy = self.last
+            if since < STATE_MIN_INTERVAL:
+                due = False
+            elif hp != entity.hp or alive != entity.is_alive:
+                due = True
+            elif abs(entity.vx - vx) + abs(entity.vy - vy) >= VELOCITY_JUMP:
+                due = True
+            elif abs(entity.x - x) > POSITION_EPSILON or abs(entity.y - y) > POSITION_EPSILON:
+                interval = self.interval * (CONGESTION_BACKOFF if self.net.congested else 1.0)
+                due = since >= interval
+            else:
+                due = since >= STATE_KEEPALIVE
+            if not due:
+                return False
+        self.net.send_state(entity.x, entity.y, entity.hp)
+        self.sent_at = now
+        self.last = state
+        self.sent += 1
+        return True
@@ -0,0 +1,111 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; without it particles stay a list of models.Particle
+    np = None
+
+from utils import GRAVITY, PARTICLE_EMOJIS
+
+# Initial capacity; the arrays double whenever a burst does not fit.
+CAPACITY = 1024
+
+
+class ParticleSystem:
+    """Particles as a structure of arrays.
+
+    Position, velocity, remaining life and glyph index live in
+    preallocated NumPy arrays with the live particles packed into the
+    first `count` slots. A frame integrates them all in a few vector
+    operations, and expired particles are swap-compacted: survivors from
+    the tail move into the holes, so the cost follows the number that
+    died rather than the number alive. Bursts are spawned with one
+    batched random draw each.
+    """
+
+    def __init__(self, capacity=CAPACITY, glyphs=PARTICLE_EMOJIS, rng=None):
+        self.glyphs = list(glyphs)
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.count = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = self.count
+        arrays = {}
+        for name in ("x", "y", "vx", "vy", "life"):
+            array = np.empty(capacity, dtype=np.float64)
+            if old:
+                array[:old] = getattr(self, name)[:old]
+            arrays[name] = array
+        glyph = np.empty(capacity, dtype=np.int16)
+        if old:
+            glyph[:old] = self.glyph[:old]
+        self.x, self.y, self.vx, self.vy, self.life = (arrays[n] for n in ("x", "y", "vx", "vy", "life"))
+        self.glyph = glyph
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def burst(self, x, y, count=8):
+        """Spawn `count` particles flying out of (x, y), like utils.create_explosion_particles."""
+        start, end = self.count, self.count + count
+        if end > self.capacity:
+            self._allocate(max(end, 2 * self.capacity))
+        rng = self.rng
+        angle = rng.uniform(0, 2 * math.pi, count)
+        speed = rng.uniform(5, 15, count)
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.vx[start:end] = np.cos(angle) * speed
+        self.vy[start:end] = np.sin(angle) * speed
+        self.life[start:end] = rng.uniform(0.5, 1.5, count)
+        self.glyph[start:end] = rng.integers(0, len(self.glyphs), count)
+        self.count = end
+
+    def update(self, dt):
+        n = self.count
+        if not n:
+            return
+        life, vy = self.life[:n], self.vy[:n]
+        life -= dt
+        self.x[:n] += self.vx[:n] * dt
+        self.y[:n] += vy * dt
+        vy += GRAVITY * dt * 0.5
+        dead = life <= 0
+        died = int(np.count_nonzero(dead))
+        if not died:
+            return
+        kept = n - died
+        holes = np.flatnonzero(dead[:kept])
+        movers = np.flatnonzero(~dead[kept:]) + kept
+        for array in (self.x, self.y, self.vx, self.vy, self.life, self.glyph):
+            array[holes] = array[movers]
+        self.count = kept
+
+    def cells(self, max_x, max_y):
+        """(row, column, glyph) of every on-screen cell holding a particle, one per cell."""
+        n = self.count
+        sx = np.rint(self.x[:n]).astype(np.int64)
+        sy = np.rint(self.y[:n]).astype(np.int64)
+        visible = (sx >= 0) & (sx < max_x) & (sy >= 0) & (sy < max_y)
+        sx, sy, glyph = sx[visible], sy[visible], self.glyph[:n][visible]
+        # Many particles share a cell; drawing each cell once bounds the
+        # curses calls by the screen size, not the particle count. The
+        # newest particle in a cell wins, as if all were drawn in order.
+        _, first = np.unique((sy * max_x + sx)[::-1], return_index=True)
+        last = len(sx) - 1 - first
+        glyphs = self.glyphs
+        return zip(sy[last].tolist(), sx[last].tolist(), [glyphs[g] for g in glyph[last].tolist()])
+
+
+def make_particles(seed=None):
+    """A ParticleSystem when NumPy is installed, else a list for models.Particle objects.
+
+    `seed` seeds the ParticleSystem's generator; list particles draw from
+    the GameLogic rng instead.
+    """
+    return ParticleSystem(rng=np.random.default_rng(seed)) if np is not None else []
@@ -0,0 +1,81 @@
+import collections
+
+from models import projectile_pool
+
+# Predicted frames kept for replay; at 30 fps that is two seconds of round trip.
+HISTORY = 64
+# Server positions within this many cells of the prediction are taken as
+# agreement: snapshots round to 0.01 and server ticks do not line up
+# exactly with client frames.
+TOLERANCE = 0.25
+
+
+class PredictedPlayer:
+    """Client side: the local player's inputs the server has not yet acknowledged.
+
+    Each frame runs the held keys through the same handle_player_input and
+    update_physics code the server simulation uses, so the player moves at
+    once instead of a round trip later. Every input is numbered, sent to
+    the server and kept with the predicted physics state it produced.
+    A snapshot says which input number the server had applied and where
+    that put the player; if the prediction for that input was off, the
+    player is put where the server says and every later input is replayed
+    on top.
+    """
+
+    def __init__(self, logic, size=HISTORY, tolerance=TOLERANCE):
+        self.logic = logic
+        self.tolerance = tolerance
+        self.seq = 0
+        # (seq, keys, dt, Entity.save_physics() after that frame)
+        self.pending = collections.deque(maxlen=size)
+        self.corrections = 0
+        # Projectiles handle_player_input fires during prediction; they go
+        # straight back to the pool.
+        self._shots = []
+
+    def _step(self, entity, keys, dt):
+        if not entity.is_alive:
+            return
+        # Projectiles and combo popups come from the server's snapshots.
+        self.logic.handle_player_input(entity, keys, self._shots, [])
+        if self._shots:
+            projectile_pool.release_all(self._shots)
+            self._shots.clear()
+        entity.update_physics(dt, self.logic.ground_row, self.logic.max_x)
+
+    def apply(self, entity, keys, dt):
+        """Predict one frame of `keys` ({key code: True}); returns its input seq."""
+        self.seq += 1
+        self._step(entity, keys, dt)
+        self.pending.append((self.seq, keys, dt, entity.save_physics()))
+        return self.seq
+
+    def reconcile(self, entity, acked, x, y):
+        """Apply the server's position after input `acked`; returns how far the player moved."""
+        pending = self.pending
+        before_x, before_y = entity.x, entity.y
+        while pending and pending[0][0] < acked:
+            pending.popleft()
+        if not pending:
+            # Nothing predicted since the server's input (standing still
+            # after a respawn, say): its position is the whole story.
+            entity.x, entity.y = x, y
+            return abs(x - before_x) + abs(y - before_y)
+        if pending[0][0] != acked:
+            # The server has not applied any input still kept here, e.g.
+            # right after the start; there is nothing to compare against.
+            return 0.0
+        state = pending.popleft()[3]
+        if abs(state[0] - x) <= self.tolerance and abs(state[1] - y) <= self.tolerance:
+            return 0.0
+        entity.restore_physics((x, y) + state[2:])
+        for i, (seq, keys, dt, _) in enumerate(pending):
+            self._step(entity, keys, dt)
+            pending[i] = (seq, keys, dt, entity.save_physics())
+        self.corrections += 1
+        return abs(entity.x - before_x) + abs(entity.y - before_y)
+
+    def reset(self):
+        """Drop unacknowledged inputs, e.g. after the server respawned the player."""
+        self.pending.clear()
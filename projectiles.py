@@ -0,0 +1,203 @@
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; without it projectiles stay a list of models.Projectile
+    np = None
+
+from models import Projectile, projectile_pool
+from utils import GRAVITY
+
+# Initial capacity; the arrays double whenever a projectile does not fit.
+CAPACITY = 256
+# Positions kept per projectile for the renderer's trail, newest included.
+TRAIL = 5
+# Up to this many entities every projectile is compared with every entity
+# in one broadcast; past it the spatial hash is cheaper.
+BROADCAST_MAX = 64
+
+
+class ProjectileStore:
+    """Projectiles as a structure of arrays.
+
+    Position, velocity, life and the trail ring live in NumPy arrays with
+    the live projectiles packed into the first `count` slots; owner,
+    glyph, damage and the special flag sit in parallel lists. Physics and
+    lifetime run as vector operations and `hits` finds every projectile
+    touching an entity in one broadcast comparison.
+
+    It takes models.Projectile objects like the list it replaces
+    (`append`, `extend`, `clear`, `len`), and indexing or iterating gives
+    Projectile copies for code that only reads, such as snapshots.
+    """
+
+    def __init__(self, capacity=CAPACITY):
+        self.count = 0
+        self.owner = []
+        self.ch = []
+        self.damage = []
+        self.special = []
+        # All projectiles advance together, so one write position serves
+        # every trail; trail_len says how much of it each one has filled.
+        self.trail_head = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = self.count
+        arrays = {}
+        for name, shape, dtype in (("x", (), np.float64), ("y", (), np.float64), ("vx", (), np.float64),
+                                   ("vy", (), np.float64), ("life", (), np.float64),
+                                   ("trail", (TRAIL, 2), np.float64), ("trail_len", (), np.int8)):
+            array = np.empty((capacity,) + shape, dtype=dtype)
+            if old:
+                array[:old] = getattr(self, name)[:old]
+            arrays[name] = array
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        p = Projectile(self.x[i], self.y[i], float(self.vx[i]), float(self.vy[i]), self.ch[i], self.owner[i],
+                       self.damage[i], self.special[i])
+        p.life = float(self.life[i])
+        p.trail_positions = [tuple(self.trail[i, (self.trail_head - k) % TRAIL])
+                             for k in range(int(self.trail_len[i]) - 1, -1, -1)]
+        return p
+
+    def __iter__(self):
+        return (self[i] for i in range(self.count))
+
+    def add(self, x, y, vx, vy, ch, owner, damage=20, special=False, life=3.0):
+        i = self.count
+        if i == self.capacity:
+            self._allocate(2 * self.capacity)
+        self.x[i], self.y[i], self.vx[i], self.vy[i], self.life[i] = x, y, vx, vy, life
+        self.trail_len[i] = 0
+        self.owner.append(owner)
+        self.ch.append(ch)
+        self.damage.append(damage)
+        self.special.append(special)
+        self.count = i + 1
+
+    def append(self, p):
+        """Copy `p` in; it goes back to models.projectile_pool, so drop it after this."""
+        self.add(p.x, p.y, p.vx, p.vy, p.ch, p.owner, p.damage, p.special, p.life)
+        projectile_pool.release(p)
+
+    def extend(self, projectiles):
+        for p in projectiles:
+            self.append(p)
+
+    def clear(self):
+        self.count = 0
+        del self.owner[:], self.ch[:], self.damage[:], self.special[:]
+
+    def keep(self, alive):
+        """Drop every projectile whose entry in the bool array `alive` is False.
+
+        Survivors keep their order, so hits resolve in spawn order exactly
+        as they do for a list.
+        """
+        n = self.count
+        kept = int(np.count_nonzero(alive))
+        if kept == n:
+            return
+        for array in (self.x, self.y, self.vx, self.vy, self.life, self.trail, self.trail_len):
+            array[:kept] = array[:n][alive]
+        for values in (self.owner, self.ch, self.damage, self.special):
+            values[:] = [v for v, a in zip(values, alive.tolist()) if a]
+        self.count = kept
+
+    def discard(self, indices):
+        alive = np.ones(self.count, dtype=bool)
+        alive[indices] = False
+        self.keep(alive)
+
+    def update(self, dt, max_x, max_y):
+        """One step of Projectile.update_physics for all; expired ones are removed."""
+        n = self.count
+        if not n:
+            return
+        x, y, vy, life = self.x[:n], self.y[:n], self.vy[:n], self.life[:n]
+        life -= dt
+        vy += GRAVITY * dt * 0.1
+        x += self.vx[:n] * dt
+        y += vy * dt
+        self.trail_head = (self.trail_head + 1) % TRAIL
+        self.trail[:n, self.trail_head, 0] = x
+        self.trail[:n, self.trail_head, 1] = y
+        trail_len = self.trail_len[:n]
+        trail_len += trail_len < TRAIL
+        self.keep((life > 0) & (x >= 0) & (x <= max_x - 1) & (y <= max_y))
+
+    def hits(self, entities, grid=None):
+        """(projectile index, entity index) pairs within one cell of each other, by projectile then entity.
+
+        Dead, invulnerable and owning entities are left out. With a
+        SpatialHash of the living entities' indices (GameLogic.index_entities)
+        and more than BROADCAST_MAX entities, each projectile looks up its
+        neighbours there instead of being compared with every entity.
+        """
+        n = self.count
+        owner = self.owner
+        pairs = []
+        if grid is not None and len(grid) > BROADCAST_MAX:
+            xs, ys = self.x[:n].tolist(), self.y[:n].tolist()
+            for i in range(n):
+                x, y = xs[i], ys[i]
+                for j in grid.query(x, y, 1.0):
+                    e = entities[j]
+                    if (e.is_alive and not e.invulnerable and e is not owner[i]
+                            and abs(e.x - x) < 1.0 and abs(e.y - y) < 1.0):
+                        pairs.append((i, j))
+            return pairs
+        targets = [j for j, e in enumerate(entities) if e.is_alive and not e.invulnerable]
+        if not n or not targets:
+            return pairs
+        ex = np.array([entities[j].x for j in targets])
+        ey = np.array([entities[j].y for j in targets])
+        near = ((np.abs(self.x[:n, None] - ex) < 1.0) & (np.abs(self.y[:n, None] - ey) < 1.0)).nonzero()
+        for i, j in zip(near[0].tolist(), near[1].tolist()):
+            e = entities[targets[j]]
+            if e is not owner[i]:
+                pairs.append((i, targets[j]))
+        return pairs
+
+    def cells(self, max_x, max_y):
+        """(row, column, glyph) to draw: every trail dot, then every projectile."""
+        n = self.count
+        filled = np.arange(TRAIL)[None, :] < self.trail_len[:n, None]
+        # Ring slot k back from the head is the k-th newest trail position.
+        ring = (self.trail_head - np.arange(TRAIL)) % TRAIL
+        trail = self.trail[:n][:, ring][filled]
+        xs = np.concatenate((trail[:, 0], self.x[:n]))
+        ys = np.concatenate((trail[:, 1], self.y[:n]))
+        glyphs = ["·"] * len(trail) + self.ch
+        sx = np.rint(xs).astype(np.int64)
+        sy = np.rint(ys).astype(np.int64)
+        visible = ((sx >= 0) & (sx < max_x) & (sy >= 0) & (sy < max_y)).nonzero()[0].tolist()
+        sx, sy = sx.tolist(), sy.tolist()
+        return [(sy[k], sx[k], glyphs[k]) for k in visible]
+
+
+def positions(projectiles):
+    """(x, y, glyph) of each projectile in a ProjectileStore or a list."""
+    if isinstance(projectiles, ProjectileStore):
+        n = projectiles.count
+        return zip(projectiles.x[:n].tolist(), projectiles.y[:n].tolist(), projectiles.ch)
+    return ((p.x, p.y, p.ch) for p in projectiles)
+
+
+def clear_projectiles(projectiles):
+    """Empty a ProjectileStore or a list, handing list entries back to models.projectile_pool."""
+    if not isinstance(projectiles, ProjectileStore):
+        projectile_pool.release_all(projectiles)
+    projectiles.clear()
+
+
+def make_projectiles():
+    """A ProjectileStore when NumPy is installed, else a list for models.Projectile objects."""
+    return ProjectileStore() if np is not None else []
@@ -0,0 +1,390 @@
+import json
+import struct
+
+# Wire formats
+#
+# "json": one compact JSON object per line. Every client and server speaks it,
+# and it is what a connection uses until `join`/`welcome` negotiate otherwise.
+#
+# "bin1": frames of [type:u8][length:u16 LE][payload]. Type codes are >= 0x80,
+# so a frame can never be confused with a JSON line (which starts with "{"),
+# and one FrameDecoder reads a stream that switches formats mid-way.
+# state/attack/respawn get fixed struct payloads, and so do relay-room
+# snapshots (rows of id/x/y/hp/alive); everything else travels as a FRAME_JSON
+# frame holding compact JSON.
+
+FRAME_JSON = 0x80
+FRAME_STATE = 0x81
+FRAME_ATTACK = 0x82
+FRAME_RESPAWN = 0x83
+FRAME_SNAPSHOT = 0x84
+# Set on frames relayed by the server; the payload starts with the 8-byte sender id.
+ID_FLAG = 0x10
+
+ID_LEN = 8
+MAX_FRAME_PAYLOAD = 0xFFFF
+
+# Receive side: bytes read per recv, and the longest line or frame a
+# FrameDecoder accepts by default. Clients only ever send small messages;
+# the client raises the limit for large server messages.
+RECV_SIZE = 4096
+MAX_FRAME = 64 * 1024
+
+_HEADER = struct.Struct("<BH")
+_STATE = struct.Struct("<ffh")
+_ATTACK = struct.Struct("<ffb")
+_RESPAWN = struct.Struct("<ff")
+_SNAP_HEAD = struct.Struct("<IIH")
+_SNAP_ROW = struct.Struct("<8sffhB")
+_COUNT = struct.Struct("<H")
+_SNAPSHOT_KEYS = {"type", "seq", "base", "ents", "gone"}
+
+_STRUCTS = {
+    FRAME_STATE: ("state", _STATE),
+    FRAME_ATTACK: ("attack", _ATTACK),
+    FRAME_RESPAWN: ("respawn", _RESPAWN),
+}
+
+
+def _clamp_i16(v):
+    return max(-32768, min(32767, int(v)))
+
+
+def _clamp_i8(v):
+    return max(-128, min(127, int(v)))
+
+
+class JsonCodec:
+    name = "json"
+
+    def encode(self, obj):
+        return (json.dumps(obj, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class BinaryCodec:
+    name = "bin1"
+
+    def encode(self, obj):
+        try:
+            frame = self._encode_struct(obj)
+        except (KeyError, TypeError, ValueError, OverflowError, struct.error):
+            frame = None
+        if frame is not None:
+            return frame
+        payload = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+        if len(payload) > MAX_FRAME_PAYLOAD:
+            # Too big for one frame; a JSON line is always understood.
+            return payload + b"\n"
+        return _HEADER.pack(FRAME_JSON, len(payload)) + payload
+
+    def _encode_struct(self, obj):
+        mtype = obj.get("type")
+        if mtype == "snapshot":
+            return self._encode_snapshot(obj)
+        if mtype == "state":
+            code = FRAME_STATE
+            body = _STATE.pack(float(obj["x"]), float(obj["y"]), _clamp_i16(obj["hp"]))
+        elif mtype == "attack":
+            code = FRAME_ATTACK
+            body = _ATTACK.pack(float(obj["x"]), float(obj["y"]), _clamp_i8(obj["dir"]))
+        elif mtype == "respawn":
+            code = FRAME_RESPAWN
+            body = _RESPAWN.pack(float(obj["x"]), float(obj["y"]))
+        else:
+            return None
+        sender = obj.get("id")
+        if sender is not None:
+            sender = str(sender).encode("ascii")
+            if len(sender) != ID_LEN:
+                return None
+            code |= ID_FLAG
+            body = sender + body
+        return _HEADER.pack(code, len(body)) + body
+
+    def _encode_snapshot(self, obj):
+        # Only plain relay snapshots; authoritative ones carry more fields.
+        if not _SNAPSHOT_KEYS.issuperset(obj):
+            return None
+        ents = obj["ents"]
+        gone = obj.get("gone", ())
+        parts = [_SNAP_HEAD.pack(obj["seq"], obj["base"], len(ents))]
+        for row in ents:
+            if len(row) != 5:
+                return None
+            eid, x, y, hp, alive = row
+            eid = eid.encode("ascii")
+            if len(eid) != ID_LEN:
+                return None
+            parts.append(_SNAP_ROW.pack(eid, x, y, _clamp_i16(hp), 1 if alive else 0))
+        parts.append(_COUNT.pack(len(gone)))
+        for eid in gone:
+            eid = eid.encode("ascii")
+            if len(eid) != ID_LEN:
+                return None
+            parts.append(eid)
+        body = b"".join(parts)
+        if len(body) > MAX_FRAME_PAYLOAD:
+            return None
+        return _HEADER.pack(FRAME_SNAPSHOT, len(body)) + body
+
+
+def _decode_snapshot(payload):
+    try:
+        seq, base, count = _SNAP_HEAD.unpack_from(payload, 0)
+        pos = _SNAP_HEAD.size
+        ents = []
+        for _ in range(count):
+            eid, x, y, hp, alive = _SNAP_ROW.unpack_from(payload, pos)
+            pos += _SNAP_ROW.size
+            ents.append([eid.decode("ascii", "replace"), round(x, 2), round(y, 2), hp, alive])
+        (count,) = _COUNT.unpack_from(payload, pos)
+        pos += _COUNT.size
+        gone = [payload[pos + i * ID_LEN:pos + (i + 1) * ID_LEN].decode("ascii", "replace") for i in range(count)]
+    except struct.error:
+        return None
+    msg = {"type": "snapshot", "seq": seq, "base": base, "ents": ents}
+    if gone:
+        msg["gone"] = gone
+    return msg
+
+
+JSON = JsonCodec()
+BINARY = BinaryCodec()
+
+CODECS = {JSON.name: JSON, BINARY.name: BINARY}
+
+
+def get_codec(name):
+    return CODECS.get(name, JSON)
+
+
+def choose_codec(offered):
+    """Pick the first codec from a client's `codecs` list that we speak."""
+    if isinstance(offered, (list, tuple)):
+        for name in offered:
+            if name in CODECS:
+                return CODECS[name]
+    return JSON
+
+
+def decode_binary(code, payload):
+    if code == FRAME_JSON:
+        try:
+            msg = json.loads(payload.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return None
+        return msg if isinstance(msg, dict) else None
+    if code == FRAME_SNAPSHOT:
+        return _decode_snapshot(payload)
+    sender = None
+    if code & ID_FLAG:
+        sender = payload[:ID_LEN].decode("ascii", "replace")
+        payload = payload[ID_LEN:]
+        code &= ~ID_FLAG
+    entry = _STRUCTS.get(code)
+    if entry is None:
+        return None
+    mtype, fmt = entry
+    try:
+        values = fmt.unpack(payload)
+    except struct.error:
+        return None
+    if mtype == "state":
+        msg = {"type": "state", "x": values[0], "y": values[1], "hp": values[2]}
+    elif mtype == "attack":
+        msg = {"type": "attack", "x": values[0], "y": values[1], "dir": values[2]}
+    else:
+        msg = {"type": "respawn", "x": values[0], "y": values[1]}
+    if sender is not None:
+        msg["id"] = sender
+    return msg
+
+
+# Relayable JSON lines as our encoders write them; anything else is parsed.
+_RAW_JSON_PREFIXES = {
+    b"stat": (b'{"type":"state",', "state"),
+    b"atta": (b'{"type":"attack",', "attack"),
+    b"resp": (b'{"type":"respawn",', "respawn"),
+}
+_RAW_BINARY_CODES = {FRAME_STATE: "state", FRAME_ATTACK: "attack", FRAME_RESPAWN: "respawn"}
+
+
+def json_id_prefix(client_id):
+    """Bytes that open a JSON object with the sender id, for RawFrame.relay_bytes."""
+    return b'{"id":' + json.dumps(client_id).encode("utf-8") + b","
+
+
+class RawFrame:
+    """A relayable message kept as the bytes it arrived in.
+
+    The server forwards state/attack/respawn without a parse/serialize
+    round trip: for recipients on the sender's codec the sender id is
+    spliced into the original bytes, and only recipients on another codec
+    pay for a decode and re-encode.
+    """
+
+    __slots__ = ("mtype", "codec", "code", "body")
+
+    def __init__(self, mtype, codec, code, body):
+        self.mtype = mtype
+        self.codec = codec
+        self.code = code
+        self.body = body
+
+    def decode(self):
+        if self.codec is JSON:
+            try:
+                msg = json.loads(self.body.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                return None
+            return msg if isinstance(msg, dict) else None
+        return decode_binary(self.code, self.body)
+
+    def relay_bytes(self, codec, client_id, id_prefix):
+        """Encode for a `codec` recipient with `client_id` as the sender.
+
+        `id_prefix` is json_id_prefix(client_id), built once per client.
+        Like the parsing path, an id the sender already put in a JSON
+        message is kept (the later duplicate key wins).
+        """
+        if codec is self.codec:
+            if codec is JSON:
+                return id_prefix + self.body[1:] + b"\n"
+            sender = client_id.encode("ascii")
+            if len(sender) == ID_LEN:
+                return _HEADER.pack(self.code | ID_FLAG, len(self.body) + ID_LEN) + sender + self.body
+        msg = self.decode()
+        if msg is None:
+            return None
+        msg.setdefault("id", client_id)
+        return codec.encode(msg)
+
+
+class FrameTooLarge(ValueError):
+    """A peer sent a frame, or an unterminated line, over the decoder's limit."""
+
+
+class FrameDecoder:
+    """Splits a byte stream of JSON lines and/or bin1 frames into messages.
+
+    Received bytes go into one growable bytearray with a read offset, and
+    lines are found with `find`, so a burst of small messages costs one
+    pass over the data rather than a copy of the remaining buffer per line.
+    Consumed space is reclaimed only when more room is needed.
+
+    With `raw=True` (the server) state/attack/respawn come back as RawFrame
+    objects instead of dicts so they can be relayed without parsing.
+    A line or frame longer than `max_frame` raises FrameTooLarge, so a peer
+    that never sends a newline cannot grow the buffer without limit.
+    """
+
+    def __init__(self, raw=False, max_frame=MAX_FRAME):
+        self.raw = raw
+        self.max_frame = max_frame
+        self._buf = bytearray()
+        self._start = 0
+        self._end = 0
+
+    @property
+    def pending(self):
+        """Bytes received but not yet decoded (an incomplete line or frame)."""
+        return self._end - self._start
+
+    def feed(self, data):
+        self.append(data)
+        return self.decode()
+
+    def recv_into(self, sock, size=RECV_SIZE):
+        """Read once from `sock` straight into the buffer and decode.
+
+        Returns the decoded messages, or None once the peer has closed.
+        """
+        if not self.fill(sock, size):
+            return None
+        return self.decode()
+
+    def append(self, data):
+        size = len(data)
+        self._reserve(size)
+        self._buf[self._end:self._end + size] = data
+        self._end += size
+
+    def fill(self, sock, size=RECV_SIZE):
+        """One recv_into from `sock` without decoding; returns the byte count (0 at EOF)."""
+        self._reserve(size)
+        view = memoryview(self._buf)[self._end:self._end + size]
+        try:
+            received = sock.recv_into(view)
+        finally:
+            view.release()
+        self._end += received
+        return received
+
+    def _reserve(self, size):
+        if self._end + size <= len(self._buf):
+            return
+        pending = self._end - self._start
+        if self._start:
+            self._buf[:pending] = self._buf[self._start:self._end]
+            self._start = 0
+            self._end = pending
+        if pending + size > len(self._buf):
+            self._buf.extend(bytes(max(pending + size, 2 * len(self._buf)) - len(self._buf)))
+
+    def _too_large(self, size):
+        return FrameTooLarge(f"{size} byte frame exceeds the {self.max_frame} byte limit")
+
+    def decode(self):
+        """Decode every complete message buffered so far."""
+        buf = self._buf
+        pos = self._start
+        end = self._end
+        out = []
+        with memoryview(buf) as view:
+            while pos < end:
+                code = buf[pos]
+                if code >= FRAME_JSON:
+                    if end - pos < _HEADER.size:
+                        break
+                    _, length = _HEADER.unpack_from(buf, pos)
+                    if length > self.max_frame:
+                        raise self._too_large(length)
+                    stop = pos + _HEADER.size + length
+                    if stop > end:
+                        break
+                    body = bytes(view[pos + _HEADER.size:stop])
+                    pos = stop
+                    if self.raw and code in _RAW_BINARY_CODES:
+                        msg = RawFrame(_RAW_BINARY_CODES[code], BINARY, code, body)
+                    else:
+                        msg = decode_binary(code, body)
+                else:
+                    nl = buf.find(b"\n", pos, end)
+                    if nl < 0:
+                        if end - pos > self.max_frame:
+                            raise self._too_large(end - pos)
+                        break
+                    if nl - pos > self.max_frame:
+                        raise self._too_large(nl - pos)
+                    line = bytes(view[pos:nl])
+                    pos = nl + 1
+                    if self.raw:
+                        entry = _RAW_JSON_PREFIXES.get(line[9:13])
+                        if entry is not None and line.startswith(entry[0]):
+                            out.append(RawFrame(entry[1], JSON, 0, line))
+                            continue
+                    if not line.strip():
+                        continue
+                    try:
+                        msg = json.loads(line.decode("utf-8"))
+                    except (UnicodeDecodeError, json.JSONDecodeError):
+                        continue
+                    if not isinstance(msg, dict):
+                        continue
+                if msg is not None:
+                    out.append(msg)
+        if pos == end:
+            self._start = self._end = 0
+        else:
+            self._start = pos
+        return out
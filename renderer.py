@@ -1,5 +1,7 @@
 import curses
-from utils import POWERUP_TYPES, setup_colors
+from particles import ParticleSystem
+from projectiles import ProjectileStore
+from utils import POWERUP_TYPES, curses_color, setup_colors
 
 class Renderer:
     def __init__(self, stdscr):
@@ -21,12 +23,21 @@ class Renderer:
             sy = int(round(power_up.y))
             if 0 <= sy < self.max_y and 0 <= sx < self.max_x:
                 try:
-                    emoji = POWERUP_TYPES[power_up.power_type]['emoji']
-                    self.stdscr.addstr(int(sy), int(sx), emoji)
+                    kind = POWERUP_TYPES[power_up.power_type]
+                    # setup_colors made pair n draw color n.
+                    pair = curses.color_pair(curses_color(kind['color']))
+                    self.stdscr.addstr(int(sy), int(sx), kind['emoji'], pair)
                 except curses.error:
                     pass
                     
     def draw_particles(self, particles):
+        if isinstance(particles, ParticleSystem):
+            for sy, sx, ch in particles.cells(self.max_x, self.max_y):
+                try:
+                    self.stdscr.addstr(sy, sx, ch)
+                except curses.error:
+                    pass
+            return
         for particle in particles:
             sx = int(round(particle.x))
             sy = int(round(particle.y))
@@ -37,6 +48,13 @@ class Renderer:
                     pass
                     
     def draw_projectiles(self, projectiles):
+        if isinstance(projectiles, ProjectileStore):
+            for sy, sx, ch in projectiles.cells(self.max_x, self.max_y):
+                try:
+                    self.stdscr.addstr(sy, sx, ch)
+                except curses.error:
+                    pass
+            return
         for p in projectiles:
             for trail_x, trail_y in p.trail_positions:
                 sx = int(round(trail_x))
@@ -55,13 +73,13 @@ class Renderer:
                 except curses.error:
                     pass
                     
-    def draw_entities(self, entities):
+    def draw_entities(self, entities, alpha=1.0):
         for e in entities:
             if not e.is_alive:
                 continue
                 
-            sx = int(round(e.x))
-            sy = int(round(e.y))
+            sx = int(round(e.prev_x + (e.x - e.prev_x) * alpha))
+            sy = int(round(e.prev_y + (e.y - e.prev_y) * alpha))
             if 0 <= sy < self.max_y and 0 <= sx < self.max_x:
                 cell = e.ch
                 
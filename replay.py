@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Replay a recorded match or server room tick for tick, as fast as possible.
+
+Logs come from `main.py --record PATH` (a singleplayer game) and from
+`server.py --authoritative --record DIR` (one file per simulated room).
+The replay rebuilds the simulation from the logged seed, feeds it the
+logged inputs and checks that it ends in the logged state. Every tick is
+timed, so the slowest ones can be found and profiled on their own:
+
+    python replay.py game.log.gz
+    python replay.py lobby-20261018-120000.log.gz --slowest 20
+    python replay.py game.log.gz --profile slow.prof --window 5400 5460
+"""
+
+import argparse
+import cProfile
+import pstats
+import time
+
+from headless import Match
+from input_log import read_log
+from room_sim import RoomSimulation
+
+
+class MatchReplay:
+    """Replays a headless.Match log: ["k", key codes] sets the held keys."""
+
+    def __init__(self, header):
+        config = {k: v for k, v in header.items() if k != "kind"}
+        self.sim = Match(**config)
+        self.keys = {}
+
+    def apply(self, event):
+        if event[0] == "k":
+            self.keys = {code: True for code in event[1]}
+
+    def step(self, dt):
+        self.sim.step(self.keys)
+
+    def digest(self):
+        return self.sim.digest()
+
+
+class RoomReplay:
+    """Replays a room_sim.RoomSimulation log of joins, inputs and leaves."""
+
+    def __init__(self, header):
+        self.sim = RoomSimulation(header["room"], header["width"], header["height"], seed=header["seed"])
+
+    def apply(self, event):
+        kind = event[0]
+        if kind == "join":
+            self.sim.add_player(*event[1:])
+        elif kind == "input":
+            self.sim.set_input(*event[1:])
+        elif kind == "leave":
+            self.sim.remove_player(event[1])
+
+    def step(self, dt):
+        self.sim.step(dt)
+
+    def digest(self):
+        return self.sim.digest()
+
+
+REPLAYS = {"match": MatchReplay, "room": RoomReplay}
+
+
+def replay(path, window=None, profiler=None):
+    """Re-run the log at `path`.
+
+    Returns (tick times, simulated seconds, recorded digest or None,
+    replayed digest). A `profiler` runs only for ticks in `window`.
+    """
+    header, events = read_log(path)
+    if header is None:
+        raise ValueError(f"{path}: not an input log")
+    session = REPLAYS[header["kind"]](header)
+    times = []
+    sim_time = 0.0
+    recorded = None
+    perf_counter = time.perf_counter
+    for event in events:
+        if event[0] == "t":
+            _, count, dt = event
+            sim_time += count * dt
+            for _ in range(count):
+                tick = len(times)
+                profiling = profiler is not None and window[0] <= tick < window[1]
+                if profiling:
+                    profiler.enable()
+                t0 = perf_counter()
+                session.step(dt)
+                times.append(perf_counter() - t0)
+                if profiling:
+                    profiler.disable()
+        elif event[0] == "end":
+            recorded = event[1]
+        else:
+            session.apply(event)
+    return times, sim_time, recorded, session.digest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="log written by main.py --record or server.py --record")
+    parser.add_argument("--slowest", type=int, default=10, metavar="N", help="list the N slowest ticks")
+    parser.add_argument("--profile", metavar="OUT", help="cProfile the --window ticks and save the stats to OUT")
+    parser.add_argument("--window", type=int, nargs=2, metavar=("START", "END"),
+                        help="ticks START (inclusive) to END (exclusive) to profile (default: all)")
+    args = parser.parse_args()
+
+    profiler = cProfile.Profile() if args.profile else None
+    window = args.window or (0, float("inf"))
+    times, sim_time, recorded, replayed = replay(args.log, window, profiler)
+
+    total = sum(times)
+    ticks = len(times)
+    if ticks:
+        print(f"{ticks} ticks ({sim_time:.1f} s of play) in {total:.3f} s: "
+              f"{ticks / total:.0f} ticks/s, {sim_time / total:.0f}x real time")
+        mean = total / ticks
+        print(f"tick: mean {mean * 1000:.3f} ms, max {max(times) * 1000:.3f} ms")
+        print(f"slowest {min(args.slowest, ticks)} ticks:")
+        for tick in sorted(range(ticks), key=times.__getitem__, reverse=True)[:args.slowest]:
+            print(f"  tick {tick:>7}  {times[tick] * 1000:.3f} ms")
+    if recorded is None:
+        print(f"final state {replayed} (log has no end digest; recording was cut short)")
+    elif recorded == replayed:
+        print(f"final state {replayed} matches the recording")
+    else:
+        print(f"final state {replayed} DIFFERS from the recording ({recorded})")
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+        print(f"profile saved to {args.profile}")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+    if recorded is not None and recorded != replayed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
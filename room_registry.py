@@ -0,0 +1,91 @@
+import threading
+
+# Rooms are spread over this many shards by hash of the room id, so creating
+# or removing a room only locks the rooms that share its shard.
+SHARDS = 16
+
+
+class Room:
+    """One room's lobby state.
+
+    `lock` guards `names`, `game_state` and `countdown`. `members` is an
+    immutable tuple that is replaced on every join and leave, so broadcasts
+    read it without taking any lock.
+    """
+
+    def __init__(self, room_id, lock):
+        self.room_id = room_id
+        self.lock = lock
+        self.members = ()
+        # {member: {"id": str, "name": str, "ch": str, "ready": bool, "character": str?}}
+        self.names = {}
+        self.game_state = "lobby"
+        self.countdown = 0.0
+        # Traffic totals for metrics; bumped without the lock.
+        self.msgs_in = 0
+        self.bytes_in = 0
+        self.msgs_out = 0
+        self.bytes_out = 0
+        # Congestion last announced to the room, and its members' dropped
+        # state frames as of then (server.signal_congestion).
+        self.congested = False
+        self.dropped_seen = 0
+
+
+class RoomRegistry:
+    """Rooms by id, with a lock per shard for creation/removal and one per room.
+
+    Locks are always taken shard first, then room. Lookups and member
+    reads take no lock at all.
+    """
+
+    def __init__(self, shards=SHARDS, lock_factory=threading.Lock):
+        self._lock_factory = lock_factory
+        self._shards = [(lock_factory(), {}) for _ in range(shards)]
+
+    def _shard(self, room_id):
+        return self._shards[hash(room_id) % len(self._shards)]
+
+    def get(self, room_id):
+        return self._shard(room_id)[1].get(room_id)
+
+    def members(self, room_id):
+        room = self.get(room_id)
+        return room.members if room is not None else ()
+
+    def add_member(self, room_id, member, info):
+        """Add `member` to a room, creating it; returns (room, the other players' info)."""
+        lock, rooms = self._shard(room_id)
+        with lock:
+            room = rooms.get(room_id)
+            if room is None:
+                room = rooms[room_id] = Room(room_id, self._lock_factory())
+            with room.lock:
+                room.members += (member,)
+                room.names[member] = info
+                existing = [v for m, v in room.names.items() if m is not member]
+        return room, existing
+
+    def remove_member(self, room_id, member):
+        """Remove `member`, dropping the room once it is empty; returns its info or None."""
+        lock, rooms = self._shard(room_id)
+        with lock:
+            room = rooms.get(room_id)
+            if room is None:
+                return None
+            with room.lock:
+                room.members = tuple(m for m in room.members if m is not member)
+                info = room.names.pop(member, None)
+                if not room.members:
+                    del rooms[room_id]
+        return info
+
+    def all_rooms(self):
+        rooms = []
+        for lock, shard in self._shards:
+            with lock:
+                rooms.extend(shard.values())
+        return rooms
+
+    def __len__(self):
+        return sum(len(shard) for _, shard in self._shards)
@@ -0,0 +1,324 @@
+import collections
+import math
+import os
+import random
+import re
+import threading
+import time
+
+from game_logic import GameLogic
+from input_log import InputLog, digest
+from models import Entity, particle_pool
+from projectiles import make_projectiles, positions
+from snapshot import SnapshotHistory
+
+TICK_RATE = 30
+TICK_DT = 1.0 / TICK_RATE
+# Broadcast a snapshot every N ticks (15 Hz at the default tick rate).
+SNAPSHOT_EVERY = 2
+
+# Fixed arena every client of an authoritative room plays in.
+ARENA_WIDTH = 80
+ARENA_HEIGHT = 24
+
+# Keys a client may report in an `input` message.
+INPUT_KEYS = "adwsf"
+# Inputs queued per player. A client that sends one input per frame has
+# each applied to exactly one tick, so it can replay the ones a snapshot
+# has not covered yet; beyond this backlog the oldest are dropped so a
+# burst of late inputs does not add lasting delay.
+INPUT_BACKLOG = 8
+
+# Field order of one row in a snapshot's "ents" list. Relay rooms only
+# send the first five; authoritative rooms send all of them.
+SNAPSHOT_FIELDS = ("id", "x", "y", "hp", "alive", "kills", "deaths", "seq")
+# Relay rooms publish every third tick (10 Hz, the clients' state rate).
+RELAY_SNAPSHOT_EVERY = 3
+# Largest |x|, |y| or |hp| a relay room accepts from a client's `state`;
+# anything beyond it (or not finite) could not go out in a snapshot.
+STATE_LIMIT = 32767
+
+
+class RoomSimulation:
+    """Headless GameLogic instance for one playing room.
+
+    Clients only report which keys they hold; the simulation owns every
+    position, hit and kill and publishes the result as snapshots. With
+    `record_dir` the room logs its seed, joins, inputs, leaves and ticks
+    there for replay.py.
+    """
+
+    authoritative = True
+    snapshot_every = SNAPSHOT_EVERY
+
+    def __init__(self, room_id, max_x=ARENA_WIDTH, max_y=ARENA_HEIGHT, seed=None, record_dir=None):
+        self.room_id = room_id
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.history = SnapshotHistory()
+        self.max_x = max_x
+        self.max_y = max_y
+        self.ground_row = max_y - 6
+        self.logic = GameLogic(max_x, max_y, self.ground_row, rng=random.Random(self.seed))
+        self.lock = threading.Lock()
+        self.entities = {}
+        self.inputs = {}
+        self.input_seq = {}
+        self.input_queue = {}
+        # Input seq each player's entity was last stepped with; snapshots
+        # report it so clients know which of their inputs the position
+        # already includes.
+        self.applied_seq = {}
+        self.projectiles = make_projectiles()
+        self.particles = []
+        self.messages = []
+        self.combo_messages = []
+        self.tick = 0
+        self.tick_time_total = 0.0
+        self.tick_time_max = 0.0
+        self.recorder = None
+        if record_dir:
+            name = "%s-%s.log.gz" % (re.sub(r"[^\w.-]", "_", room_id), time.strftime("%Y%m%d-%H%M%S"))
+            header = {"kind": "room", "room": room_id, "seed": self.seed, "width": max_x, "height": max_y}
+            self.recorder = InputLog(os.path.join(record_dir, name), header)
+
+    def add_player(self, client_id, name, ch, character_id=None, index=0, total=1):
+        spacing = (self.max_x - 10) / max(1, total - 1)
+        x = 5 + index * spacing
+        with self.lock:
+            if self.recorder is not None:
+                self.recorder.event("join", client_id, name, ch, character_id, index, total)
+            e = Entity(x, self.ground_row - 0.5, ch, name=name, character_id=character_id)
+            self.entities[client_id] = e
+            self.inputs[client_id] = {}
+            self.input_seq[client_id] = 0
+            self.input_queue[client_id] = collections.deque(maxlen=INPUT_BACKLOG)
+            self.applied_seq[client_id] = 0
+
+    def remove_player(self, client_id):
+        with self.lock:
+            if self.recorder is not None and client_id in self.entities:
+                self.recorder.event("leave", client_id)
+            self.entities.pop(client_id, None)
+            self.inputs.pop(client_id, None)
+            self.input_seq.pop(client_id, None)
+            self.input_queue.pop(client_id, None)
+            self.applied_seq.pop(client_id, None)
+
+    def set_input(self, client_id, keys, seq):
+        """Queue the keys a client holds for its next tick; older sequence numbers are ignored."""
+        with self.lock:
+            if client_id not in self.entities or seq <= self.input_seq[client_id]:
+                return
+            if self.recorder is not None:
+                self.recorder.event("input", client_id, keys, seq)
+            self.input_queue[client_id].append(({ord(k): True for k in keys if k in INPUT_KEYS}, seq))
+            self.input_seq[client_id] = seq
+
+    def step(self, dt=TICK_DT):
+        """Advance one tick; returns the combat messages produced by it."""
+        with self.lock:
+            t0 = time.perf_counter()
+            if self.recorder is not None:
+                self.recorder.step(dt)
+            entities = list(self.entities.values())
+            logic = self.logic
+            for client_id, e in self.entities.items():
+                queued = self.input_queue[client_id]
+                if queued:
+                    # Without a new input the player keeps holding the last keys.
+                    self.inputs[client_id], self.applied_seq[client_id] = queued.popleft()
+                logic.handle_player_input(e, self.inputs[client_id], self.projectiles, self.combo_messages)
+            logic.update_entities(entities, dt)
+            logic.handle_entity_collisions(entities)
+            logic.handle_projectile_collisions(self.projectiles, entities, self.particles, self.messages)
+            logic.update_projectiles(self.projectiles, dt)
+            events = self.messages
+            self.messages = []
+            # Particles and combo popups are cosmetic; clients derive their own.
+            particle_pool.release_all(self.particles)
+            self.particles.clear()
+            self.combo_messages.clear()
+            self.tick += 1
+            cost = time.perf_counter() - t0
+            self.tick_time_total += cost
+            if cost > self.tick_time_max:
+                self.tick_time_max = cost
+        return events
+
+    def digest(self):
+        return digest([(cid, e.x, e.y, e.vx, e.vy, e.hp, e.is_alive, e.kills, e.deaths)
+                       for cid, e in self.entities.items()])
+
+    def stop_recording(self):
+        with self.lock:
+            if self.recorder is not None:
+                self.recorder.close(self.digest())
+                self.recorder = None
+
+    def is_empty(self):
+        return not self.entities
+
+    def entity_states(self):
+        with self.lock:
+            return {
+                cid: (round(e.x, 2), round(e.y, 2), int(e.hp), int(e.is_alive), e.kills, e.deaths, self.applied_seq[cid])
+                for cid, e in self.entities.items()
+            }
+
+    def snapshot_extra(self, events=()):
+        with self.lock:
+            proj = [[round(x, 2), round(y, 2), ch] for x, y, ch in positions(self.projectiles)]
+        return {"proj": proj, "events": list(events)}
+
+    def stats(self):
+        ticks = max(1, self.tick)
+        return {
+            "players": len(self.entities),
+            "ticks": self.tick,
+            "avg_ms": self.tick_time_total / ticks * 1000.0,
+            "max_ms": self.tick_time_max * 1000.0,
+        }
+
+
+class RelayRoom:
+    """Playing room in relay mode with snapshot batching.
+
+    Clients still simulate themselves and own their positions, but instead
+    of relaying every `state` message to every peer, the server keeps the
+    latest state per player and publishes one room snapshot per tick.
+    """
+
+    authoritative = False
+    snapshot_every = RELAY_SNAPSHOT_EVERY
+
+    def __init__(self, room_id):
+        self.room_id = room_id
+        self.history = SnapshotHistory()
+        self.lock = threading.Lock()
+        self.players = set()
+        self.states = {}
+        self.tick = 0
+
+    def add_player(self, client_id, name, ch, character_id=None, index=0, total=1):
+        with self.lock:
+            self.players.add(client_id)
+
+    def remove_player(self, client_id):
+        with self.lock:
+            self.players.discard(client_id)
+            self.states.pop(client_id, None)
+
+    def set_state(self, client_id, x, y, hp):
+        """Keep a client's claimed state; ValueError if it is out of range."""
+        if not all(math.isfinite(v) and abs(v) <= STATE_LIMIT for v in (x, y, hp)):
+            raise ValueError(f"state out of range: {x!r}, {y!r}, {hp!r}")
+        with self.lock:
+            if client_id in self.players:
+                self.states[client_id] = (round(x, 2), round(y, 2), int(hp), int(hp > 0))
+
+    def step(self, dt=TICK_DT):
+        self.tick += 1
+        return []
+
+    def is_empty(self):
+        return not self.players
+
+    def entity_states(self):
+        with self.lock:
+            return dict(self.states)
+
+    def snapshot_extra(self, events=()):
+        return None
+
+    def stats(self):
+        return {"players": len(self.players), "ticks": self.tick, "avg_ms": 0.0, "max_ms": 0.0}
+
+
+class SimulationLoop:
+    """Fixed-rate tick driver shared by every playing room in the process.
+
+    One fixed-rate timer on the server's Scheduler steps all rooms at
+    `tick_rate`; every `snapshot_every` ticks of a room it calls
+    `publish(room, events)` with the combat events gathered since the last
+    snapshot. `room_factory(room_id)` builds the room object for a game
+    that is starting: RoomSimulation or RelayRoom.
+    """
+
+    def __init__(self, publish, room_factory=RoomSimulation, tick_rate=TICK_RATE, report_interval=0.0):
+        self.publish = publish
+        self.room_factory = room_factory
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.report_interval = report_interval
+        self.rooms = {}
+        self.pending_events = {}
+        self.lock = threading.Lock()
+        self._timer = None
+        self._report_timer = None
+
+    def add_room(self, sim):
+        with self.lock:
+            self.rooms[sim.room_id] = sim
+            self.pending_events[sim.room_id] = []
+
+    def remove_room(self, room_id):
+        with self.lock:
+            sim = self.rooms.pop(room_id, None)
+            self.pending_events.pop(room_id, None)
+        if sim is not None and sim.authoritative:
+            sim.stop_recording()
+
+    def get_room(self, room_id):
+        return self.rooms.get(room_id)
+
+    def tick_all(self):
+        with self.lock:
+            rooms = list(self.rooms.values())
+        for sim in rooms:
+            try:
+                self._tick_room(sim)
+            except Exception as e:
+                # The room's state is suspect and would most likely fail the
+                # same way every tick, so it leaves the loop; the other rooms
+                # keep their tick.
+                print(f"Room {sim.room_id} failed and stopped simulating: {e!r}")
+                self.remove_room(sim.room_id)
+
+    def _tick_room(self, sim):
+        events = sim.step(self.dt)
+        pending = self.pending_events.get(sim.room_id)
+        if pending is None:
+            return
+        pending.extend(events)
+        if sim.tick % sim.snapshot_every == 0:
+            self.publish(sim, pending)
+            pending.clear()
+
+    def stats(self):
+        with self.lock:
+            return {room_id: sim.stats() for room_id, sim in self.rooms.items()}
+
+    def report(self):
+        stats = self.stats()
+        lines = [f"sim: {len(stats)} rooms @ {self.tick_rate} Hz, {self.overruns} overruns"]
+        for room_id, s in sorted(stats.items()):
+            lines.append(f"  {room_id}: {s['players']} players, avg {s['avg_ms']:.3f} ms, max {s['max_ms']:.3f} ms")
+        return "\n".join(lines)
+
+    @property
+    def overruns(self):
+        """Ticks that ran so late the next one was already due."""
+        return self._timer.overruns if self._timer is not None else 0
+
+    def schedule(self, scheduler):
+        self._timer = scheduler.call_every(self.dt, self.tick_all)
+        if self.report_interval:
+            self._report_timer = scheduler.call_every(self.report_interval, self._print_report)
+
+    def _print_report(self):
+        print(self.report())
+
+    def stop(self):
+        for timer in (self._timer, self._report_timer):
+            if timer is not None:
+                timer.cancel()
@@ -0,0 +1,131 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+
+class Timer:
+    """Handle for a scheduled call; `cancel()` stops it from (ever again) running."""
+
+    __slots__ = ("when", "seq", "callback", "args", "interval", "overruns", "cancelled")
+
+    def __init__(self, when, seq, callback, args, interval=None):
+        self.when = when
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        # Fixed-rate timers: deadlines that had already passed when the previous run finished.
+        self.overruns = 0
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def __lt__(self, other):
+        return (self.when, self.seq) < (other.when, other.seq)
+
+
+class Scheduler:
+    """One timer heap for every timed server event.
+
+    Countdowns, idle-room reaping and simulation ticks are all timers on
+    the same heap, run by a single thread (`start`) or a single task on the
+    asyncio server (`run_async`), however many rooms there are. Timers may
+    be added from any thread. Callbacks run on the scheduler's thread and
+    should be short; an exception in one is printed and does not stop the
+    others.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._wakeup = self._cond.notify
+        self.running = False
+
+    def call_at(self, when, callback, *args):
+        return self._push(Timer(when, next(self._seq), callback, args))
+
+    def call_later(self, delay, callback, *args):
+        return self.call_at(self.clock() + delay, callback, *args)
+
+    def call_every(self, interval, callback, *args):
+        """Run `callback` every `interval` seconds on fixed deadlines.
+
+        A run that finishes after the next deadline does not queue up
+        catch-up runs; the timer restarts from now and counts an overrun.
+        """
+        return self._push(Timer(self.clock() + interval, next(self._seq), callback, args, interval))
+
+    def _push(self, timer):
+        with self._cond:
+            heapq.heappush(self._heap, timer)
+            if self._heap[0] is timer:
+                self._wakeup()
+        return timer
+
+    def __len__(self):
+        return len(self._heap)
+
+    def run_due(self):
+        """Run every timer whose deadline has passed; returns the next deadline or None."""
+        now = self.clock()
+        while True:
+            with self._cond:
+                while self._heap and self._heap[0].cancelled:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    return None
+                if self._heap[0].when > now:
+                    return self._heap[0].when
+                timer = heapq.heappop(self._heap)
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                print(f"Scheduled {getattr(timer.callback, '__name__', timer.callback)} failed: {e!r}")
+            if timer.interval is not None and not timer.cancelled:
+                timer.when += timer.interval
+                now = self.clock()
+                if timer.when <= now:
+                    timer.overruns += 1
+                    timer.when = now + timer.interval
+                self._push(timer)
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+        with self._cond:
+            self._wakeup()
+
+    def _run(self):
+        while self.running:
+            deadline = self.run_due()
+            with self._cond:
+                if not self.running:
+                    return
+                if self._heap and self._heap[0].when != deadline:
+                    continue
+                self._cond.wait(None if deadline is None else max(0.0, deadline - self.clock()))
+
+    async def run_async(self):
+        self.running = True
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        self._wakeup = lambda: loop.call_soon_threadsafe(wake.set)
+        try:
+            while self.running:
+                deadline = self.run_due()
+                timeout = None if deadline is None else max(0.0, deadline - self.clock())
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                wake.clear()
+        finally:
+            self._wakeup = self._cond.notify
@@ -0,0 +1,115 @@
+import collections
+import threading
+import time
+
+# Frames a client may have queued before backpressure kicks in.
+HIGH_WATER = 64
+# Hard cap; a client this far behind is disconnected immediately.
+MAX_FRAMES = 256
+# How long a client may stay above HIGH_WATER before it is disconnected.
+GRACE_SECONDS = 2.0
+
+
+class SendQueue:
+    """Bounded outbound queue for one client connection.
+
+    Producers (any thread broadcasting to the room) call `put`, and the
+    client's own writer drains with `get_batch` (blocking, threaded server)
+    or `pop_all` (asyncio server). A slow reader therefore only ever delays
+    itself.
+
+    Backpressure policy once the queue is above `high_water`:
+      1. the oldest droppable frame (a `state` update, superseded by the
+         next one anyway) is discarded to make room;
+      2. a client that stays at `high_water` for `grace` seconds, or
+         reaches `max_frames`, is reported as overflowing and the caller
+         disconnects it.
+    """
+
+    def __init__(self, high_water=HIGH_WATER, max_frames=MAX_FRAMES, grace=GRACE_SECONDS):
+        self.high_water = high_water
+        self.max_frames = max_frames
+        self.grace = grace
+        self._frames = collections.deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._over_since = None
+        self.closed = False
+        self.on_put = None
+        self.dropped = 0
+        self.peak = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+    @property
+    def depth(self):
+        return len(self._frames)
+
+    def put(self, data, droppable=False):
+        """Queue one encoded frame; returns False when the client must be dropped."""
+        with self._cond:
+            if self.closed:
+                return True
+            frames = self._frames
+            if len(frames) >= self.high_water:
+                if not self._drop_stale():
+                    if droppable:
+                        self.dropped += 1
+                        return self._check_overflow()
+            frames.append((data, droppable))
+            if len(frames) > self.peak:
+                self.peak = len(frames)
+            self._cond.notify()
+            ok = self._check_overflow()
+        if self.on_put is not None:
+            self.on_put()
+        return ok
+
+    def _drop_stale(self):
+        for i, (_, droppable) in enumerate(self._frames):
+            if droppable:
+                del self._frames[i]
+                self.dropped += 1
+                return True
+        return False
+
+    def _check_overflow(self):
+        depth = len(self._frames)
+        if depth >= self.max_frames:
+            return False
+        if depth < self.high_water:
+            self._over_since = None
+            return True
+        now = time.monotonic()
+        if self._over_since is None:
+            self._over_since = now
+        return now - self._over_since < self.grace
+
+    def get_batch(self, timeout=None):
+        """Block until frames are queued and return them all; None once closed."""
+        with self._cond:
+            while not self._frames and not self.closed:
+                if not self._cond.wait(timeout):
+                    return []
+            return self._take()
+
+    def pop_all(self):
+        """Non-blocking variant of `get_batch` for event-loop writers."""
+        with self._cond:
+            return self._take()
+
+    def _take(self):
+        if self.closed and not self._frames:
+            return None
+        batch = [data for data, _ in self._frames]
+        self._frames.clear()
+        if self._over_since is not None:
+            self._over_since = None
+        return batch
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        if self.on_put is not None:
+            self.on_put()
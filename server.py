@@ -1,91 +1,236 @@
+import functools
+import os
 import socket
 import socketserver
 import threading
-import json
 import uuid
 import time
+import zlib
 
-rooms_lock = threading.Lock()
-rooms = {}
-# rooms: {room_id: {"clients": set(ClientHandler), "names": {handler: {"id": str, "name": str, "ch": str, "ready": bool}}, "game_state": str, "countdown": float}}
+import protocol
+from latency import LinkStats
+from metrics import Metrics, Reporter, serve_admin, summary_line
+from room_registry import RoomRegistry
+from scheduler import Scheduler
+from send_queue import HIGH_WATER, SendQueue
 
-class ClientHandler(socketserver.BaseRequestHandler):
-    def setup(self):
-        self.buffer = b""
+# Every room on this server; each room has its own lock (see room_registry).
+rooms = RoomRegistry()
+
+COUNTDOWN_SECONDS = 5.0
+# Rooms where no member has sent a lobby or game message for this long get
+# their clients disconnected (--idle-timeout); checked every REAP_INTERVAL
+# seconds. Clients send KEEPALIVE_TYPES on their own, so those do not count.
+IDLE_TIMEOUT = 600.0
+REAP_INTERVAL = 10.0
+KEEPALIVE_TYPES = frozenset(("ping", "pong", "ack"))
+# Every CONGESTION_INTERVAL seconds each room is told whether its clients'
+# send queues are backing up (state frames dropped, or a queue at least
+# CONGESTION_DEPTH deep), so senders can slow their state updates.
+CONGESTION_INTERVAL = 1.0
+CONGESTION_DEPTH = HIGH_WATER // 2
+
+# Countdowns, idle-room reaping and simulation ticks all run off this one
+# timer heap: a single thread, or a single task on the asyncio server.
+scheduler = Scheduler()
+
+# Traffic counters and timing samples; see --stats-interval and --admin-port.
+metrics = Metrics()
+
+# room_sim.SimulationLoop when running with --authoritative or --snapshots, else None.
+simulation = None
+
+# (index, count) when this process is one of the --workers processes, else None.
+worker_slot = None
+
+
+def join_room_id(msg):
+    return str(msg.get("room") or "lobby")
+
+
+def room_worker(room_id, workers):
+    """Index of the worker process that owns `room_id`; the same in every process."""
+    return zlib.crc32(room_id.encode("utf-8")) % workers
+
+
+class RoomMember:
+    """Room protocol shared by the threaded and the asyncio server.
+
+    Outgoing frames go through a per-client `SendQueue` that the subclass
+    drains with its own writer. Subclasses provide the transport:
+    `_close_transport` tears down a client that fell too far behind or
+    went idle, and the read loop refreshes `last_seen` on every lobby or
+    game message it decodes.
+    """
+
+    def _init_member(self):
         self.room_id = None
         self.client_id = None
         self.name = None
         self.ch = None
         self.ready = False
+        self.codec = protocol.JSON
+        self.outbox = SendQueue()
+        # Newest room snapshot this client acknowledged; 0 means it needs a keyframe.
+        self.snap_ack = 0
+        self.last_seen = time.monotonic()
+        # room_registry.Room while in a room, for its traffic counters.
+        self.room = None
+        # Round trip and clock offset, from the pings the client sends.
+        self.link = LinkStats()
 
-    def handle(self):
-        try:
-            for msg in self._iter_messages():
-                self._handle_message(msg)
-        except ConnectionError:
-            pass
-        finally:
-            self._leave_room()
+    def _send_data(self, data, droppable=False):
+        if not self.outbox.put(data, droppable):
+            self._drop_slow_client()
 
-    def _iter_messages(self):
-        while True:
-            data = self.request.recv(4096)
-            if not data:
-                raise ConnectionError
-            self.buffer += data
-            while b"\n" in self.buffer:
-                line, self.buffer = self.buffer.split(b"\n", 1)
-                if not line:
-                    continue
-                try:
-                    msg = json.loads(line.decode("utf-8"))
-                    yield msg
-                except json.JSONDecodeError:
-                    continue
+    def _drop_slow_client(self):
+        if self.outbox.closed:
+            return
+        print(f"Disconnecting slow client {self.client_id} in room {self.room_id}: "
+              f"{self.outbox.depth} frames queued, {self.outbox.dropped} state frames dropped")
+        self._disconnect()
+
+    def _disconnect(self):
+        self.outbox.close()
+        self._close_transport()
+
+    def _close_transport(self):
+        raise NotImplementedError
+
+    def _decode_received(self, nbytes):
+        """Decode what the transport just added to `self.decoder`, counting it."""
+        if metrics.sample():
+            start = time.perf_counter()
+            messages = self.decoder.decode()
+            metrics.decode.add(time.perf_counter() - start)
+        else:
+            messages = self.decoder.decode()
+        for msg in messages:
+            if msg.__class__ is protocol.RawFrame or msg.get("type") not in KEEPALIVE_TYPES:
+                self.last_seen = time.monotonic()
+                break
+        room = self.room
+        if room is not None:
+            room.msgs_in += len(messages)
+            room.bytes_in += nbytes
+        return messages
+
+    def _count_sent(self, frames, nbytes):
+        """Called by the writer once per batch it hands to the transport."""
+        room = self.room
+        if room is not None:
+            room.msgs_out += frames
+            room.bytes_out += nbytes
 
     def _handle_message(self, msg):
+        if msg.__class__ is protocol.RawFrame:
+            self._handle_raw(msg)
+            return
         mtype = msg.get("type")
         if mtype == "join":
-            room = str(msg.get("room") or "lobby")
+            room = join_room_id(msg)
+            if worker_slot is not None and room_worker(room, worker_slot[1]) != worker_slot[0]:
+                # The gateway routed this connection by its first join; reconnect to switch rooms.
+                self._send({"type": "error", "reason": "room is served by another worker, reconnect to join it"})
+                return
             name = str(msg.get("name") or "anonymous")
             ch = str(msg.get("ch") or "🙂")
-            self._join_room(room, name, ch)
+            character = msg.get("character")
+            codec = protocol.choose_codec(msg.get("codecs"))
+            self._join_room(room, name, ch, str(character) if character else None, codec)
         elif mtype == "ready":
             self.ready = bool(msg.get("ready", False))
             # Update the ready state in the room
-            with rooms_lock:
-                room = rooms.get(self.room_id)
-                if room and self in room["names"]:
-                    room["names"][self]["ready"] = self.ready
+            room = rooms.get(self.room_id)
+            if room:
+                with room.lock:
+                    if self in room.names:
+                        room.names[self]["ready"] = self.ready
             self._broadcast_lobby_state()
             self._check_game_start()
-        elif mtype in ("state", "attack", "respawn", "leave"):
+        elif mtype == "input":
+            sim = simulation.get_room(self.room_id) if simulation else None
+            if sim is not None and sim.authoritative:
+                try:
+                    sim.set_input(self.client_id, str(msg.get("keys") or ""), int(msg.get("seq", 0)))
+                except (TypeError, ValueError):
+                    pass
+        elif mtype == "ack":
+            try:
+                self.snap_ack = max(self.snap_ack, int(msg.get("seq", 0)))
+            except (TypeError, ValueError):
+                pass
+        elif mtype in ("state", "attack", "respawn"):
+            sim = simulation.get_room(self.room_id) if simulation else None
+            if sim is None:
+                self._relay_to_room(msg)
+            elif sim.authoritative:
+                # The server owns positions and hits; client claims are ignored.
+                pass
+            elif mtype == "state":
+                try:
+                    sim.set_state(self.client_id, float(msg["x"]), float(msg["y"]), float(msg["hp"]))
+                except (KeyError, TypeError, ValueError, OverflowError):
+                    pass
+            else:
+                self._relay_to_room(msg)
+        elif mtype == "ping":
+            self._handle_ping(msg)
+        elif mtype == "leave":
             self._relay_to_room(msg)
         else:
             pass
 
-    def _send(self, obj):
+    def _handle_ping(self, msg):
+        """Answer a ping; if it echoes our previous pong, that is a round-trip sample for us too."""
+        now = time.monotonic()
         try:
-            data = (json.dumps(obj, separators=(",", ":")) + "\n").encode("utf-8")
-            self.request.sendall(data)
-        except OSError:
-            pass
+            sent = float(msg["t"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self._send({"type": "pong", "t": sent, "st": now})
+        if "echo" not in msg:
+            return
+        try:
+            rtt = now - float(msg["echo"]) - float(msg.get("held", 0.0))
+        except (TypeError, ValueError):
+            return
+        self.link.add(rtt, sent - (now - rtt / 2))
+        metrics.rtt.add(rtt)
+
+    def _handle_raw(self, frame):
+        """Hot path for state/attack/respawn kept as raw bytes by the decoder."""
+        if not self.room_id:
+            return
+        sim = simulation.get_room(self.room_id) if simulation else None
+        if sim is None or (not sim.authoritative and frame.mtype != "state"):
+            broadcast_raw(self.room_id, frame, self)
+        elif not sim.authoritative:
+            msg = frame.decode()
+            if msg is not None:
+                self._handle_message(msg)
+
+    def _send(self, obj):
+        self._send_data(self.codec.encode(obj))
 
-    def _join_room(self, room_id, name, ch):
+    def _join_room(self, room_id, name, ch, character=None, codec=protocol.JSON):
         if self.room_id:
             self._leave_room()
         self.room_id = room_id
+        self.snap_ack = 0
         self.client_id = uuid.uuid4().hex[:8]
+        self.id_prefix = protocol.json_id_prefix(self.client_id)
         self.name = name
         self.ch = ch
         self.ready = False
-        with rooms_lock:
-            room = rooms.setdefault(room_id, {"clients": set(), "names": {}, "game_state": "lobby", "countdown": 0.0})
-            room["clients"].add(self)
-            room["names"][self] = {"id": self.client_id, "name": name, "ch": ch, "ready": False}
-            # Send existing players to this client
-            existing = [v for h, v in room["names"].items() if h is not self]
-        self._send({"type": "welcome", "id": self.client_id, "room": room_id, "players": existing})
+        info = {"id": self.client_id, "name": name, "ch": ch, "ready": False}
+        if character:
+            info["character"] = character
+        # Send existing players to this client
+        self.room, existing = rooms.add_member(room_id, self, info)
+        self._send({"type": "welcome", "id": self.client_id, "room": room_id, "players": existing, "codec": codec.name})
+        # Both decoders accept either format, so switching right after the welcome is safe.
+        self.codec = codec
         # Notify others about this join
         self._broadcast_to_room({"type": "player_joined", "id": self.client_id, "name": name, "ch": ch}, exclude_self=True)
         self._broadcast_lobby_state()
@@ -93,91 +238,43 @@ class ClientHandler(socketserver.BaseRequestHandler):
     def _leave_room(self):
         if not self.room_id:
             return
-        with rooms_lock:
-            room = rooms.get(self.room_id)
-            if room:
-                if self in room["clients"]:
-                    room["clients"].remove(self)
-                if self in room["names"]:
-                    info = room["names"].pop(self)
-                else:
-                    info = {"id": self.client_id}
-                if not room["clients"]:
-                    rooms.pop(self.room_id, None)
-            else:
-                info = {"id": self.client_id}
+        info = rooms.remove_member(self.room_id, self) or {"id": self.client_id}
+        if simulation is not None:
+            sim = simulation.get_room(self.room_id)
+            if sim is not None:
+                sim.remove_player(self.client_id)
+                if sim.is_empty():
+                    simulation.remove_room(self.room_id)
         self._broadcast_to_room({"type": "player_left", "id": info.get("id")}, exclude_self=True)
         self._broadcast_lobby_state()
         self.room_id = None
+        self.room = None
 
     def _broadcast_lobby_state(self):
-        if not self.room_id:
-            return
-        with rooms_lock:
-            room = rooms.get(self.room_id)
-            if not room:
-                return
-            players = [v for v in room["names"].values()]
-            game_state = room["game_state"]
-            countdown = room["countdown"]
-        self._broadcast_to_room({
-            "type": "lobby_state", 
-            "players": players, 
-            "game_state": game_state, 
-            "countdown": countdown
-        })
+        if self.room_id:
+            broadcast_lobby_state(self.room_id)
 
     def _check_game_start(self):
         if not self.room_id:
             return
-        with rooms_lock:
-            room = rooms.get(self.room_id)
-            if not room or room["game_state"] != "lobby":
+        room = rooms.get(self.room_id)
+        if not room:
+            return
+        with room.lock:
+            if room.game_state != "lobby":
                 return
-            ready_players = sum(1 for v in room["names"].values() if v["ready"])
-            total_players = len(room["names"])
-            if ready_players >= 2 and ready_players == total_players:
-                room["game_state"] = "countdown"
-                room["countdown"] = 5.0
-                threading.Thread(target=self._run_countdown, daemon=True).start()
-
-    def _run_countdown(self):
-        room_id = self.room_id
-        countdown = 5.0
-        while countdown > 0:
-            with rooms_lock:
-                room = rooms.get(room_id)
-                if not room or room["game_state"] != "countdown":
-                    return
-                room["countdown"] = countdown
-            self._broadcast_lobby_state()
-            time.sleep(1.0)
-            countdown -= 1.0
-        
-        with rooms_lock:
-            room = rooms.get(room_id)
-            if room and room["game_state"] == "countdown":
-                room["game_state"] = "playing"
-                room["countdown"] = 0.0
-        self._broadcast_to_room({"type": "game_start"})
+            ready_players = sum(1 for v in room.names.values() if v["ready"])
+            total_players = len(room.names)
+            if ready_players < 2 or ready_players != total_players:
+                return
+            room.game_state = "countdown"
+            room.countdown = COUNTDOWN_SECONDS
+        start_countdown(self.room_id)
 
     def _broadcast_to_room(self, obj, exclude_self=False):
-        room_id = self.room_id
-        if not room_id:
+        if not self.room_id:
             return
-        with rooms_lock:
-            room = rooms.get(room_id)
-            if not room:
-                return
-            clients = list(room["clients"])
-        data = (json.dumps(obj, separators=(",", ":")) + "\n").encode("utf-8")
-        for h in clients:
-            if exclude_self and h is self:
-                continue
-            try:
-                h.request.sendall(data)
-            except OSError:
-                pass
+        broadcast(self.room_id, obj, exclude=self if exclude_self else None)
 
     def _relay_to_room(self, msg):
         if not self.room_id:
@@ -187,15 +284,302 @@ class ClientHandler(socketserver.BaseRequestHandler):
             msg["id"] = self.client_id
         self._broadcast_to_room(msg, exclude_self=True)
 
+
+def broadcast_lobby_state(room_id):
+    room = rooms.get(room_id)
+    if not room:
+        return
+    with room.lock:
+        players = list(room.names.values())
+        game_state = room.game_state
+        countdown = room.countdown
+    broadcast(room_id, {
+        "type": "lobby_state",
+        "players": players,
+        "game_state": game_state,
+        "countdown": countdown
+    })
+
+
+def start_countdown(room_id):
+    """Count a room down to game_start on the scheduler, one lobby_state per second."""
+    now = scheduler.clock()
+    scheduler.call_at(now, _countdown_tick, room_id, now, COUNTDOWN_SECONDS)
+
+
+def _countdown_tick(room_id, deadline, countdown):
+    if countdown <= 0:
+        _finish_countdown(room_id)
+        return
+    room = rooms.get(room_id)
+    if not room:
+        return
+    with room.lock:
+        if room.game_state != "countdown":
+            return
+        room.countdown = countdown
+    broadcast_lobby_state(room_id)
+    # Deadlines are fixed from the start, so late ticks do not stretch the countdown.
+    scheduler.call_at(deadline + 1.0, _countdown_tick, room_id, deadline + 1.0, countdown - 1.0)
+
+
+def _finish_countdown(room_id):
+    room = rooms.get(room_id)
+    if not room:
+        return
+    with room.lock:
+        if room.game_state != "countdown":
+            return
+        room.game_state = "playing"
+        room.countdown = 0.0
+        players = sorted(room.names.values(), key=lambda p: p["id"])
+    start = {"type": "game_start"}
+    if simulation is not None:
+        start.update(_start_simulation(room_id, players))
+    broadcast(room_id, start)
+
+
+def _start_simulation(room_id, players):
+    sim = simulation.room_factory(room_id)
+    for i, info in enumerate(players):
+        sim.add_player(info["id"], info["name"], info["ch"], info.get("character"), i, len(players))
+    simulation.add_room(sim)
+    if sim.authoritative:
+        # Where each player starts, so clients draw them there from the
+        # first frame instead of waiting for a snapshot.
+        spawns = {cid: list(state[:2]) for cid, state in sim.entity_states().items()}
+        return {"authoritative": True, "snapshots": True, "arena": [sim.max_x, sim.max_y], "spawns": spawns}
+    return {"snapshots": True}
+
+
+def reap_idle_rooms(timeout):
+    """Disconnect the clients of every room where nobody has sent a lobby or game message for `timeout` seconds."""
+    cutoff = time.monotonic() - timeout
+    for room in rooms.all_rooms():
+        members = room.members
+        if members and all(m.last_seen < cutoff for m in members):
+            print(f"Closing idle room {room.room_id}: no messages for {timeout:.0f}s")
+            for m in members:
+                m._disconnect()
+
+
+def signal_congestion():
+    """Broadcast a `congestion` message to every room whose state just changed."""
+    for room in rooms.all_rooms():
+        members = room.members
+        dropped = sum(m.outbox.dropped for m in members)
+        congested = dropped > room.dropped_seen or any(m.outbox.depth >= CONGESTION_DEPTH for m in members)
+        room.dropped_seen = dropped
+        if congested != room.congested:
+            room.congested = congested
+            broadcast(room.room_id, {"type": "congestion", "congested": congested})
+
+
+def _encode(timed, encode, *args):
+    if not timed:
+        return encode(*args)
+    start = time.perf_counter()
+    data = encode(*args)
+    metrics.encode.add(time.perf_counter() - start)
+    return data
+
+
+def broadcast(room_id, obj, exclude=None):
+    """Send one message to every client in a room, optionally skipping `exclude`."""
+    room = rooms.get(room_id)
+    if room is None:
+        return
+    timed = metrics.sample()
+    start = time.perf_counter() if timed else 0.0
+    encoded = {}
+    droppable = obj.get("type") == "state"
+    for h in room.members:
+        if h is exclude:
+            continue
+        data = encoded.get(h.codec)
+        if data is None:
+            data = encoded[h.codec] = _encode(timed, h.codec.encode, obj)
+        h._send_data(data, droppable)
+    if timed:
+        metrics.fanout.add(time.perf_counter() - start)
+
+
+def broadcast_raw(room_id, frame, sender):
+    """Relay a RawFrame from `sender` to the rest of its room without re-parsing it."""
+    room = rooms.get(room_id)
+    if room is None:
+        return
+    timed = metrics.sample()
+    start = time.perf_counter() if timed else 0.0
+    encoded = {}
+    droppable = frame.mtype == "state"
+    client_id = sender.client_id
+    for h in room.members:
+        if h is sender:
+            continue
+        codec = h.codec
+        data = encoded.get(codec)
+        if data is None:
+            data = encoded[codec] = _encode(timed, frame.relay_bytes, codec, client_id, sender.id_prefix)
+            if data is None:
+                return
+        h._send_data(data, droppable)
+    if timed:
+        metrics.fanout.add(time.perf_counter() - start)
+
+
+def publish_snapshot(sim, events=()):
+    """Send every client of a playing room its delta against the snapshot it last acked."""
+    history = sim.history
+    history.push(sim.entity_states())
+    extra = sim.snapshot_extra(events)
+    room = rooms.get(sim.room_id)
+    if room is None:
+        return
+    timed = metrics.sample()
+    start = time.perf_counter() if timed else 0.0
+    # Clients usually share a baseline, so encode once per (baseline, codec).
+    encoded = {}
+    for h in room.members:
+        key = (history.base_for(h.snap_ack), h.codec)
+        data = encoded.get(key)
+        if data is None:
+            data = encoded[key] = _encode(timed, h.codec.encode, history.message(key[0], extra))
+        h._send_data(data, True)
+    if timed:
+        metrics.fanout.add(time.perf_counter() - start)
+
+
+def queue_depths():
+    """Outbound queue depth of every connected client: {room_id: {client_id: depth}}."""
+    return {
+        room.room_id: {h.client_id: h.outbox.depth for h in room.members}
+        for room in rooms.all_rooms()
+    }
+
+
+class ClientHandler(RoomMember, socketserver.BaseRequestHandler):
+    def setup(self):
+        self.decoder = protocol.FrameDecoder(raw=True)
+        self._init_member()
+        metrics.client_connected()
+        self.writer_thread = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer_thread.start()
+
+    def handle(self):
+        try:
+            for msg in self._iter_messages():
+                self._handle_message(msg)
+        except (ConnectionError, OSError):
+            pass
+        except protocol.FrameTooLarge as e:
+            print(f"Dropping client {self.client_id}: {e}")
+        finally:
+            self._leave_room()
+            self.outbox.close()
+            metrics.client_disconnected()
+
+    def _write_loop(self):
+        while True:
+            batch = self.outbox.get_batch()
+            if batch is None:
+                return
+            data = b"".join(batch)
+            self._count_sent(len(batch), len(data))
+            try:
+                self.request.sendall(data)
+            except OSError:
+                self.outbox.close()
+                return
+
+    def _close_transport(self):
+        try:
+            self.request.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _iter_messages(self):
+        while True:
+            received = self.decoder.fill(self.request)
+            if not received:
+                raise ConnectionError
+            yield from self._decode_received(received)
+
 class ThreadedTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
     allow_reuse_address = True
+    daemon_threads = True
+    request_queue_size = 128
 
-if __name__ == "__main__":
+
+def configure(args):
+    """Set up this process's simulation and timers from the parsed command line."""
+    global simulation
+    if args.authoritative or args.snapshots:
+        from room_sim import SimulationLoop, RoomSimulation, RelayRoom
+        factory = RoomSimulation if args.authoritative else RelayRoom
+        if args.authoritative and args.record:
+            os.makedirs(args.record, exist_ok=True)
+            factory = functools.partial(RoomSimulation, record_dir=args.record)
+        simulation = SimulationLoop(publish_snapshot, room_factory=factory, report_interval=args.tick_report)
+        simulation.schedule(scheduler)
+    if args.idle_timeout > 0:
+        scheduler.call_every(REAP_INTERVAL, reap_idle_rooms, args.idle_timeout)
+    scheduler.call_every(CONGESTION_INTERVAL, signal_congestion)
+    prefix = f"[worker {worker_slot[0]}] " if worker_slot is not None else ""
+    if args.stats_interval > 0:
+        log_reporter = Reporter(metrics)
+        scheduler.call_every(args.stats_interval,
+                             lambda: print(prefix + summary_line(log_reporter.report(rooms, simulation))))
+    if args.admin_port:
+        # Each --workers process serves its own metrics on the next port up.
+        port = args.admin_port + (worker_slot[0] if worker_slot is not None else 0)
+        admin_reporter = Reporter(metrics)
+        serve_admin("127.0.0.1", port, lambda: admin_reporter.report(rooms, simulation))
+        print(f"{prefix}Metrics on http://127.0.0.1:{port}/metrics")
+
+
+def main(argv=None):
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--host", default="0.0.0.0")
     parser.add_argument("--port", type=int, default=8765)
-    args = parser.parse_args()
+    parser.add_argument("--mode", choices=("threaded", "asyncio"), default="threaded",
+                        help="threaded: one OS thread per client; asyncio: one event loop for every client")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="run N server processes behind a gateway that routes each room to one of them")
+    parser.add_argument("--authoritative", action="store_true",
+                        help="simulate playing rooms on the server; clients send inputs and get snapshots")
+    parser.add_argument("--snapshots", action="store_true",
+                        help="batch player states into delta-compressed room snapshots instead of relaying each one")
+    parser.add_argument("--record", metavar="DIR",
+                        help="log every simulated room's seed and inputs to DIR for replay.py (authoritative mode)")
+    parser.add_argument("--tick-report", type=float, default=0.0, metavar="SECONDS",
+                        help="print per-room simulation tick cost every SECONDS (authoritative mode)")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT, metavar="SECONDS",
+                        help="disconnect rooms where nobody sent a lobby or game message for SECONDS (pings do not count; 0 disables)")
+    parser.add_argument("--stats-interval", type=float, default=0.0, metavar="SECONDS",
+                        help="log clients, rooms, traffic, fan-out latency and queue depth every SECONDS")
+    parser.add_argument("--admin-port", type=int, default=0, metavar="PORT",
+                        help="serve live metrics as JSON on http://127.0.0.1:PORT/metrics")
+    args = parser.parse_args(argv)
+    if args.record and not args.authoritative:
+        parser.error("--record needs --authoritative")
+    if args.workers > 1:
+        from workers import serve_workers
+        serve_workers(args)
+        return
+    configure(args)
+    if args.mode == "asyncio":
+        from async_server import serve
+        serve(args.host, args.port)
+        return
+    scheduler.start()
     with ThreadedTCPServer((args.host, args.port), ClientHandler) as server:
         print(f"Server listening on {args.host}:{args.port}")
         server.serve_forever()
+
+
+if __name__ == "__main__":
+    # Run through the importable module so async_server shares its globals.
+    import server
+    server.main()
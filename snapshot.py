@@ -0,0 +1,98 @@
+import collections
+
+# Snapshots kept on both ends. A client whose last ack is older than this
+# gets a keyframe; at 10-15 Hz that is two to three seconds of history.
+HISTORY = 32
+
+
+def _trim(frames, size):
+    while len(frames) > size:
+        frames.popitem(last=False)
+
+
+class SnapshotHistory:
+    """Server side: recent room snapshots, delta-encoded per client.
+
+    A snapshot maps entity id -> row tuple. Each client is sent the
+    difference between the newest snapshot and the last one it
+    acknowledged (`base`), or a full keyframe (`base` 0) when it has never
+    acked or its ack fell out of the history, e.g. after a reconnect or
+    when snapshots were dropped by its send queue.
+    """
+
+    def __init__(self, size=HISTORY):
+        self.size = size
+        self.seq = 0
+        self.frames = collections.OrderedDict()
+
+    def push(self, states):
+        self.seq += 1
+        self.frames[self.seq] = states
+        _trim(self.frames, self.size)
+        return self.seq
+
+    def base_for(self, acked):
+        """The baseline to encode against for a client that acked `acked`."""
+        if acked and acked in self.frames and acked < self.seq:
+            return acked
+        return 0
+
+    def message(self, base, extra=None):
+        current = self.frames[self.seq]
+        previous = self.frames.get(base) if base else None
+        if previous is None:
+            base = 0
+            ents = [[eid, *row] for eid, row in current.items()]
+            gone = []
+        else:
+            ents = [[eid, *row] for eid, row in current.items() if previous.get(eid) != row]
+            gone = [eid for eid in previous if eid not in current]
+        msg = {"type": "snapshot", "seq": self.seq, "base": base, "ents": ents}
+        if gone:
+            msg["gone"] = gone
+        if extra:
+            msg.update(extra)
+        return msg
+
+
+class SnapshotReceiver:
+    """Client side: rebuilds full room state from keyframes and deltas."""
+
+    def __init__(self, size=HISTORY):
+        self.size = size
+        self.latest = 0
+        self.frames = collections.OrderedDict()
+
+    def apply(self, msg):
+        """Return the full {id: row} state for `msg`, or None if it cannot be used.
+
+        A None result means the snapshot was stale or its baseline is
+        unknown; the caller simply does not ack it and the server falls
+        back to an older baseline or a keyframe.
+        """
+        try:
+            seq = int(msg["seq"])
+            base = int(msg.get("base", 0))
+        except (KeyError, TypeError, ValueError):
+            return None
+        if seq <= self.latest:
+            return None
+        if base:
+            previous = self.frames.get(base)
+            if previous is None:
+                return None
+            states = dict(previous)
+        else:
+            states = {}
+        for row in msg.get("ents", ()):
+            states[row[0]] = tuple(row[1:])
+        for eid in msg.get("gone", ()):
+            states.pop(eid, None)
+        self.frames[seq] = states
+        _trim(self.frames, self.size)
+        self.latest = seq
+        return states
+
+    def reset(self):
+        self.latest = 0
+        self.frames.clear()
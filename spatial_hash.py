@@ -0,0 +1,73 @@
+import math
+
+# Bucket size in cells. Every collision test in the game reaches one cell
+# (entity pushes, projectile and power-up pickups), so a query touches
+# at most a 2x2 block of buckets.
+CELL = 2.0
+# Below this many entities a collision pass compares every pair instead:
+# building and querying the grid costs more than it saves (the crossover
+# in bench_broadphase.py is between 32 and 64).
+GRID_MIN = 48
+
+
+class SpatialHash:
+    """Uniform grid of buckets for neighbour queries.
+
+    Items are any hashable key with a position. `rebuild` indexes a fresh
+    set of positions in O(n); `move` keeps one item current when it moves
+    mid-pass. `query` returns the keys in every bucket overlapping a
+    square, sorted so callers visit them in the order they were indexed
+    (list order, for list indices), and callers apply the exact test.
+    """
+
+    def __init__(self, cell=CELL):
+        self.cell = cell
+        self.buckets = {}
+        self.where = {}
+
+    def __len__(self):
+        return len(self.where)
+
+    def _bucket(self, x, y):
+        return (math.floor(x / self.cell), math.floor(y / self.cell))
+
+    def clear(self):
+        self.buckets.clear()
+        self.where.clear()
+
+    def insert(self, key, x, y):
+        bucket = self._bucket(x, y)
+        self.where[key] = bucket
+        self.buckets.setdefault(bucket, []).append(key)
+
+    def remove(self, key):
+        bucket = self.where.pop(key)
+        keys = self.buckets[bucket]
+        keys.remove(key)
+        if not keys:
+            del self.buckets[bucket]
+
+    def move(self, key, x, y):
+        if self._bucket(x, y) != self.where[key]:
+            self.remove(key)
+            self.insert(key, x, y)
+
+    def rebuild(self, items):
+        """Index (key, x, y) items, dropping whatever was there."""
+        self.clear()
+        for key, x, y in items:
+            self.insert(key, x, y)
+
+    def query(self, x, y, radius):
+        """Sorted keys of the items in buckets overlapping the square of half-side `radius` around (x, y)."""
+        x0, y0 = self._bucket(x - radius, y - radius)
+        x1, y1 = self._bucket(x + radius, y + radius)
+        buckets = self.buckets
+        found = []
+        for bx in range(x0, x1 + 1):
+            for by in range(y0, y1 + 1):
+                keys = buckets.get((bx, by))
+                if keys:
+                    found.extend(keys)
+        found.sort()
+        return found
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+
+from headless import Match, run_match
+
+
+def test_match_runs_without_curses():
+    # Run in a fresh interpreter: other tests in this process import curses.
+    code = "import sys, headless; headless.run_match(3, 300, seed=1); print('curses' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_seeded_matches_repeat():
+    first = run_match(4, 3000, seed=5)
+    second = run_match(4, 3000, seed=5)
+    assert first["fighters"] == second["fighters"]
+    assert first["ticks"] == 3000 and first["ticks_per_second"] > 0
+
+
+def test_stats_add_up():
+    match = Match(fighters=4, seed=9)
+    result = match.run(6000)
+    # Only fighters kill fighters, and every kill takes a hit.
+    assert result["kills"] == result["deaths"] > 0
+    assert result["hits"] >= result["kills"]
+    assert result["sim_seconds"] == 100.0
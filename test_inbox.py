@@ -0,0 +1,46 @@
+from net_client import Inbox
+
+PLAYERS = 8
+BACKLOG = 3000  # states per player, about five minutes of a stalled loop at 10 Hz
+
+
+def flood(inbox):
+    for i in range(BACKLOG):
+        for p in range(PLAYERS):
+            inbox.put({"type": "state", "id": f"p{p}", "x": float(i), "y": 5.0, "hp": 100})
+        if i % 500 == 0:
+            inbox.put({"type": "attack", "id": "p0", "x": float(i), "y": 5.0, "dir": 1})
+            inbox.put({"type": "lobby_state", "players": []})
+
+
+def apply(messages, positions):
+    for msg in messages:
+        if msg.get("type") == "state":
+            positions[msg["id"]] = (float(msg["x"]), float(msg["y"]), int(msg["hp"]))
+
+
+def test_flooded_inbox_drains_in_players_not_backlog():
+    inbox = Inbox()
+    flood(inbox)
+    batch = inbox.drain()
+    positions = {}
+    apply(batch, positions)
+
+    # One state per player survives, plus p0's pending state that was moved
+    # ahead of each of its attacks to keep its order; the rest coalesced.
+    kept_states = PLAYERS + BACKLOG // 500
+    assert inbox.coalesced == PLAYERS * BACKLOG - kept_states
+    assert len(batch) == kept_states + 2 * (BACKLOG // 500)
+    assert len(inbox) == 0
+
+    # Events stay in arrival order, each attack right after its sender's
+    # state from the same moment, and the newest states come last.
+    events = batch[:-PLAYERS]
+    expected = []
+    for i in range(0, BACKLOG, 500):
+        expected += [("state", "p0", float(i)), ("attack", "p0", float(i)), ("lobby_state", None, None)]
+    assert [(m["type"], m.get("id"), m.get("x")) for m in events] == expected
+    latest = batch[-PLAYERS:]
+    assert {m["id"] for m in latest} == {f"p{p}" for p in range(PLAYERS)}
+    assert all(m["type"] == "state" and m["x"] == float(BACKLOG - 1) for m in latest)
+    assert positions == {f"p{p}": (float(BACKLOG - 1), 5.0, 100) for p in range(PLAYERS)}
@@ -0,0 +1,67 @@
+import pytest
+
+from interpolation import InterpolationBuffer
+
+
+def buffer(*positions):
+    # Powers of two keep every timestamp and fraction exact.
+    buf = InterpolationBuffer(delay=0.25, max_extrapolation=0.5)
+    for t, x, y in positions:
+        buf.push(t, x, y)
+    return buf
+
+
+def test_nothing_to_draw_before_the_first_position():
+    assert InterpolationBuffer().sample(10.0) is None
+
+
+def test_interpolates_between_the_positions_around_the_drawn_time():
+    buf = buffer((1.0, 0.0, 10.0), (1.5, 4.0, 12.0), (2.0, 6.0, 12.0))
+    # Drawn 0.25 s behind: 1.25 is halfway from the first position to the second.
+    assert buf.sample(1.5) == (2.0, 11.0)
+    assert buf.sample(2.0) == (5.0, 12.0)
+    assert buf.sample(2.25) == (6.0, 12.0)
+
+
+def test_holds_the_oldest_position_until_the_drawn_time_reaches_it():
+    buf = buffer((1.0, 3.0, 4.0), (1.5, 5.0, 4.0))
+    assert buf.sample(1.0) == (3.0, 4.0)
+    assert buf.sample(1.25) == (3.0, 4.0)
+    assert buffer((1.0, 3.0, 4.0)).sample(5.0) == (3.0, 4.0)
+
+
+def test_extrapolates_along_the_last_velocity_up_to_the_cap():
+    buf = buffer((1.0, 0.0, 0.0), (1.5, 2.0, -1.0))
+    # 0.25 s past the newest position at 4 cells/s and -2 cells/s.
+    assert buf.sample(2.0) == (3.0, -1.5)
+    # Beyond max_extrapolation the entity holds where the cap put it.
+    capped = (4.0, -2.0)
+    assert buf.sample(2.25) == capped
+    assert buf.sample(10.0) == capped
+
+
+def test_a_late_position_ends_the_extrapolation():
+    buf = buffer((1.0, 0.0, 0.0), (1.5, 2.0, 0.0))
+    assert buf.sample(2.0) == (3.0, 0.0)
+    buf.push(2.0, 2.0, 0.0)
+    assert buf.sample(2.0) == (2.0, 0.0)
+
+
+def test_same_frame_positions_keep_the_newest():
+    buf = buffer((1.0, 0.0, 0.0), (1.5, 2.0, 0.0), (1.5, 8.0, 0.0), (1.25, 9.0, 0.0))
+    assert list(buf.positions) == [(1.0, 0.0, 0.0), (1.5, 9.0, 0.0)]
+
+
+def test_reset_jumps_straight_to_a_teleport():
+    buf = buffer((1.0, 0.0, 0.0), (1.5, 2.0, 0.0))
+    buf.reset(1.75, 40.0, 5.0)
+    # No sliding across the arena from the old path: the new spot at once.
+    assert buf.sample(1.75) == (40.0, 5.0)
+    buf.push(2.25, 42.0, 5.0)
+    assert buf.sample(2.25) == (41.0, 5.0)
+
+
+def test_old_positions_are_dropped_as_the_drawn_time_passes_them():
+    buf = buffer(*[(1.0 + i / 8, float(i), 0.0) for i in range(8)])
+    assert buf.sample(1.25 + 5 / 8) == pytest.approx((5.0, 0.0))
+    assert [t for t, _, _ in buf.positions] == [1.0 + i / 8 for i in range(5, 8)]
@@ -0,0 +1,53 @@
+from latency import OFFSET_WINDOW, RTT_BUCKETS, LinkStats
+
+# Samples are powers of two so the smoothing is exact.
+
+
+def test_first_sample_sets_rtt_and_half_of_it_as_jitter():
+    link = LinkStats()
+    assert (link.rtt, link.offset, link.as_dict()) == (None, None, {"samples": 0})
+    link.add(0.125, 2.0)
+    assert (link.rtt, link.jitter, link.offset, link.samples) == (0.125, 0.0625, 2.0, 1)
+
+
+def test_rtt_and_jitter_are_smoothed_like_tcp():
+    link = LinkStats()
+    link.add(0.125, 0.0)
+    link.add(0.625, 0.0)
+    # RTTVAR += (|sample - SRTT| - RTTVAR) / 4, then SRTT += (sample - SRTT) / 8.
+    assert link.jitter == 0.0625 + (0.5 - 0.0625) / 4
+    assert link.rtt == 0.125 + 0.5 / 8
+    for _ in range(200):
+        link.add(0.25, 0.0)
+    assert abs(link.rtt - 0.25) < 1e-9
+    assert link.jitter < 1e-9
+
+
+def test_offset_comes_from_the_fastest_recent_round_trip():
+    link = LinkStats()
+    link.add(0.5, 3.0)
+    link.add(0.0625, 1.0)
+    link.add(0.25, 2.0)
+    assert link.offset == 1.0
+    # Once the fast sample leaves the window the best remaining one wins.
+    for _ in range(OFFSET_WINDOW - 1):
+        link.add(0.125, 4.0)
+    assert link.offset == 4.0
+
+
+def test_negative_rtt_is_ignored():
+    link = LinkStats()
+    link.add(0.125, 1.0)
+    link.add(-0.5, 9.0)
+    assert (link.rtt, link.offset, link.samples) == (0.125, 1.0, 1)
+
+
+def test_histogram_buckets_by_milliseconds():
+    link = LinkStats()
+    for rtt in (0.004, 0.005, 0.03, 2.0):
+        link.add(rtt, 0.0)
+    histogram = link.as_dict()["histogram"]
+    assert histogram["<=5"] == 2
+    assert histogram["<=50"] == 1
+    assert histogram[f">{RTT_BUCKETS[-1]}"] == 1
+    assert sum(histogram.values()) == 4
@@ -44,3 +44,31 @@ if __name__ == "__main__":
         print("\nLobby sys is working!")
     else:
         print("\nLobby sys has issues!")
+
+
+class _FakeNet:
+    def __init__(self, messages):
+        self.messages = messages
+        self.unread_messages = []
+        self.client_id = None
+        self.lobby_state = {"players": [], "game_state": "lobby", "countdown": 0.0}
+        self.game_config = {}
+
+    def poll(self):
+        messages, self.messages = self.messages, []
+        return messages
+
+    def unread(self, messages):
+        self.unread_messages.extend(messages)
+
+
+def test_bad_message_does_not_drop_game_start():
+    from lobby_screen import LobbyScreen
+    after = {"type": "snapshot", "seq": 1}
+    net = _FakeNet([{"type": "player_joined", "id": "b"}, None, {"type": "player_left"},
+                    {"type": "game_start", "authoritative": True}, after])
+    lobby = LobbyScreen(None, net)
+    lobby._process_network_messages()
+    assert lobby.game_started and net.game_config["authoritative"]
+    assert [p["id"] for p in net.lobby_state["players"]] == ["b"]
+    assert net.unread_messages == [after]
@@ -0,0 +1,49 @@
+import projectiles as projectiles_module
+from headless import Match
+from models import Pool, Projectile, allocation_counts
+from projectiles import clear_projectiles
+from room_sim import RoomSimulation
+
+
+def created():
+    return {name: counts[0] for name, counts in allocation_counts().items()}
+
+
+def test_pool_reuses_released_objects():
+    pool = Pool(Projectile, size=2)
+    a = pool.acquire(1, 2, 3, 4, "*", None, 10)
+    pool.release(a)
+    b = pool.acquire(5, 6, 7, 8, "+", None, 20, special=True)
+    assert b is a
+    assert (b.x, b.y, b.vx, b.ch, b.damage, b.special) == (5, 6, 7, "+", 20, True)
+    assert (pool.created, pool.reused) == (1, 1)
+    pool.release_all([pool.acquire(0, 0, 0, 0, "*", None) for _ in range(5)])
+    assert len(pool.free) == 2
+
+
+def test_room_stops_allocating_once_warm():
+    sim = RoomSimulation("pool", seed=1)
+    for i in range(4):
+        sim.add_player(str(i), str(i), "x", index=i, total=4)
+    # Everyone shoots all the time, so hits keep spawning particles.
+    seq = 0
+    for tick in range(1200):
+        if tick == 600:
+            before = created()
+        seq += 1
+        for i in range(4):
+            sim.set_input(str(i), "s" + ("d" if (tick // 40 + i) % 2 else "a"), seq)
+        sim.step()
+    assert sum(e.hits for e in sim.entities.values()) > 0
+    assert created() == before
+
+
+def test_list_match_stops_allocating_once_warm(monkeypatch):
+    monkeypatch.setattr(projectiles_module, "np", None)
+    match = Match(fighters=6, seed=2)
+    match.run(1200)
+    before = created()
+    match.run(1200)
+    assert created() == before
+    clear_projectiles(match.projectiles)
+    assert match.projectiles == []
@@ -0,0 +1,61 @@
+import pytest
+
+import particles as particles_module
+from game_logic import GameLogic
+from models import Particle
+from particles import ParticleSystem, make_particles
+
+DT = 1.0 / 60
+np = particles_module.np
+needs_numpy = pytest.mark.skipif(np is None, reason="numpy is not installed")
+
+
+def live(ps):
+    """(x, y, vx, vy, life, glyph) of every particle, in a stable order."""
+    if isinstance(ps, ParticleSystem):
+        n = ps.count
+        rows = zip(ps.x[:n], ps.y[:n], ps.vx[:n], ps.vy[:n], ps.life[:n], (ps.glyphs[g] for g in ps.glyph[:n]))
+    else:
+        rows = ((p.x, p.y, p.vx, p.vy, p.life, p.ch) for p in ps)
+    return sorted((float(x), float(y), float(vx), float(vy), float(life), ch) for x, y, vx, vy, life, ch in rows)
+
+
+@needs_numpy
+def test_system_matches_particle_objects():
+    logic = GameLogic(80, 24, 18)
+    system = ParticleSystem(capacity=4, rng=np.random.default_rng(3))
+    objects = []
+    for frame in range(240):
+        if frame % 20 == 0:
+            # Spawn in the system, then mirror the new particles as objects.
+            start = system.count
+            system.burst(40.0, 10.0, 7)
+            for i in range(start, system.count):
+                objects.append(Particle(system.x[i], system.y[i], system.vx[i], system.vy[i],
+                                        system.glyphs[system.glyph[i]], system.life[i]))
+        logic.update_particles(system, DT)
+        logic.update_particles(objects, DT)
+        assert live(system) == live(objects)
+    assert system.capacity > 4
+
+
+@needs_numpy
+def test_seeded_systems_repeat():
+    a, b = make_particles(7), make_particles(7)
+    for ps in (a, b):
+        for i in range(10):
+            ps.burst(i, 5.0, 8)
+        ps.update(0.3)
+    assert live(a) == live(b)
+
+
+def test_without_numpy_particles_are_a_list(monkeypatch):
+    monkeypatch.setattr(particles_module, "np", None)
+    ps = make_particles(1)
+    assert ps == []
+    logic = GameLogic(80, 24, 18)
+    logic.spawn_burst(ps, 10.0, 10.0, 6)
+    assert len(ps) == 6 and all(isinstance(p, Particle) for p in ps)
+    for _ in range(120):
+        logic.update_particles(ps, DT)
+    assert ps == []
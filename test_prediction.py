@@ -0,0 +1,179 @@
+import heapq
+import socket
+import threading
+import time
+
+from bench_server import free_port, start_server
+from game_logic import GameLogic
+from models import Entity, projectile_pool
+from net_client import NetClient
+from prediction import PredictedPlayer
+from room_sim import ARENA_HEIGHT, ARENA_WIDTH
+from utils import DT
+
+# One-way delay the proxy adds, so the round trip is twice this.
+DELAY = 0.06
+
+
+class LatencyProxy:
+    """Loopback TCP proxy that delivers every chunk `delay` seconds after it was read."""
+
+    def __init__(self, upstream_port, delay):
+        self.upstream_port = upstream_port
+        self.delay = delay
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self.listener.accept()
+            except OSError:
+                return
+            upstream = socket.create_connection(("127.0.0.1", self.upstream_port))
+            self._pipe(client, upstream)
+            self._pipe(upstream, client)
+
+    def _pipe(self, src, dst):
+        due = []
+        ready = threading.Condition()
+
+        def read():
+            while True:
+                try:
+                    data = src.recv(65536)
+                except OSError:
+                    data = b""
+                with ready:
+                    heapq.heappush(due, (time.monotonic() + self.delay, len(due), data))
+                    ready.notify()
+                if not data:
+                    return
+
+        def write():
+            while True:
+                with ready:
+                    while not due or due[0][0] > time.monotonic():
+                        ready.wait(due[0][0] - time.monotonic() if due else None)
+                    _, _, data = heapq.heappop(due)
+                try:
+                    if not data:
+                        dst.shutdown(socket.SHUT_WR)
+                        return
+                    dst.sendall(data)
+                except OSError:
+                    return
+
+        threading.Thread(target=read, daemon=True).start()
+        threading.Thread(target=write, daemon=True).start()
+
+    def close(self):
+        self.listener.close()
+
+
+def wait_for(net, mtype, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        batch = net.poll()
+        for i, msg in enumerate(batch):
+            if msg.get("type") == mtype:
+                net.unread(batch[i + 1:])
+                return msg
+        time.sleep(0.02)
+    raise AssertionError(f"no {mtype} within {timeout}s")
+
+
+def test_replay_matches_uninterrupted_prediction():
+    logic = GameLogic(ARENA_WIDTH, ARENA_HEIGHT, ARENA_HEIGHT - 6)
+    inputs = [{ord("d"): True}] * 10 + [{ord("w"): True}] + [{}] * 10 + [{ord("a"): True}] * 5
+    straight = Entity(10, logic.ground_row - 0.5, "A")
+    for keys in inputs:
+        PredictedPlayer(logic).apply(straight, keys, DT)
+
+    player = Entity(10, logic.ground_row - 0.5, "A")
+    predictor = PredictedPlayer(logic)
+    for keys in inputs:
+        predictor.apply(player, keys, DT)
+    saved = player.save_physics()
+    # A server that agrees with frame 12 changes nothing.
+    assert predictor.reconcile(player, 12, predictor.pending[11][3][0], predictor.pending[11][3][1]) == 0.0
+    assert player.save_physics() == saved
+    # One that had the player 2 cells further left moves all later frames with it.
+    x, y = predictor.pending[0][3][:2]
+    moved = predictor.reconcile(player, 13, x - 2, y)
+    assert abs(moved - 2) < 1e-9
+    assert abs(player.x - (straight.x - 2)) < 1e-9 and abs(player.y - straight.y) < 1e-9
+    assert len(predictor.pending) == len(inputs) - 13
+
+
+def test_predicted_shots_go_back_to_the_pool():
+    logic = GameLogic(ARENA_WIDTH, ARENA_HEIGHT, ARENA_HEIGHT - 6)
+    player = Entity(10, logic.ground_row - 0.5, "A")
+    predictor = PredictedPlayer(logic)
+    firing = {ord("s"): True, ord("f"): True}
+    for _ in range(200):
+        predictor.apply(player, firing, DT)
+    created = projectile_pool.created
+    for _ in range(200):
+        predictor.apply(player, firing, DT)
+        predictor.reconcile(player, predictor.seq - 5, player.x, player.y)
+    assert projectile_pool.created == created
+
+
+def test_prediction_under_latency():
+    """Through a 120 ms round trip the player moves on its first frame and is barely corrected."""
+    port = free_port()
+    server = start_server("threaded", port, ["--authoritative", "--idle-timeout", "0"])
+    proxy = LatencyProxy(port, DELAY)
+    clients = [NetClient("127.0.0.1", proxy.port, codecs=()) for _ in range(2)]
+    try:
+        for i, net in enumerate(clients):
+            net.connect()
+            net.join("prediction", f"p{i}", "🙂")
+            net.client_id = wait_for(net, "welcome")["id"]
+            net.set_ready(True)
+        net = clients[0]
+        spawn = wait_for(net, "game_start")["spawns"][net.client_id]
+
+        logic = GameLogic(ARENA_WIDTH, ARENA_HEIGHT, ARENA_HEIGHT - 6)
+        player = Entity(0, 0, "🙂")
+        predictor = PredictedPlayer(logic)
+        row = wait_for(net, "snapshot")
+        player.x, player.y = [r for r in row["ents"] if r[0] == net.client_id][0][1:3]
+        # game_start already said where the server would put us.
+        assert [player.x, player.y] == spawn
+        start_x = player.x
+        # Head for the middle of the arena, away from whichever wall we spawned by.
+        key, sign = ("d", 1) if start_x < ARENA_WIDTH / 2 else ("a", -1)
+
+        corrections = []
+        server_x = None
+        frames = int(2.0 / DT)
+        for frame in range(frames):
+            # Hold the key for a second, then stand still so the server catches up.
+            keys = key if frame < frames // 2 else ""
+            seq = predictor.apply(player, {ord(k): True for k in keys}, DT)
+            net.send_input(keys, seq)
+            if frame == 0:
+                assert (player.x - start_x) * sign > 0
+            for msg in net.poll():
+                if msg.get("type") != "snapshot":
+                    continue
+                for ent in msg["ents"]:
+                    if ent[0] == net.client_id:
+                        x, y, seq_acked = ent[1], ent[2], ent[7]
+                        corrections.append(predictor.reconcile(player, seq_acked, x, y))
+                        server_x = x
+            time.sleep(DT)
+
+        assert server_x is not None and (server_x - start_x) * sign > 5
+        assert abs(player.x - server_x) < 1.0
+        # Snapshots mostly agree, and a correction is at most a tick or two of movement.
+        assert max(corrections) < 1.5
+    finally:
+        for net in clients:
+            net.close()
+        proxy.close()
+        server.terminate()
+        server.wait()
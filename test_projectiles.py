@@ -0,0 +1,69 @@
+import pytest
+
+import projectiles as projectiles_module
+from game_logic import GameLogic
+from headless import Match
+from models import Entity, Projectile
+from projectiles import ProjectileStore, make_projectiles
+
+KEYS = [{}, {ord("d"): True, ord("s"): True}, {ord("w"): True, ord("f"): True}, {ord("a"): True, ord("s"): True}]
+
+
+def play(seed, fighters, ticks=3000):
+    match = Match(fighters=fighters, seed=seed, character="ninja")
+    for tick in range(ticks):
+        match.step(KEYS[tick // 30 % len(KEYS)])
+    return match
+
+
+@pytest.mark.skipif(projectiles_module.np is None, reason="numpy is not installed")
+@pytest.mark.parametrize("seed, fighters", [(1, 3), (2, 8), (3, 16)])
+def test_store_plays_out_like_the_list(monkeypatch, seed, fighters):
+    store = play(seed, fighters)
+    assert isinstance(store.projectiles, ProjectileStore)
+    monkeypatch.setattr(projectiles_module, "np", None)
+    listed = play(seed, fighters)
+    assert isinstance(listed.projectiles, list)
+    assert store.stats()["hits"] > 0
+    assert store.digest() == listed.digest()
+    assert store.stats()["fighters"] == listed.stats()["fighters"]
+
+
+def test_without_numpy_projectiles_are_a_list(monkeypatch):
+    monkeypatch.setattr(projectiles_module, "np", None)
+    assert make_projectiles() == []
+    first, second = play(4, 4, 1200), play(4, 4, 1200)
+    assert first.digest() == second.digest()
+
+
+def shoot(projectiles, shooter, *targets):
+    for t in targets:
+        if isinstance(projectiles, list):
+            projectiles.append(Projectile(t.x, t.y, 0.0, 0.0, "*", shooter, 20))
+        else:
+            projectiles.add(t.x, t.y, 0.0, 0.0, "*", shooter, 20)
+
+
+@pytest.mark.parametrize("stored", [
+    pytest.param(True, marks=pytest.mark.skipif(projectiles_module.np is None, reason="numpy is not installed")),
+    False,
+])
+def test_collision_filter_sees_shooter_and_target(monkeypatch, stored):
+    if not stored:
+        monkeypatch.setattr(projectiles_module, "np", None)
+    logic = GameLogic(80, 24, 18)
+    shooter, friend, foe = Entity(2, 17, "A"), Entity(20, 17, "B"), Entity(40, 17, "C")
+    projectiles = make_projectiles()
+    shoot(projectiles, shooter, friend, foe)
+    seen = []
+
+    def collision_filter(owner, e):
+        seen.append((owner, e))
+        return e is foe
+
+    # Reading the store must not build a Projectile per hit.
+    monkeypatch.setattr(projectiles_module, "Projectile", None)
+    logic.handle_projectile_collisions(projectiles, [shooter, friend, foe], [], [], collision_filter)
+    assert seen == [(shooter, friend), (shooter, foe)]
+    assert (friend.hp, foe.hp) == (100, 80)
+    assert len(projectiles) == 1
@@ -0,0 +1,193 @@
+import random
+import socket
+
+import pytest
+
+from protocol import (BINARY, FRAME_JSON, FRAME_STATE, ID_FLAG, JSON, FrameDecoder, FrameTooLarge, RawFrame,
+                      choose_codec, decode_binary, get_codec, json_id_prefix)
+
+MESSAGES = [
+    {"type": "join", "room": "lobby", "name": "Ann", "ch": "😎"},
+    {"type": "state", "x": 1.5, "y": 2.25, "hp": 80},
+    {"type": "attack", "x": 3.0, "y": 4.5, "dir": -1},
+    {"type": "respawn", "x": 10.0, "y": 17.5},
+    {"type": "ready", "ready": True},
+]
+
+
+def chunks(data, rng):
+    pos = 0
+    while pos < len(data):
+        size = rng.randint(1, 9)
+        yield data[pos:pos + size]
+        pos += size
+
+
+@pytest.mark.parametrize("codec", [JSON, BINARY])
+def test_frames_split_anywhere(codec):
+    stream = b"".join(codec.encode(m) for m in MESSAGES * 20)
+    rng = random.Random(1)
+    for _ in range(20):
+        decoder = FrameDecoder()
+        out = []
+        for chunk in chunks(stream, rng):
+            out.extend(decoder.feed(chunk))
+        assert out == MESSAGES * 20
+        assert decoder.pending == 0
+
+
+def test_recv_into_reads_from_the_socket():
+    a, b = socket.socketpair()
+    try:
+        decoder = FrameDecoder()
+        stream = b"".join(BINARY.encode(m) for m in MESSAGES * 100)
+        b.sendall(stream)
+        b.close()
+        out = []
+        while True:
+            # A small read size makes most frames straddle two reads.
+            messages = decoder.recv_into(a, 7)
+            if messages is None:
+                break
+            out.extend(messages)
+        assert out == MESSAGES * 100
+    finally:
+        a.close()
+
+
+def test_mixed_formats_in_one_stream():
+    stream = JSON.encode(MESSAGES[0]) + BINARY.encode(MESSAGES[1]) + b"\n" + JSON.encode(MESSAGES[4])
+    decoder = FrameDecoder()
+    out = []
+    for i in range(len(stream)):
+        out.extend(decoder.feed(stream[i:i + 1]))
+    assert out == [MESSAGES[0], MESSAGES[1], MESSAGES[4]]
+
+
+@pytest.mark.parametrize("codec", [JSON, BINARY])
+def test_raw_mode_keeps_relayable_messages_as_bytes(codec):
+    decoder = FrameDecoder(raw=True)
+    out = decoder.feed(b"".join(codec.encode(m) for m in MESSAGES))
+    assert [type(m) is RawFrame for m in out] == [False, True, True, True, False]
+    assert [m.mtype for m in out[1:4]] == ["state", "attack", "respawn"]
+    assert all(m.codec is codec for m in out[1:4])
+    assert [m.decode() if isinstance(m, RawFrame) else m for m in out] == MESSAGES
+
+
+def test_oversized_frames_are_refused():
+    with pytest.raises(FrameTooLarge):
+        FrameDecoder(max_frame=64).feed(b'{"type":"chat","text":"' + b"x" * 100 + b'"}\n')
+    # An unterminated line is refused as soon as it is too long, not when it ends.
+    with pytest.raises(FrameTooLarge):
+        FrameDecoder(max_frame=64).feed(b"{" + b"x" * 100)
+    frame = BINARY.encode({"type": "chat", "text": "y" * 100})
+    decoder = FrameDecoder(max_frame=64)
+    # The header alone is enough to refuse a binary frame.
+    with pytest.raises(FrameTooLarge):
+        decoder.feed(frame[:3])
+    assert FrameDecoder(max_frame=256).feed(frame) == [{"type": "chat", "text": "y" * 100}]
+
+
+def test_garbage_is_skipped():
+    decoder = FrameDecoder()
+    assert decoder.feed(b'not json\n[1, 2]\n\n{"type":"ready","ready":false}\n') == [{"type": "ready", "ready": False}]
+
+
+@pytest.mark.parametrize("msg", MESSAGES + [
+    {"type": "state", "x": -3.5, "y": 0.0, "hp": 0, "id": "ab12cd34"},
+    {"type": "attack", "x": 0.25, "y": 7.0, "dir": 1, "id": "ab12cd34"},
+    {"type": "respawn", "x": 40.0, "y": 17.5, "id": "ab12cd34"},
+    {"type": "snapshot", "seq": 9, "base": 7, "ents": [["ab12cd34", 1.25, 17.5, 100, 1], ["ef56ab78", 60.5, 3.0, 0, 0]],
+     "gone": ["00ff00ff"]},
+    {"type": "snapshot", "seq": 3, "base": 0, "ents": [["ab12cd34", 1.25, 17.5, 100, 1, 2, 0, 14]],
+     "proj": [[3.5, 17.0, "⚡"]], "events": []},
+    {"type": "state", "x": 1.0, "y": 2.0, "hp": 5, "id": "not-8"},
+    {"type": "welcome", "id": "ab12cd34", "room": "lobby", "codec": "bin1", "players": []},
+    {"type": "chat", "text": "z" * 70000},
+])
+def test_binary_codec_round_trip(msg):
+    assert FrameDecoder(max_frame=128 * 1024).feed(BINARY.encode(msg)) == [msg]
+
+
+def test_binary_codec_uses_structs_for_hot_messages():
+    assert BINARY.encode(MESSAGES[1])[0] == FRAME_STATE
+    assert BINARY.encode(dict(MESSAGES[1], id="ab12cd34"))[0] == FRAME_STATE | ID_FLAG
+    assert BINARY.encode(MESSAGES[0])[0] == FRAME_JSON
+    assert len(BINARY.encode(MESSAGES[1])) < len(JSON.encode(MESSAGES[1]))
+
+
+def test_codec_negotiation_falls_back_to_json():
+    assert choose_codec(["bin1"]) is BINARY
+    assert choose_codec(["bin9", "bin1"]) is BINARY
+    assert choose_codec(["bin9"]) is JSON
+    assert choose_codec([]) is JSON
+    assert choose_codec(None) is JSON
+    assert choose_codec("bin1") is JSON
+    assert get_codec("nope") is JSON
+
+
+def test_decode_binary_rejects_bad_payloads():
+    assert decode_binary(FRAME_STATE, b"\x00" * 3) is None
+    assert decode_binary(FRAME_JSON, b"[1]") is None
+    assert decode_binary(FRAME_JSON, b"\xff") is None
+    assert decode_binary(0x8F, b"") is None
+
+
+class _Member:
+    """Stands in for a server ClientHandler: records what broadcast_raw sends it."""
+
+    def __init__(self, client_id, codec):
+        self.client_id = client_id
+        self.codec = codec
+        self.id_prefix = json_id_prefix(client_id)
+        self.sent = []
+
+    def _send_data(self, data, droppable=False):
+        self.sent.append(data)
+
+
+@pytest.mark.parametrize("sender_codec", [JSON, BINARY])
+@pytest.mark.parametrize("msg", MESSAGES[1:4])
+def test_relayed_bytes_decode_to_payload_plus_id(sender_codec, msg):
+    (frame,) = FrameDecoder(raw=True).feed(sender_codec.encode(msg))
+    for codec in (JSON, BINARY):
+        data = frame.relay_bytes(codec, "ab12cd34", json_id_prefix("ab12cd34"))
+        assert FrameDecoder().feed(data) == [dict(msg, id="ab12cd34")]
+
+
+def test_relay_keeps_an_id_the_sender_sent():
+    (frame,) = FrameDecoder(raw=True).feed(JSON.encode(dict(MESSAGES[1], id="spoofed")))
+    # Same as the parsing path: the sender's own id key comes later and wins.
+    assert FrameDecoder().feed(frame.relay_bytes(JSON, "ab12cd34", json_id_prefix("ab12cd34")))[0]["id"] == "spoofed"
+
+
+def test_broadcast_raw_reaches_every_other_member():
+    import server
+
+    sender = _Member("ab12cd34", BINARY)
+    others = [_Member("00000001", JSON), _Member("00000002", BINARY), _Member("00000003", JSON)]
+    for m in [sender] + others:
+        server.rooms.add_member("relay-test", m, {"id": m.client_id})
+    try:
+        (frame,) = FrameDecoder(raw=True).feed(BINARY.encode(MESSAGES[2]))
+        server.broadcast_raw("relay-test", frame, sender)
+    finally:
+        for m in [sender] + others:
+            server.rooms.remove_member("relay-test", m)
+    assert sender.sent == []
+    for m in others:
+        assert [FrameDecoder().feed(data) for data in m.sent] == [[dict(MESSAGES[2], id="ab12cd34")]]
+    # One encoding per codec, shared by every member on it.
+    assert others[0].sent[0] is others[2].sent[0]
+
+
+@pytest.mark.parametrize("msg", [
+    {"type": "state", "x": 1e300, "y": 2.0, "hp": 5},
+    {"type": "state", "x": 1.0, "y": 2.0, "hp": float("inf")},
+    {"type": "snapshot", "seq": 2, "base": 0, "ents": [["ab12cd34", 1e300, 17.5, 100, 1]]},
+    {"type": "snapshot", "seq": 2, "base": 0, "ents": [["ab12cd34", 1.25, 17.5, float("inf"), 1]]},
+])
+def test_values_structs_cannot_hold_fall_back_to_json(msg):
+    frame = BINARY.encode(msg)
+    assert frame[0] == FRAME_JSON
+    assert FrameDecoder().feed(frame) == [msg]
@@ -0,0 +1,40 @@
+from headless import Match
+from input_log import read_log
+from replay import replay
+from room_sim import RoomSimulation
+
+
+def test_match_replays_exactly(tmp_path):
+    path = str(tmp_path / "match.log.gz")
+    match = Match(fighters=3, seed=11, character="ninja")
+    match.record(path)
+    script = [{}, {ord("d"): True}, {ord("d"): True, ord("s"): True}, {ord("w"): True}, {ord("a"): True, ord("f"): True}]
+    for tick in range(1500):
+        match.step(script[tick // 60 % len(script)])
+    match.stop_recording()
+
+    times, sim_time, recorded, replayed = replay(path)
+    assert len(times) == 1500
+    assert recorded == replayed == match.digest()
+    assert round(sim_time, 6) == 25.0
+
+
+def test_room_replays_exactly(tmp_path):
+    sim = RoomSimulation("lobby", seed=3, record_dir=str(tmp_path))
+    sim.add_player("a", "A", "x", index=0, total=2)
+    sim.add_player("b", "B", "y", index=1, total=2)
+    for tick in range(600):
+        sim.set_input("a", "ds" if tick % 90 < 45 else "aw", tick + 1)
+        if tick % 3 == 0:
+            sim.set_input("b", "as", tick // 3 + 1)
+        if tick == 400:
+            sim.remove_player("b")
+        sim.step()
+    sim.stop_recording()
+
+    path = str(next(tmp_path.iterdir()))
+    header, events = read_log(path)
+    assert header["kind"] == "room" and header["seed"] == 3
+    times, _, recorded, replayed = replay(path)
+    assert len(times) == 600
+    assert recorded == replayed == sim.digest()
@@ -0,0 +1,54 @@
+import pytest
+
+from protocol import BINARY, FrameDecoder
+from room_sim import STATE_LIMIT, RelayRoom, SimulationLoop
+
+
+@pytest.mark.parametrize("state", [
+    (1e300, 2.0, 50.0),
+    (1.0, float("nan"), 50.0),
+    (1.0, 2.0, float("inf")),
+    (1.0, 2.0, -float("inf")),
+    (STATE_LIMIT + 1.0, 2.0, 50.0),
+])
+def test_relay_room_refuses_states_a_snapshot_cannot_carry(state):
+    room = RelayRoom("r")
+    room.add_player("ab12cd34", "Ann", "😎")
+    room.set_state("ab12cd34", 1.0, 2.0, 50.0)
+    with pytest.raises(ValueError):
+        room.set_state("ab12cd34", *state)
+    assert room.entity_states() == {"ab12cd34": (1.0, 2.0, 50, 1)}
+
+
+def test_relay_room_states_encode_as_binary_snapshots():
+    room = RelayRoom("r")
+    room.add_player("ab12cd34", "Ann", "😎")
+    room.set_state("ab12cd34", -STATE_LIMIT, STATE_LIMIT, STATE_LIMIT)
+    room.history.push(room.entity_states())
+    msg = room.history.message(0, room.snapshot_extra())
+    assert FrameDecoder().feed(BINARY.encode(msg)) == [msg]
+
+
+class BrokenRoom(RelayRoom):
+    def step(self, dt):
+        raise RuntimeError("boom")
+
+
+@pytest.mark.parametrize("fail_in", ["step", "publish"])
+def test_a_failing_room_does_not_stop_the_others(fail_in, capsys):
+    published = []
+
+    def publish(sim, events):
+        if fail_in == "publish" and sim.room_id == "bad":
+            raise RuntimeError("boom")
+        published.append(sim.room_id)
+
+    loop = SimulationLoop(publish)
+    loop.add_room(BrokenRoom("bad") if fail_in == "step" else RelayRoom("bad"))
+    loop.add_room(RelayRoom("good"))
+    for _ in range(3 * RelayRoom.snapshot_every):
+        loop.tick_all()
+    assert published == ["good"] * 3
+    assert loop.get_room("bad") is None
+    assert loop.get_room("good").tick == 3 * RelayRoom.snapshot_every
+    assert "Room bad failed" in capsys.readouterr().out
@@ -0,0 +1,85 @@
+import threading
+
+from scheduler import Scheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_timers_fire_in_deadline_order():
+    clock = Clock()
+    s = Scheduler(clock)
+    fired = []
+    s.call_later(3.0, fired.append, "c")
+    s.call_at(1.0, fired.append, "a")
+    s.call_later(2.0, fired.append, "b1")
+    s.call_later(2.0, fired.append, "b2")
+    assert s.run_due() == 1.0 and fired == []
+    clock.now = 2.0
+    assert s.run_due() == 3.0
+    # Equal deadlines run in the order they were scheduled.
+    assert fired == ["a", "b1", "b2"]
+    clock.now = 10.0
+    assert s.run_due() is None
+    assert fired == ["a", "b1", "b2", "c"]
+
+
+def test_cancelled_timers_never_run():
+    clock = Clock()
+    s = Scheduler(clock)
+    fired = []
+    s.call_later(1.0, fired.append, "kept")
+    s.call_later(0.5, fired.append, "cancelled").cancel()
+    every = s.call_every(0.25, fired.append, "tick")
+    clock.now = 0.25
+    s.run_due()
+    every.cancel()
+    clock.now = 5.0
+    assert s.run_due() is None
+    assert fired == ["tick", "kept"]
+    assert len(s) == 0
+
+
+def test_fixed_rate_timer_skips_missed_runs():
+    clock = Clock()
+    s = Scheduler(clock)
+    ticks = []
+    timer = s.call_every(1.0, lambda: ticks.append(clock.now))
+    for now in (1.0, 2.0, 2.5, 3.0):
+        clock.now = now
+        s.run_due()
+    assert ticks == [1.0, 2.0, 3.0]
+    # Stalled for 5 s: one run, not five, and the overrun is counted.
+    clock.now = 8.5
+    assert s.run_due() == 9.5
+    assert ticks == [1.0, 2.0, 3.0, 8.5] and timer.overruns == 1
+
+
+def test_failing_callback_does_not_stop_the_others(capsys):
+    clock = Clock()
+    s = Scheduler(clock)
+    fired = []
+    s.call_at(1.0, lambda: 1 / 0)
+    s.call_at(1.0, fired.append, "after")
+    clock.now = 1.0
+    s.run_due()
+    assert fired == ["after"]
+    assert "ZeroDivisionError" in capsys.readouterr().out
+
+
+def test_thread_wakes_for_an_earlier_timer():
+    s = Scheduler()
+    done = threading.Event()
+    s.call_later(60.0, done.set)
+    s.start()
+    try:
+        # Added while the thread sleeps towards the 60 s deadline.
+        s.call_later(0.01, done.set)
+        assert done.wait(5.0)
+    finally:
+        s.stop()
@@ -0,0 +1,91 @@
+import threading
+
+import send_queue
+from send_queue import SendQueue
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_slow_consumer_is_dropped_after_grace(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(send_queue.time, "monotonic", clock)
+    q = SendQueue(high_water=4, max_frames=100, grace=2.0)
+    for i in range(4):
+        assert q.put(b"lobby%d" % i)
+    # At high water: fine for now, and still fine just inside the grace period.
+    assert q.put(b"late")
+    clock.now += 1.9
+    assert q.put(b"later")
+    clock.now += 0.2
+    assert not q.put(b"too late")
+
+
+def test_draining_resets_the_grace_period(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(send_queue.time, "monotonic", clock)
+    q = SendQueue(high_water=2, max_frames=100, grace=2.0)
+    q.put(b"a")
+    q.put(b"b")
+    clock.now += 1.5
+    assert q.pop_all() == [b"a", b"b"]
+    q.put(b"c")
+    q.put(b"d")
+    clock.now += 1.5
+    assert q.put(b"e")
+
+
+def test_max_frames_drops_at_once():
+    q = SendQueue(high_water=2, max_frames=4, grace=60.0)
+    assert all(q.put(b"x") for _ in range(3))
+    assert not q.put(b"x")
+
+
+def test_stale_state_frames_make_room():
+    q = SendQueue(high_water=3, max_frames=100)
+    q.put(b"s1", droppable=True)
+    q.put(b"join")
+    q.put(b"s2", droppable=True)
+    # Full: the oldest state update goes to make room.
+    q.put(b"attack")
+    assert q.dropped == 1
+    q.put(b"s3", droppable=True)
+    assert q.dropped == 2
+    assert q.pop_all() == [b"join", b"attack", b"s3"]
+    assert q.peak == 3
+
+
+def test_droppable_frame_is_dropped_when_nothing_else_can_go():
+    q = SendQueue(high_water=2, max_frames=100)
+    q.put(b"a")
+    q.put(b"b")
+    assert q.put(b"state", droppable=True)
+    assert q.dropped == 1
+    assert q.pop_all() == [b"a", b"b"]
+
+
+def test_get_batch_blocks_until_put_and_ends_on_close():
+    q = SendQueue()
+    batches = []
+
+    def writer():
+        while True:
+            batch = q.get_batch()
+            if batch is None:
+                return
+            batches.append(batch)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    q.put(b"one")
+    q.close()
+    thread.join(5)
+    assert not thread.is_alive()
+    # Frames queued before close are still delivered.
+    assert [f for b in batches for f in b] == [b"one"]
+    assert q.get_batch(0.01) is None
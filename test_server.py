@@ -0,0 +1,89 @@
+import pytest
+
+import protocol
+import server
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class Member(server.RoomMember):
+    """A RoomMember without a socket: messages go in through `receive`, out through `sent`."""
+
+    def __init__(self, codec=protocol.JSON):
+        self._init_member()
+        self.client_id = "ab12cd34"
+        self.decoder = protocol.FrameDecoder(raw=True)
+        self.codec = codec
+        self.closed = False
+
+    def receive(self, *messages):
+        data = b"".join(self.codec.encode(m) for m in messages)
+        self.decoder.append(data)
+        for msg in self._decode_received(len(data)):
+            self._handle_message(msg)
+
+    def sent(self):
+        return protocol.FrameDecoder().feed(b"".join(self.outbox.pop_all()))
+
+    def _close_transport(self):
+        self.closed = True
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(server.time, "monotonic", clock)
+    return clock
+
+
+@pytest.mark.parametrize("codec", [protocol.JSON, protocol.BINARY])
+def test_pings_and_acks_do_not_keep_a_room_open(clock, codec):
+    member = Member(codec)
+    server.rooms.add_member("idle-test", member, {"id": member.client_id})
+    try:
+        clock.now += 50
+        member.receive({"type": "state", "x": 1.0, "y": 2.0, "hp": 100})
+        assert member.last_seen == clock.now
+        clock.now += 50
+        member.receive({"type": "ping", "t": 1.0}, {"type": "ack", "seq": 3})
+        assert member.last_seen == clock.now - 50
+        server.reap_idle_rooms(40)
+        assert member.closed
+    finally:
+        server.rooms.remove_member("idle-test", member)
+
+
+def test_ping_gets_a_pong_with_the_server_time(clock):
+    member = Member()
+    member.receive({"type": "ping", "t": 150.0})
+    assert member.sent() == [{"type": "pong", "t": 150.0, "st": clock.now}]
+    # No echo yet, so no round trip for the server.
+    assert member.link.samples == 0
+
+
+def test_echoed_pong_is_a_round_trip_sample(clock):
+    # The client's clock reads 50 s ahead of ours; each leg takes 1/16 s.
+    member = Member()
+    clock.now = 100.0625
+    member.receive({"type": "ping", "t": 150.0})
+    (pong,) = member.sent()
+    # The pong reaches the client at 150.125 its time; it pings again at 151.
+    clock.now = 101.0625
+    member.receive({"type": "ping", "t": 151.0, "echo": pong["st"], "held": 151.0 - 150.125})
+    assert member.sent() == [{"type": "pong", "t": 151.0, "st": 101.0625}]
+    assert (member.link.rtt, member.link.offset, member.link.samples) == (0.125, 50.0, 1)
+
+
+def test_malformed_pings_are_ignored(clock):
+    member = Member()
+    member.receive({"type": "ping"}, {"type": "ping", "t": "soon"},
+                   {"type": "ping", "t": 1.0, "echo": "x"}, {"type": "ping", "t": 1.0, "echo": 0.5, "held": None})
+    # Only the last two have a timestamp to answer; their echoes are unusable.
+    assert member.sent() == [{"type": "pong", "t": 1.0, "st": clock.now}] * 2
+    assert member.link.samples == 0
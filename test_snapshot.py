@@ -0,0 +1,88 @@
+import json
+import random
+
+from snapshot import SnapshotHistory, SnapshotReceiver
+
+
+def states_stream(rng, ticks):
+    """Room states over time: players move, join and leave."""
+    players = {"p%d" % i: (10.0 * i, 17.5, 100, 1) for i in range(4)}
+    for tick in range(ticks):
+        for eid in list(players):
+            if rng.random() < 0.6:
+                x, y, hp, alive = players[eid]
+                players[eid] = (round(x + rng.uniform(-1, 1), 2), y, max(0, hp - rng.choice((0, 0, 10))), alive)
+        if rng.random() < 0.05:
+            players["p%d" % (100 + tick)] = (1.0, 17.5, 100, 1)
+        if rng.random() < 0.05 and len(players) > 1:
+            del players[rng.choice(sorted(players))]
+        yield dict(players)
+
+
+def over_the_wire(msg):
+    return json.loads(json.dumps(msg))
+
+
+def test_deltas_rebuild_every_snapshot():
+    rng = random.Random(4)
+    history = SnapshotHistory()
+    receiver = SnapshotReceiver()
+    acked = 0
+    deltas = 0
+    for states in states_stream(rng, 500):
+        history.push(states)
+        base = history.base_for(acked)
+        deltas += bool(base)
+        msg = history.message(base)
+        if rng.random() < 0.2:
+            continue  # lost on the way
+        rebuilt = receiver.apply(over_the_wire(msg))
+        assert rebuilt == states
+        if rng.random() < 0.7:
+            acked = receiver.latest  # the ack itself may be lost too
+    assert deltas > 300
+
+
+def test_never_acked_client_gets_keyframes():
+    history = SnapshotHistory()
+    history.push({"a": (1.0, 2.0, 100, 1)})
+    history.push({"a": (1.5, 2.0, 100, 1), "b": (5.0, 2.0, 90, 1)})
+    assert history.base_for(0) == 0
+    msg = history.message(0)
+    assert msg["base"] == 0 and "gone" not in msg
+    assert SnapshotReceiver().apply(over_the_wire(msg)) == {"a": (1.5, 2.0, 100, 1), "b": (5.0, 2.0, 90, 1)}
+
+
+def test_delta_carries_only_changes():
+    history = SnapshotHistory()
+    first = history.push({"a": (1.0, 2.0, 100, 1), "b": (5.0, 2.0, 90, 1), "c": (9.0, 2.0, 80, 1)})
+    history.push({"a": (1.0, 2.0, 100, 1), "b": (6.0, 2.0, 90, 1)})
+    msg = history.message(history.base_for(first))
+    assert msg["base"] == first
+    assert msg["ents"] == [["b", 6.0, 2.0, 90, 1]]
+    assert msg["gone"] == ["c"]
+
+
+def test_stale_ack_falls_back_to_keyframe():
+    history = SnapshotHistory(size=4)
+    first = history.push({"a": (0.0, 0.0, 100, 1)})
+    for i in range(1, 6):
+        history.push({"a": (float(i), 0.0, 100, 1)})
+    assert history.base_for(first) == 0
+    # Acking the newest snapshot has nothing to diff against yet either.
+    assert history.base_for(history.seq) == 0
+
+
+def test_receiver_refuses_unknown_baselines_and_old_snapshots():
+    history = SnapshotHistory()
+    receiver = SnapshotReceiver()
+    history.push({"a": (1.0, 0.0, 100, 1)})
+    receiver.apply(over_the_wire(history.message(0)))
+    history.push({"a": (2.0, 0.0, 100, 1)})
+    delta = over_the_wire(history.message(1))
+    fresh = SnapshotReceiver()
+    # A delta against a snapshot this receiver never saw (e.g. after a reconnect).
+    assert fresh.apply(delta) is None
+    assert receiver.apply(delta) == {"a": (2.0, 0.0, 100, 1)}
+    assert receiver.apply(delta) is None
+    assert receiver.apply({"type": "snapshot"}) is None
@@ -0,0 +1,147 @@
+import math
+import random
+
+import pytest
+
+import game_logic
+import projectiles as projectiles_module
+from game_logic import GameLogic
+from models import Entity, PowerUp, Projectile
+from projectiles import BROADCAST_MAX
+from spatial_hash import CELL, SpatialHash
+
+
+def coordinate(rng, limit):
+    """A random coordinate, often exactly on or a hair either side of a cell border."""
+    kind = rng.random()
+    if kind < 0.5:
+        return rng.uniform(0, limit)
+    border = rng.randrange(int(limit / CELL) + 1) * CELL
+    if kind < 0.7:
+        return border
+    return border + rng.choice((-1e-9, 1e-9, -0.5, 0.5, -0.999999, 0.999999))
+
+
+def layout(rng, count, width, height, dead=0.1, invulnerable=0.0):
+    entities = []
+    for i in range(count):
+        e = Entity(coordinate(rng, width), coordinate(rng, height), "x", name=str(i))
+        e.vx, e.vy = rng.uniform(-5, 5), rng.uniform(-5, 5)
+        e.is_alive = rng.random() >= dead
+        e.invulnerable = rng.random() < invulnerable
+        entities.append(e)
+    return entities
+
+
+def brute_force_collisions(entities):
+    # The all-pairs pass the spatial hash replaced.
+    for i in range(len(entities)):
+        a = entities[i]
+        if not a.is_alive:
+            continue
+        for j in range(i + 1, len(entities)):
+            b = entities[j]
+            if not b.is_alive:
+                continue
+            dx = b.x - a.x
+            dy = b.y - a.y
+            d = math.hypot(dx, dy)
+            if d < 1.0 and d > 0.001:
+                overlap = 1.0 - d
+                nx = dx / d
+                ny = dy / d
+                a.x -= nx * overlap * 0.5
+                a.y -= ny * overlap * 0.5
+                b.x += nx * overlap * 0.5
+                b.y += ny * overlap * 0.5
+                ax, bx = a.vx, b.vx
+                a.vx = ax * 0.5 + bx * 0.5
+                b.vx = bx * 0.5 + ax * 0.5
+
+
+def state(entities):
+    return [(e.x, e.y, e.vx, e.vy) for e in entities]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_query_finds_every_neighbour(seed):
+    rng = random.Random(seed)
+    points = [(coordinate(rng, 40), coordinate(rng, 20)) for _ in range(300)]
+    grid = SpatialHash()
+    grid.rebuild((i, x, y) for i, (x, y) in enumerate(points))
+    for _ in range(200):
+        x, y = coordinate(rng, 40), coordinate(rng, 20)
+        radius = rng.choice((1.0, 0.5, CELL))
+        found = grid.query(x, y, radius)
+        assert found == sorted(found)
+        near = {i for i, (px, py) in enumerate(points) if abs(px - x) <= radius and abs(py - y) <= radius}
+        assert near <= set(found)
+
+
+def test_move_keeps_queries_current():
+    rng = random.Random(5)
+    grid = SpatialHash()
+    points = {i: (coordinate(rng, 40), coordinate(rng, 20)) for i in range(100)}
+    grid.rebuild((i, x, y) for i, (x, y) in points.items())
+    for _ in range(500):
+        i = rng.randrange(100)
+        points[i] = (coordinate(rng, 40), coordinate(rng, 20))
+        grid.move(i, *points[i])
+    for i, (x, y) in points.items():
+        assert i in grid.query(x, y, 0.0)
+    assert len(grid) == 100
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_entity_collisions_match_brute_force(seed):
+    rng = random.Random(seed)
+    # A crowded arena, so pushes chain through neighbours and across cells.
+    # 10 entities take the all-pairs path (GRID_MIN), the others the grid.
+    count, width = rng.choice(((10, 6), (60, 16), (200, 30)))
+    entities = layout(random.Random(seed), count, width, width / 2)
+    expected = layout(random.Random(seed), count, width, width / 2)
+    GameLogic(80, 24, 18).handle_entity_collisions(entities)
+    brute_force_collisions(expected)
+    assert state(entities) == state(expected)
+    assert state(entities) != state(layout(random.Random(seed), count, width, width / 2))
+
+
+@pytest.mark.skipif(projectiles_module.np is None, reason="numpy is not installed")
+@pytest.mark.parametrize("seed", range(20))
+def test_projectile_hits_match_brute_force(seed):
+    rng = random.Random(seed)
+    entities = layout(rng, 2 * BROADCAST_MAX + rng.randrange(100), 40, 20, dead=0.1, invulnerable=0.1)
+    store = projectiles_module.ProjectileStore()
+    for _ in range(rng.randrange(50, 400)):
+        store.add(coordinate(rng, 40), coordinate(rng, 20), 0.0, 0.0, "*", rng.choice(entities + [None]))
+    grid = GameLogic(80, 24, 18).index_entities(entities)
+    assert len(grid) > BROADCAST_MAX
+    brute = [(i, j) for i in range(store.count) for j, e in enumerate(entities)
+             if e.is_alive and not e.invulnerable and e is not store.owner[i]
+             and abs(e.x - store.x[i]) < 1.0 and abs(e.y - store.y[i]) < 1.0]
+    assert brute
+    assert store.hits(entities, grid) == brute
+    assert store.hits(entities) == brute
+
+
+def pickups_and_hits(seed):
+    rng = random.Random(seed)
+    entities = layout(rng, 100, 40, 20, invulnerable=0.1)
+    projectiles = [Projectile(coordinate(rng, 40), coordinate(rng, 20), 0.0, 0.0, "*", rng.choice(entities), 20)
+                   for _ in range(150)]
+    power_ups = [PowerUp(coordinate(rng, 40), coordinate(rng, 20), "speed") for _ in range(30)]
+    logic = GameLogic(80, 24, 18, rng=random.Random(seed))
+    messages = []
+    logic.handle_power_up_collection(power_ups, entities, [], messages)
+    logic.handle_projectile_collisions(projectiles, entities, [], messages)
+    return [(e.hp, e.vx, e.vy, dict(e.power_ups)) for e in entities], len(projectiles), messages
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_small_rooms_skip_the_grid_with_the_same_result(monkeypatch, seed):
+    monkeypatch.setattr(game_logic, "GRID_MIN", 0)
+    gridded = pickups_and_hits(seed)
+    monkeypatch.setattr(game_logic, "GRID_MIN", 10 ** 9)
+    assert pickups_and_hits(seed) == gridded
+    assert gridded[1] < 150
+    assert any("got SPEED" in m[1] for m in gridded[2])
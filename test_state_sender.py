@@ -0,0 +1,95 @@
+from models import Entity
+from net_client import (CONGESTION_BACKOFF, STATE_INTERVAL, STATE_KEEPALIVE, STATE_MIN_INTERVAL, VELOCITY_JUMP,
+                        StateSender)
+
+FPS = 120
+
+
+class FakeNet:
+    def __init__(self, congested=False):
+        self.congested = congested
+        self.states = []
+
+    def send_state(self, x, y, hp):
+        self.states.append((x, y, hp))
+
+
+class Clock:
+    """Frame clock: `now` steps by exactly 1/FPS per frame."""
+
+    def __init__(self):
+        self.frame = 0
+
+    @property
+    def now(self):
+        return 100.0 + self.frame / FPS
+
+
+def run(sender, player, seconds, frame=None):
+    """Update `sender` every frame for `seconds`; returns the times something was sent."""
+    clock = Clock()
+    sent = []
+    for clock.frame in range(int(seconds * FPS)):
+        if frame is not None:
+            frame(player, clock.frame)
+        if sender.update(player, clock.now):
+            sent.append(clock.now)
+    return sent
+
+
+def assert_every(times, interval):
+    """Each gap is `interval`, rounded up to the next frame."""
+    for a, b in zip(times, times[1:]):
+        assert interval - 1e-9 <= b - a <= interval + 1.0 / FPS + 1e-9
+
+
+def walk(player, frame):
+    player.vx = 8.0
+    player.x += player.vx / FPS
+
+
+def test_first_update_always_goes_out():
+    net = FakeNet()
+    assert StateSender(net).update(Entity(3.0, 4.0, "A"), 0.0)
+    assert net.states == [(3.0, 4.0, 100)]
+
+
+def test_standing_still_sends_only_the_heartbeat():
+    net = FakeNet()
+    sent = run(StateSender(net), Entity(3.0, 4.0, "A"), 5)
+    assert_every(sent, STATE_KEEPALIVE)
+    assert len(net.states) == 5
+
+
+def test_moving_sends_every_interval():
+    sent = run(StateSender(FakeNet()), Entity(3.0, 4.0, "A"), 2, walk)
+    assert_every(sent, STATE_INTERVAL)
+    assert len(sent) >= 2 / (STATE_INTERVAL + 1.0 / FPS)
+
+
+def test_congestion_stretches_the_interval():
+    net = FakeNet(congested=True)
+    sent = run(StateSender(net), Entity(3.0, 4.0, "A"), 3, walk)
+    assert_every(sent, STATE_INTERVAL * CONGESTION_BACKOFF)
+    assert len(sent) >= 3 / (STATE_INTERVAL * CONGESTION_BACKOFF + 1.0 / FPS)
+    net.congested = False
+    assert_every(run(StateSender(net), Entity(3.0, 4.0, "A"), 3, walk), STATE_INTERVAL)
+
+
+def test_urgent_changes_still_wait_for_the_minimum_gap():
+    def hurt(player, frame):
+        player.hp -= 1
+
+    sent = run(StateSender(FakeNet()), Entity(3.0, 4.0, "A"), 1, hurt)
+    assert_every(sent, STATE_MIN_INTERVAL)
+
+
+def test_velocity_jump_is_sent_without_waiting_for_the_interval():
+    net = FakeNet()
+    player = Entity(3.0, 4.0, "A")
+    sender = StateSender(net)
+    assert sender.update(player, 0.0)
+    player.vy = -VELOCITY_JUMP
+    assert not sender.update(player, STATE_MIN_INTERVAL / 2)
+    assert sender.update(player, STATE_MIN_INTERVAL)
+    assert not sender.update(player, STATE_MIN_INTERVAL * 2)
@@ -0,0 +1,51 @@
+import random
+
+from ai import AIController
+from game_logic import GameLogic
+from models import Entity
+from timestep import MAX_STEPS, SIM_DT, FixedTimestep, remember_positions
+
+
+def play(frame_times, seed=11):
+    """Run a seeded AI brawl through FixedTimestep for the given frame durations."""
+    random.seed(seed)
+    logic = GameLogic(80, 24, 18)
+    ai = AIController()
+    entities = [Entity(5 + i * 35, 17.5, "🙂", name=f"P{i}", ai=True) for i in range(3)]
+    projectiles, particles, messages = [], [], []
+    clock = FixedTimestep()
+    for elapsed in frame_times:
+        for _ in range(clock.advance(elapsed)):
+            remember_positions(entities)
+            for e in entities:
+                ai.update_ai_entity(e, entities, projectiles, messages, clock.dt)
+            logic.update_entities(entities, clock.dt)
+            logic.handle_entity_collisions(entities)
+            logic.handle_projectile_collisions(projectiles, entities, particles, messages)
+            logic.update_projectiles(projectiles, clock.dt)
+    return clock, [(e.x, e.y, e.hp, e.kills) for e in entities]
+
+
+def test_simulation_does_not_depend_on_frame_rate():
+    seconds = 20
+    slow_clock, slow = play([1 / 20] * (20 * seconds))
+    fast_clock, fast = play([1 / 144] * (144 * seconds))
+    # Uneven frames, as a terminal under load produces.
+    rng = random.Random(3)
+    uneven = []
+    while sum(uneven) < seconds:
+        uneven.append(rng.choice([0.004, 0.02, 0.05, 0.09]))
+    uneven[-1] -= sum(uneven) - seconds
+    uneven_clock, bumpy = play(uneven)
+
+    assert slow_clock.steps == fast_clock.steps == uneven_clock.steps == round(seconds / SIM_DT)
+    assert slow == fast == bumpy
+
+
+def test_long_frame_is_capped():
+    clock = FixedTimestep()
+    assert clock.advance(5.0) == MAX_STEPS
+    assert 0 <= clock.alpha < 1
+    assert abs(clock.dropped - (5.0 - MAX_STEPS * SIM_DT - clock.accumulator)) < 1e-9
+    # The next frame is an ordinary one.
+    assert clock.advance(SIM_DT) == 1
@@ -0,0 +1,49 @@
+# Simulation steps per second in local and peer-to-peer games. Physics,
+# AI and collisions always advance by SIM_DT, whatever the frame rate.
+SIM_RATE = 60
+SIM_DT = 1.0 / SIM_RATE
+# Most steps one frame may run to catch up. A frame slower than this many
+# steps drops the rest of its time instead of making the next frame
+# slower still (the "spiral of death").
+MAX_STEPS = 8
+
+
+class FixedTimestep:
+    """Accumulates wall-clock time and pays it out in fixed simulation steps.
+
+    Each frame, `advance(elapsed)` says how many steps of `dt` to run.
+    What is left over, as a fraction of a step, is `alpha`: the renderer
+    draws entities that far between their positions before and after the
+    last step (see remember_positions). Time beyond `max_steps` steps is
+    dropped and added up in `dropped`.
+    """
+
+    def __init__(self, dt=SIM_DT, max_steps=MAX_STEPS):
+        self.dt = dt
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.steps = 0
+        self.dropped = 0.0
+
+    def advance(self, elapsed):
+        self.accumulator += max(0.0, elapsed)
+        # The epsilon keeps float error from turning a whole step into
+        # 0.9999... of one and running it a frame late.
+        steps = int(self.accumulator / self.dt + 1e-6)
+        self.accumulator = max(0.0, self.accumulator - steps * self.dt)
+        if steps > self.max_steps:
+            self.dropped += (steps - self.max_steps) * self.dt
+            steps = self.max_steps
+        self.steps += steps
+        return steps
+
+    @property
+    def alpha(self):
+        return min(1.0, self.accumulator / self.dt)
+
+
+def remember_positions(entities):
+    """Record where entities are before a step, for render interpolation."""
+    for e in entities:
+        e.prev_x = e.x
+        e.prev_y = e.y
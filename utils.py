@@ -1,4 +1,3 @@
-import curses
 import math
 import random
 
@@ -14,12 +13,16 @@ KEY_ATTACK = ord('s')
 KEY_SPECIAL = ord('f')
 KEY_QUIT = ord('q')
 
+# Colors are curses.COLOR_* names, looked up by curses_color() when
+# Renderer.draw_power_ups draws: the numbers differ between curses builds,
+# and looking them up late keeps curses out of the simulation modules that
+# import this one (headless.py).
 POWERUP_TYPES = {
-    'health': {'emoji': '❤️', 'color': curses.COLOR_RED},
-    'speed': {'emoji': '⚡', 'color': curses.COLOR_YELLOW},
-    'damage': {'emoji': '💥', 'color': curses.COLOR_MAGENTA},
-    'shield': {'emoji': '🛡️', 'color': curses.COLOR_BLUE},
-    'infinite': {'emoji': '♾️', 'color': curses.COLOR_CYAN}
+    'health': {'emoji': '❤️', 'color': 'red'},
+    'speed': {'emoji': '⚡', 'color': 'yellow'},
+    'damage': {'emoji': '💥', 'color': 'magenta'},
+    'shield': {'emoji': '🛡️', 'color': 'blue'},
+    'infinite': {'emoji': '♾️', 'color': 'cyan'}
 }
 
 EMOJI_CHARACTERS = ['😀','😈','👾','🤖','🐲','🦊','🐼','🐵','👻','🤡','👹','👺','💀','🤖','👽','🎃']
@@ -38,24 +41,32 @@ def dist(a, b):
     dy = a.y - b.y
     return math.hypot(dx, dy)
 
-def create_explosion_particles(x, y, count=8):
-    from models import Particle
+def create_explosion_particles(x, y, count=8, rng=random):
+    from models import particle_pool
     
     particles = []
     for _ in range(count):
-        angle = random.uniform(0, 2 * math.pi)
-        speed = random.uniform(5, 15)
+        angle = rng.uniform(0, 2 * math.pi)
+        speed = rng.uniform(5, 15)
         vx = math.cos(angle) * speed
         vy = math.sin(angle) * speed
-        emoji = random.choice(PARTICLE_EMOJIS)
-        particles.append(Particle(x, y, vx, vy, emoji, random.uniform(0.5, 1.5)))
+        emoji = rng.choice(PARTICLE_EMOJIS)
+        particles.append(particle_pool.acquire(x, y, vx, vy, emoji, rng.uniform(0.5, 1.5)))
     return particles
 
 def setup_colors():
+    import curses
+
     curses.start_color()
     curses.use_default_colors()
     for i in range(1, 8):
         curses.init_pair(i, i, -1)
 
-def get_random_position(max_x, ground_row):
-    return random.randint(4, max_x - 6), ground_row - 1
+def curses_color(name):
+    """curses.COLOR_* for a color name like 'red'."""
+    import curses
+
+    return getattr(curses, "COLOR_" + name.upper())
+
+def get_random_position(max_x, ground_row, rng=random):
+    return rng.randint(4, max_x - 6), ground_row - 1
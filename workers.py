@@ -0,0 +1,184 @@
+import asyncio
+import json
+import multiprocessing
+import signal
+import socket
+import socketserver
+import sys
+
+import protocol
+import server
+
+# `--workers N`: a gateway process owns the listening port and reads each
+# new connection's first line, which is the client's `join`. It hashes the
+# room id to one of N worker processes (server.room_worker) and passes the
+# socket itself, plus the bytes read so far, over a Unix socket
+# (SCM_RIGHTS). A worker is a normal threaded or asyncio server that gets
+# its clients from the gateway instead of accept(), so every player of a
+# room lands in the same process and rooms spread over all cores.
+#
+# SO_REUSEPORT alone would balance connections by address, not by room,
+# so it cannot keep a room's players together.
+
+# Seconds a new connection may take to send its join before the gateway drops it.
+JOIN_TIMEOUT = 30.0
+# Largest handoff: a join line of up to MAX_FRAME plus the rest of that read.
+HANDOFF_MAX = protocol.MAX_FRAME + protocol.RECV_SIZE
+
+
+def send_handoff(channel, sock, data):
+    socket.send_fds(channel, [bytes(data)], [sock.fileno()])
+
+
+def receive_handoff(channel):
+    """Return (socket, already-read bytes), or raise EOFError when the gateway is gone."""
+    data, fds, _, _ = socket.recv_fds(channel, HANDOFF_MAX, 1)
+    if not fds:
+        raise EOFError
+    return socket.socket(fileno=fds[0]), data
+
+
+class HandoffSocket:
+    """A handed-over client socket that first replays what the gateway already read."""
+
+    def __init__(self, sock, pending):
+        self._sock = sock
+        self._pending = pending
+
+    def recv_into(self, buffer, nbytes=0):
+        if not self._pending:
+            return self._sock.recv_into(buffer, nbytes)
+        size = min(nbytes or len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
+
+
+class WorkerServer(socketserver.ThreadingMixIn, socketserver.BaseServer):
+    """Threaded server whose "accept" is a handoff from the gateway."""
+
+    daemon_threads = True
+
+    def __init__(self, channel):
+        super().__init__(None, server.ClientHandler)
+        self.channel = channel
+
+    def fileno(self):
+        return self.channel.fileno()
+
+    def get_request(self):
+        try:
+            sock, data = receive_handoff(self.channel)
+        except EOFError:
+            raise SystemExit(0)
+        # The gateway accepted it in non-blocking mode; this worker reads it from a thread.
+        sock.setblocking(True)
+        return HandoffSocket(sock, data), sock.getpeername()
+
+    def shutdown_request(self, request):
+        try:
+            request.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        request.close()
+
+
+async def _serve_handoff(sock, data):
+    from async_server import AsyncClient
+    reader, writer = await asyncio.open_connection(sock=sock)
+    await AsyncClient(reader, writer, initial=data).handle()
+
+
+async def _run_async_worker(channel):
+    loop = asyncio.get_running_loop()
+    loop.create_task(server.scheduler.run_async())
+    channel.setblocking(False)
+    closed = loop.create_future()
+
+    def on_handoff():
+        try:
+            sock, data = receive_handoff(channel)
+        except BlockingIOError:
+            return
+        except (EOFError, OSError):
+            loop.remove_reader(channel.fileno())
+            closed.set_result(None)
+            return
+        loop.create_task(_serve_handoff(sock, data))
+
+    loop.add_reader(channel.fileno(), on_handoff)
+    await closed
+
+
+def _worker_main(channel, index, workers, args):
+    server.worker_slot = (index, workers)
+    server.configure(args)
+    try:
+        if args.mode == "asyncio":
+            asyncio.run(_run_async_worker(channel))
+        else:
+            server.scheduler.start()
+            WorkerServer(channel).serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def _join_room_of(data):
+    """Room id of the join at the start of `data`; anything else goes with "lobby"."""
+    line = bytes(data[:data.find(b"\n")])
+    try:
+        msg = json.loads(line.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        msg = None
+    if isinstance(msg, dict) and msg.get("type") == "join":
+        return server.join_room_id(msg)
+    return "lobby"
+
+
+async def _route(sock, channels):
+    loop = asyncio.get_running_loop()
+    data = bytearray()
+    try:
+        while b"\n" not in data:
+            if len(data) > protocol.MAX_FRAME:
+                raise ConnectionError("no join line")
+            chunk = await asyncio.wait_for(loop.sock_recv(sock, protocol.RECV_SIZE), JOIN_TIMEOUT)
+            if not chunk:
+                raise ConnectionError("closed before join")
+            data += chunk
+        index = server.room_worker(_join_room_of(data), len(channels))
+        send_handoff(channels[index], sock, data)
+    except (OSError, asyncio.TimeoutError):
+        pass
+    finally:
+        sock.close()
+
+
+async def _run_gateway(host, port, channels):
+    loop = asyncio.get_running_loop()
+    listener = socket.create_server((host, port), backlog=4096)
+    listener.setblocking(False)
+    with listener:
+        while True:
+            sock, _ = await loop.sock_accept(listener)
+            loop.create_task(_route(sock, channels))
+
+
+def serve_workers(args):
+    channels = []
+    for index in range(args.workers):
+        gateway_end, worker_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        proc = multiprocessing.Process(target=_worker_main, args=(worker_end, index, args.workers, args), daemon=True)
+        proc.start()
+        worker_end.close()
+        channels.append(gateway_end)
+    print(f"Server listening on {args.host}:{args.port} ({args.workers} {args.mode} workers)")
+    # Exit normally on SIGTERM so multiprocessing stops the workers too.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        asyncio.run(_run_gateway(args.host, args.port, channels))
+    except KeyboardInterrupt:
+        pass